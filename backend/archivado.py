@@ -0,0 +1,183 @@
+"""Archivado en frío de los movimientos de periodos cerrados.
+
+Casi todas las lecturas son de los últimos meses, así que los movimientos anteriores a un
+corte (primer día de un mes ya cerrado) se mueven de Movimiento a Movimiento_Archivo, con
+las mismas columnas e ids. Ni Cuenta.saldo_actual, ni Meta.monto_actual, ni Resumen_Mensual
+se tocan: son acumulados guardados, no se recalculan desde los movimientos. Los movimientos
+que son abonos a una meta se quedan en Movimiento (Movimiento_Meta los referencia).
+
+Invariante: Movimiento_Archivo solo contiene movimientos con fecha < ``corte`` (el mayor de
+Corte_Archivo). Movimiento puede seguir teniendo movimientos antiguos (abonos, altas con
+fecha pasada, restaurados), así que una lectura cuyo rango empieza en o después del corte
+solo necesita Movimiento, y una que llega antes del corte une las dos tablas.
+
+Editar o borrar un movimiento archivado lo devuelve antes a Movimiento (``restaurar``).
+
+Ejecución incremental (lotes pequeños, cada uno en su transacción; se puede interrumpir y
+repetir):
+
+    python archivado.py --meses 12            # archiva lo anterior a los últimos 12 meses cerrados
+    python archivado.py --hasta 2024-01-01 --lote 5000
+    python archivado.py --estado
+"""
+import argparse
+import datetime
+import sys
+from typing import Optional
+
+from sqlalchemy import delete, exists, func, insert, select, union_all
+from sqlalchemy.orm import Session
+
+import models
+
+TAMAÑO_LOTE = 5000
+COLUMNAS = ("movimiento_id", "cuenta_id", "categoria_id", "usuario_id", "tipo", "monto", "fecha", "descripcion")
+
+CONSULTA_CORTE = select(func.max(models.CorteArchivo.corte))
+
+
+def corte(db: Session) -> Optional[datetime.datetime]:
+    return db.execute(CONSULTA_CORTE).scalar()
+
+
+def alcanza(corte: Optional[datetime.datetime], fecha_desde: Optional[datetime.datetime]) -> bool:
+    """True si un rango que empieza en ``fecha_desde`` (None = sin límite) puede tener datos archivados."""
+    return corte is not None and (fecha_desde is None or fecha_desde < corte)
+
+
+def movimientos(con_archivo: bool):
+    """Movimiento, o Movimiento ∪ Movimiento_Archivo como subconsulta con las mismas columnas (``.c``)."""
+    caliente = models.Movimiento.__table__
+    if not con_archivo:
+        return caliente
+    frio = models.MovimientoArchivo.__table__
+    return union_all(
+        select(*(caliente.c[c] for c in COLUMNAS)),
+        select(*(frio.c[c] for c in COLUMNAS)),
+    ).subquery("movimientos")
+
+
+def unir(consultas, *claves: str):
+    """UNION ALL de consultas ya ordenadas y limitadas por rama, ordenado de nuevo por ``claves`` (descendente)."""
+    union = union_all(*(select(c.subquery()) for c in consultas)).subquery()
+    return select(union).order_by(*(union.c[clave].desc() for clave in claves))
+
+
+def _archivables(hasta: datetime.datetime):
+    m = models.Movimiento
+    return (
+        m.fecha < hasta,
+        ~exists().where(models.MovimientoMeta.movimiento_id == m.movimiento_id),
+    )
+
+
+def mover_lote(db: Session, hasta: datetime.datetime, lote: int = TAMAÑO_LOTE) -> int:
+    """Mueve al archivo hasta ``lote`` movimientos anteriores a ``hasta``. No hace commit."""
+    m = models.Movimiento
+    ids = db.scalars(
+        select(m.movimiento_id).where(*_archivables(hasta)).order_by(m.movimiento_id).limit(lote).with_for_update()
+    ).all()
+    if not ids:
+        return 0
+    # Las condiciones se repiten en el INSERT y el DELETE: en SQLite el SELECT no bloquea, y una
+    # edición concurrente pudo cambiar la fecha entre medias
+    condiciones = (m.movimiento_id.in_(ids), *_archivables(hasta))
+    db.execute(insert(models.MovimientoArchivo).from_select(
+        COLUMNAS, select(*(getattr(m, c) for c in COLUMNAS)).where(*condiciones)
+    ))
+    return db.execute(delete(m).where(*condiciones)).rowcount
+
+
+def restaurar(db: Session, usuario_id: int, movimiento_id: int) -> bool:
+    """Devuelve un movimiento archivado del usuario a Movimiento (antes de editarlo o borrarlo). No hace commit."""
+    a = models.MovimientoArchivo
+    condiciones = (a.movimiento_id == movimiento_id, a.usuario_id == usuario_id)
+    db.execute(insert(models.Movimiento).from_select(
+        COLUMNAS, select(*(getattr(a, c) for c in COLUMNAS)).where(*condiciones)
+    ))
+    return db.execute(delete(a).where(*condiciones)).rowcount == 1
+
+
+def hay_archivados(db: Session, *condiciones) -> bool:
+    return db.execute(select(exists().where(*condiciones))).scalar()
+
+
+def validar_corte(hasta: datetime.date, hoy: datetime.date) -> datetime.datetime:
+    # Solo periodos cerrados: el corte es el primer día de un mes que no sea posterior al actual
+    if hasta.day != 1:
+        raise ValueError("El corte debe ser el primer día de un mes")
+    if hasta > hoy.replace(day=1):
+        raise ValueError("Solo se pueden archivar meses ya cerrados")
+    return datetime.datetime.combine(hasta, datetime.time.min)
+
+
+def archivar(db: Session, hasta: datetime.datetime, lote: int = TAMAÑO_LOTE, progreso=None) -> int:
+    """Registra el corte y mueve todo lo archivable en lotes, con un commit por lote."""
+    # El corte se guarda antes de mover nada: desde ese momento las lecturas anteriores al
+    # corte ya unen las dos tablas y ningún movimiento queda invisible a mitad del proceso
+    registro = models.CorteArchivo(corte=max(hasta, corte(db) or hasta), archivados=0)
+    db.add(registro)
+    db.commit()
+
+    total = 0
+    while True:
+        movidos = mover_lote(db, hasta, lote)
+        if not movidos:
+            db.commit() # libera el bloqueo del último SELECT ... FOR UPDATE, que no encontró nada
+            break
+        total += movidos
+        registro.archivados = total
+        db.commit()
+        if progreso:
+            progreso(total)
+    return total
+
+
+def estado(db: Session) -> dict:
+    return {
+        "corte": corte(db),
+        "calientes": db.execute(select(func.count()).select_from(models.Movimiento)).scalar(),
+        "archivados": db.execute(select(func.count()).select_from(models.MovimientoArchivo)).scalar(),
+    }
+
+
+def _restar_meses(fecha: datetime.date, meses: int) -> datetime.date:
+    indice = fecha.year * 12 + fecha.month - 1 - meses
+    return datetime.date(indice // 12, indice % 12 + 1, 1)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Archiva los movimientos de periodos cerrados")
+    grupo = parser.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--meses", type=int, help="meses cerrados que se quedan en la tabla caliente")
+    grupo.add_argument("--hasta", type=datetime.date.fromisoformat, help="corte (primer día de mes, excluido)")
+    grupo.add_argument("--estado", action="store_true", help="muestra el corte y el tamaño de cada tabla")
+    parser.add_argument("--lote", type=int, default=TAMAÑO_LOTE, help="movimientos por transacción")
+    args = parser.parse_args()
+
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if args.estado:
+            for clave, valor in estado(db).items():
+                print(f"{clave:<11} {valor}")
+            return 0
+        hoy = datetime.date.today()
+        if args.meses is not None and args.meses < 0:
+            parser.error("--meses no puede ser negativo")
+        hasta = args.hasta or _restar_meses(hoy.replace(day=1), args.meses)
+        try:
+            corte_nuevo = validar_corte(hasta, hoy)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Archivando movimientos anteriores a {corte_nuevo:%Y-%m-%d} (lotes de {args.lote})...")
+        total = archivar(db, corte_nuevo, args.lote, lambda n: print(f"  {n:,} archivados", flush=True))
+        print(f"Listo: {total:,} movimientos archivados")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
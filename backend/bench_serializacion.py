@@ -0,0 +1,131 @@
+"""Compara el listado de movimientos antes y después del camino rápido de serialización.
+
+    antes:  SELECT de objetos ORM (joinedload + selectinload) -> validación Pydantic
+            from_attributes -> dump_json (lo que hace FastAPI con response_model)
+    ahora:  SELECT de columnas -> dicts -> orjson (respuestas.json_rapido)
+
+Usa una base SQLite temporal en memoria con datos sintéticos; no toca DATABASE_URL.
+
+    python bench_serializacion.py                 # 10.000 y 100.000 filas
+    python bench_serializacion.py 5000 50000      # tamaños a medida
+"""
+import datetime
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+from typing import List
+
+os.environ.setdefault("DATABASE_URL", "sqlite://") # database.py la exige al importarse
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+import models
+import respuestas
+import schemas
+from database import Base
+from routers import movimientos
+
+REPETICIONES = 3
+TAMAÑO_IN = 500 # parámetros por SELECT ... IN (como selectinload)
+
+
+def poblar(db: Session, filas: int):
+    aleatorio = random.Random(filas)
+    db.add(models.Usuario(usuario_id=1, nombre="bench", email="bench@example.com", contraseña="x"))
+    db.execute(insert(models.Cuenta), [
+        {"cuenta_id": i, "usuario_id": 1, "nombre_cuenta": f"Cuenta {i}", "saldo_actual": 0} for i in range(1, 4)
+    ])
+    db.execute(insert(models.Categoria), [
+        {"categoria_id": i, "usuario_id": 1, "nombre_categoria": f"Categoría {i}", "tipo": "Gasto" if i % 3 else "Ingreso"}
+        for i in range(1, 11)
+    ])
+    db.add(models.Meta(meta_id=1, usuario_id=1, nombre_meta="Meta", monto_objetivo=1000, monto_actual=0,
+                       fecha_inicio=datetime.datetime(2024, 1, 1), fecha_fin=datetime.datetime(2025, 1, 1)))
+    inicio = datetime.datetime(2020, 1, 1)
+    db.execute(insert(models.Movimiento), [
+        {
+            "movimiento_id": i,
+            "usuario_id": 1,
+            "cuenta_id": aleatorio.randint(1, 3),
+            "categoria_id": aleatorio.randint(1, 10),
+            "tipo": aleatorio.choice(("Ingreso", "Gasto")),
+            "monto": Decimal(aleatorio.randint(100, 10_000_000)) / 100,
+            "fecha": inicio + datetime.timedelta(minutes=aleatorio.randint(0, 3_000_000)),
+            "descripcion": f"Movimiento {i}",
+        }
+        for i in range(1, filas + 1)
+    ])
+    db.execute(insert(models.MovimientoMeta), [
+        {"meta_id": 1, "movimiento_id": i, "monto_destinado": Decimal("10.00"), "fecha_asignacion": inicio}
+        for i in range(1, filas + 1, 20)
+    ])
+    db.commit()
+
+
+def antes(db: Session, filas: int):
+    stmt = select(models.Movimiento).options(
+        joinedload(models.Movimiento.categoria),
+        joinedload(models.Movimiento.cuenta),
+        selectinload(models.Movimiento.movimientos_meta),
+    ).where(models.Movimiento.usuario_id == 1).order_by(
+        models.Movimiento.fecha.desc(), models.Movimiento.movimiento_id.desc()
+    ).limit(filas)
+    t0 = time.perf_counter()
+    resultado = db.execute(stmt).unique().scalars().all()
+    for m in resultado:
+        m.nombre_categoria = m.categoria.nombre_categoria
+        m.nombre_cuenta = m.cuenta.nombre_cuenta
+    t1 = time.perf_counter()
+    adaptador = TypeAdapter(List[schemas.Movimiento])
+    cuerpo = adaptador.dump_json(adaptador.validate_python(resultado, from_attributes=True))
+    return t1 - t0, time.perf_counter() - t1, cuerpo
+
+
+def ahora(db: Session, filas: int):
+    filtros = movimientos.FiltrosMovimientos(limit=filas - 1) # la consulta pide limit + 1
+    t0 = time.perf_counter()
+    resultado = db.execute(movimientos.consulta_movimientos(1, filtros)).all()
+    ids = [f.movimiento_id for f in resultado]
+    metas = []
+    for i in range(0, len(ids), TAMAÑO_IN):
+        metas += db.execute(movimientos.consulta_metas(ids[i:i + TAMAÑO_IN])).all()
+    t1 = time.perf_counter()
+    cuerpo = respuestas.dumps(movimientos.filas_a_dicts(resultado, metas))
+    return t1 - t0, time.perf_counter() - t1, cuerpo
+
+
+def medir(funcion, db: Session, filas: int):
+    mejor = None
+    for _ in range(REPETICIONES):
+        db.expunge_all()
+        consulta, serializacion, cuerpo = funcion(db, filas)
+        if mejor is None or consulta + serializacion < mejor[0] + mejor[1]:
+            mejor = (consulta, serializacion, cuerpo)
+    return mejor
+
+
+def main() -> int:
+    tamaños = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'filas':>8}  {'camino':<7}  {'consulta':>10}  {'serializ.':>10}  {'total':>10}  {'bytes':>12}")
+    for filas in tamaños:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        with Session(engine) as db:
+            poblar(db, filas)
+            resultados = {nombre: medir(funcion, db, filas) for nombre, funcion in (("antes", antes), ("ahora", ahora))}
+        engine.dispose()
+        for nombre, (consulta, serializacion, cuerpo) in resultados.items():
+            print(f"{filas:>8}  {nombre:<7}  {consulta * 1000:>8.1f}ms  {serializacion * 1000:>8.1f}ms  "
+                  f"{(consulta + serializacion) * 1000:>8.1f}ms  {len(cuerpo):>12,}")
+        a, b = resultados["antes"], resultados["ahora"]
+        igual = "mismo JSON" if a[2] == b[2] else "¡JSON DISTINTO!"
+        print(f"{'':>8}  mejora total x{(a[0] + a[1]) / (b[0] + b[1]):.1f}, serialización x{a[1] / b[1]:.1f} ({igual})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""Búsqueda de texto completo en Movimiento.descripcion.
+
+- Postgres: índice GIN sobre la expresión ``to_tsvector('spanish', coalesce(descripcion, ''))``
+  (ix_movimiento_descripcion_fts). Lo mantiene la propia base de datos en cada INSERT/UPDATE,
+  también en COPY; la consulta debe usar exactamente la misma expresión (``vector``).
+- SQLite: tabla FTS5 ``movimiento_fts`` de contenido externo (content='Movimiento'), sincronizada
+  con triggers AFTER INSERT / UPDATE OF descripcion / DELETE (migración 0006). Así la mantienen
+  todos los caminos de escritura (alta, lote, edición, borrado, importación, abonos, generar_datos)
+  sin tener que acordarse en cada uno.
+- Otros motores: LIKE sin índice, para que el endpoint funcione igual.
+
+Movimiento_Archivo (archivado.py) tiene su propio índice GIN en Postgres; en SQLite no tiene
+tabla FTS y sus movimientos se buscan con LIKE, con relevancia 0 (detrás de los calientes).
+
+La consulta del usuario se parte en palabras y se exigen todas, cada una como prefijo
+("super" encuentra "supermercado"); las tildes no importan en SQLite. La relevancia es
+``ts_rank_cd`` en Postgres y ``-bm25`` en SQLite: mayor es mejor.
+"""
+import re
+from typing import List
+
+from sqlalchemy import and_, column, func, literal, literal_column, table, text
+
+import models
+
+MAX_TERMINOS = 8
+CONFIGURACION = "'spanish'"
+
+
+def vector(tabla=models.Movimiento):
+    # Misma expresión que el índice GIN (con literales, no parámetros, para que Postgres la reconozca)
+    return func.to_tsvector(literal_column(CONFIGURACION), func.coalesce(tabla.descripcion, literal_column("''")))
+
+
+FTS = table("movimiento_fts", column("rowid"))
+
+
+def terminos(texto: str) -> List[str]:
+    # Solo letras y dígitos: ninguna palabra puede colar operadores de tsquery o de FTS5
+    return re.findall(r"\w+", texto.lower())[:MAX_TERMINOS]
+
+
+def aplicar(stmt, palabras: List[str], dialecto: str, tabla=models.Movimiento):
+    """Filtra ``stmt`` (un SELECT sobre ``tabla``) por ``palabras``; devuelve (stmt, relevancia)."""
+    if dialecto == "postgresql":
+        documento = vector(tabla)
+        consulta = func.to_tsquery(literal_column(CONFIGURACION), " & ".join(f"{p}:*" for p in palabras))
+        return stmt.where(documento.bool_op("@@")(consulta)), func.ts_rank_cd(documento, consulta)
+    if dialecto == "sqlite" and tabla is models.Movimiento:
+        stmt = stmt.join(FTS, FTS.c.rowid == models.Movimiento.movimiento_id).where(
+            text("movimiento_fts MATCH :busqueda").bindparams(busqueda=" ".join(f'"{p}"*' for p in palabras))
+        )
+        return stmt, -func.bm25(literal_column("movimiento_fts"))
+    condiciones = [func.lower(tabla.descripcion).contains(p, autoescape=True) for p in palabras]
+    return stmt.where(and_(*condiciones)), literal(0.0)
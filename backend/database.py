@@ -1,10 +1,15 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
-# Carga las variables del archivo .env
+# Carga las variables del archivo .env (el resto de módulos las leen después de importar este)
 load_dotenv()
 
 # Obtiene la URL. Si no existe, lanza un error para avisarte.
@@ -12,10 +17,147 @@ SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 if not SQLALCHEMY_DATABASE_URL:
     raise ValueError("No se encontró la variable DATABASE_URL en el archivo .env")
 
+# Configuración del pool de conexiones (todas opcionales, ver .env)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE") or 5)
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW") or 10)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT") or 30) # segundos esperando una conexión libre
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE") or 1800) # segundos; evita conexiones cerradas por el servidor
+DB_POOL_PRE_PING = (os.getenv("DB_POOL_PRE_PING") or "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS") or 0) # 0 = sin límite (solo Postgres)
+
+# Réplica de lectura opcional: los GET la usan salvo para el usuario que acaba de escribir,
+# que lee de la primaria durante LECTURA_PRIMARIA_SEGUNDOS (debe superar el retraso de la réplica)
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL")
+LECTURA_PRIMARIA_SEGUNDOS = float(os.getenv("LECTURA_PRIMARIA_SEGUNDOS") or 5)
+
+logger = logging.getLogger(__name__)
+
+# QueuePool que además mide cuánto espera cada petición por una conexión
+class PoolMedido(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            logger.warning("Pool de conexiones agotado: %s", self.status())
+            raise
+        finally:
+            espera = time.perf_counter() - inicio
+            self.checkouts += 1
+            self.espera_total += espera
+            self.espera_maxima = max(self.espera_maxima, espera)
+
+def _opciones_engine(url: str) -> dict:
+    url = make_url(url)
+    opciones = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return opciones # SQLite en memoria usa su propio pool de una sola conexión
+    opciones.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return opciones
+
+def _crear_engine(url: str):
+    connect_args = {}
+    if DB_STATEMENT_TIMEOUT_MS and make_url(url).get_backend_name() == "postgresql":
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    opciones = _opciones_engine(url)
+    if "pool_size" in opciones:
+        opciones["poolclass"] = PoolMedido
+    motor = create_engine(url, connect_args=connect_args, **opciones)
+    if motor.dialect.name == "sqlite":
+        event.listen(motor, "before_cursor_execute", _bloqueo_sqlite)
+    return motor
+
+# SQLite no tiene SELECT ... FOR UPDATE y sqlite3 solo abre la transacción en la primera
+# escritura: dos peticiones podrían leer la misma fila antes de que ninguna escriba. Una
+# lectura con with_for_update() abre la transacción con BEGIN IMMEDIATE, que toma el
+# bloqueo de escritura (o espera al timeout de SQLite) y lo mantiene hasta el commit.
+def _bloqueo_sqlite(conn, cursor, statement, parameters, context, executemany):
+    consulta = getattr(getattr(context, "compiled", None), "statement", None)
+    if getattr(consulta, "_for_update_arg", None) is not None and not cursor.connection.in_transaction:
+        cursor.execute("BEGIN IMMEDIATE")
+
 # Configuración del motor de base de datos
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = _crear_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_engine = _crear_engine(REPLICA_DATABASE_URL) if REPLICA_DATABASE_URL else None
+SessionLectura = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) if replica_engine else None
+
+# Sesión de la réplica: un flush sería un error de programación (una escritura en un GET)
+if SessionLectura is not None:
+    @event.listens_for(SessionLectura, "before_flush")
+    def _solo_lectura(session, flush_context, instances):
+        raise RuntimeError("La sesión de lectura (réplica) no admite escrituras")
+
+# Usuarios que escribieron hace menos de LECTURA_PRIMARIA_SEGUNDOS (lectura de lo escrito).
+# Es memoria del proceso: con varios workers, cada uno solo conoce las escrituras que atendió.
+class EscriturasRecientes:
+    def __init__(self, ventana: float):
+        self.ventana = ventana
+        self._hasta = {}
+        self._lock = threading.Lock()
+
+    def marcar(self, usuario_id: int):
+        ahora = time.monotonic()
+        with self._lock:
+            self._hasta[usuario_id] = ahora + self.ventana
+            # Limpieza perezosa de las entradas vencidas para que el dict no crezca sin límite
+            if len(self._hasta) > 1024:
+                for clave in [c for c, hasta in self._hasta.items() if hasta < ahora]:
+                    del self._hasta[clave]
+
+    def reciente(self, usuario_id: int) -> bool:
+        with self._lock:
+            hasta = self._hasta.get(usuario_id)
+        return hasta is not None and hasta >= time.monotonic()
+
+escrituras_recientes = EscriturasRecientes(LECTURA_PRIMARIA_SEGUNDOS)
+
+def usar_replica(usuario_id: int) -> bool:
+    return replica_engine is not None and not escrituras_recientes.reciente(usuario_id)
+
+# Modo async opcional (DB_ASYNC=1): AsyncEngine con asyncpg (Postgres) o aiosqlite (SQLite).
+# Requiere instalar el driver correspondiente. ASYNC_DATABASE_URL permite indicar la URL
+# explícitamente; si no, se deriva de DATABASE_URL cambiando el driver.
+DB_ASYNC = (os.getenv("DB_ASYNC") or "").lower() in ("1", "true", "yes")
+
+def _url_async(url: str):
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    # asyncpg no entiende sslmode (habitual en las URLs de Render): usa ssl
+    query = dict(url.query)
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return url.set(drivername="postgresql+asyncpg", query=query)
+
+async_engine = None
+AsyncSessionLocal = None
+async_replica_engine = None
+AsyncSessionLectura = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    def _crear_async_engine(url):
+        connect_args = {}
+        if DB_STATEMENT_TIMEOUT_MS and make_url(url).get_backend_name() == "postgresql":
+            connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        return create_async_engine(url, connect_args=connect_args, **_opciones_engine(url))
+
+    async_engine = _crear_async_engine(os.getenv("ASYNC_DATABASE_URL") or _url_async(SQLALCHEMY_DATABASE_URL))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if REPLICA_DATABASE_URL:
+        async_replica_engine = _crear_async_engine(os.getenv("ASYNC_REPLICA_DATABASE_URL") or _url_async(REPLICA_DATABASE_URL))
+        AsyncSessionLectura = async_sessionmaker(async_replica_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Función para obtener la sesión (se usará en cada petición)
@@ -24,4 +166,50 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Versión async de get_db (solo disponible con DB_ASYNC=1)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Sesión nueva para leer datos del usuario fuera de una dependencia (p. ej. la exportación).
+# Los endpoints usan versiones.get_db_lectura, que además reutiliza la sesión de get_db.
+def sesion_lectura(usuario_id: int) -> Session:
+    return SessionLectura() if usar_replica(usuario_id) else SessionLocal()
+
+# Estado del pool para el health check: conexiones en uso, overflow y espera por conexión
+def estadisticas_pool(motor=None) -> dict:
+    pool = (motor or engine).pool
+    if not isinstance(pool, PoolMedido):
+        return {"pool": type(pool).__name__}
+    return {
+        "tamaño": pool.size(),
+        "en_uso": pool.checkedout(),
+        "libres": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0), # SQLAlchemy lo reporta negativo mientras el pool no está lleno
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checkouts": pool.checkouts,
+        "timeouts": pool.timeouts,
+        "espera_media_ms": round(pool.espera_total / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+        "espera_maxima_ms": round(pool.espera_maxima * 1000, 3),
+    }
+
+# Para la readiness probe: True si la base de datos responde
+def comprobar_conexion() -> bool:
+    try:
+        with engine.connect() as conexion:
+            conexion.execute(text("SELECT 1"))
+        return True
+    except exc.SQLAlchemyError:
+        logger.warning("La base de datos no responde", exc_info=True)
+        return False
+
+# Aplica las migraciones pendientes (equivale a "alembic upgrade head")
+def migrar():
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
@@ -0,0 +1,332 @@
+"""Generador de datos sintéticos a gran escala (pruebas de volumen y benchmarks).
+
+Crea usuarios con sus cuentas, categorías, metas (con su categoría automática), movimientos,
+abonos (Movimiento_Meta) y el resumen mensual. Los datos son coherentes: ``saldo_actual`` de
+cada cuenta es la suma de sus movimientos, ``monto_actual`` de cada meta la de sus abonos, y
+Resumen_Mensual coincide con lo que daría ``resumen.reconstruir``.
+
+Con la misma --semilla se generan exactamente los mismos datos. El número de movimientos por
+usuario sigue una distribución de cola larga (pocos usuarios con mucho historial) y su media
+es --movimientos.
+
+No pasa por la unidad de trabajo del ORM: los ids se asignan aquí y las filas se escriben por
+lotes, con COPY en Postgres (psycopg2) y con INSERT ... executemany de Core en el resto. Todo
+va en una sola transacción.
+
+    python generar_datos.py --usuarios 1000 --movimientos 10000          # 10M movimientos
+    python generar_datos.py --usuarios 50 --movimientos 2000 --semilla 7 --url sqlite:///./volumen.db
+
+Las contraseñas de todos los usuarios generados son --contraseña ("generado" por defecto) y
+los emails, usuario{usuario_id}@ejemplo.com.
+"""
+import argparse
+import csv
+import datetime
+import io
+import math
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from sqlalchemy import bindparam, func, insert, select, text, update
+from sqlalchemy.engine import Connection, Engine
+
+TAMAÑO_LOTE = 10_000
+
+NOMBRES_CUENTA = ("Banco", "Efectivo", "Ahorros", "Tarjeta")
+# (nombre, peso, monto medio en COP)
+GASTOS = (
+    ("Comida", 30, 45_000),
+    ("Transporte", 20, 12_000),
+    ("Compras", 12, 120_000),
+    ("Ocio", 10, 80_000),
+    ("Servicios", 8, 180_000),
+    ("Salud", 6, 90_000),
+    ("Educación", 4, 350_000),
+    ("Vivienda", 3, 1_400_000),
+)
+INGRESOS = ("Salario", "Otros ingresos")
+AJUSTES = "Ajustes"
+NOMBRES_META = ("Viaje", "Fondo de emergencia", "Carro", "Estudios", "Casa")
+PROBABILIDAD_INGRESO = 0.10
+PROBABILIDAD_ABONO = 0.02
+
+_GASTO_MEDIO = sum(peso * monto for _, peso, monto in GASTOS) / sum(peso for _, peso, _ in GASTOS)
+# Los ingresos cubren algo más que los gastos esperados; el resto lo ajusta el saldo inicial
+_INGRESO_MEDIO = _GASTO_MEDIO * (1 - PROBABILIDAD_INGRESO) / PROBABILIDAD_INGRESO * 1.05
+
+# En orden de escritura: padres antes que hijos (las FK de Postgres se comprueban al insertar)
+COLUMNAS = {
+    "Usuario": ("usuario_id", "nombre", "email", "contraseña", "fecha_registro", "estado", "version_datos"),
+    "Cuenta": ("cuenta_id", "usuario_id", "nombre_cuenta", "saldo_actual"),
+    "Categoria": ("categoria_id", "usuario_id", "nombre_categoria", "tipo"),
+    "Meta": ("meta_id", "usuario_id", "nombre_meta", "monto_objetivo", "monto_actual", "fecha_inicio",
+             "fecha_fin", "estado", "categoria_id"),
+    "Movimiento": ("movimiento_id", "cuenta_id", "categoria_id", "usuario_id", "tipo", "monto", "fecha", "descripcion"),
+    "Movimiento_Meta": ("movimiento_meta_id", "meta_id", "movimiento_id", "monto_destinado", "fecha_asignacion"),
+    "Resumen_Mensual": ("usuario_id", "mes", "tipo", "categoria_id", "total", "cantidad"),
+}
+# Tablas con clave autoincremental: (tabla, columna)
+SECUENCIAS = (
+    ("Usuario", "usuario_id"),
+    ("Cuenta", "cuenta_id"),
+    ("Categoria", "categoria_id"),
+    ("Meta", "meta_id"),
+    ("Movimiento", "movimiento_id"),
+    ("Movimiento_Meta", "movimiento_meta_id"),
+)
+
+
+class Escritor:
+    """Acumula filas (tuplas en el orden de COLUMNAS) y las vuelca por lotes."""
+
+    def __init__(self, conn: Connection, lote: int = TAMAÑO_LOTE):
+        import models # models importa database, que exige DATABASE_URL (ver main)
+
+        self.tablas = [models.Base.metadata.tables[nombre] for nombre in COLUMNAS]
+        self.conn = conn
+        self.lote = lote
+        self.copy = conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2"
+        self.pendientes = {nombre: [] for nombre in COLUMNAS}
+        self.escritas = defaultdict(int)
+
+    def agregar(self, tabla: str, fila: tuple):
+        pendientes = self.pendientes[tabla]
+        pendientes.append(fila)
+        if len(pendientes) >= self.lote:
+            self.vaciar()
+
+    def vaciar(self):
+        for tabla in self.tablas:
+            filas = self.pendientes[tabla.name]
+            if not filas:
+                continue
+            columnas = COLUMNAS[tabla.name]
+            if self.copy:
+                self._copy(tabla.name, columnas, filas)
+            else:
+                self.conn.execute(insert(tabla), [dict(zip(columnas, fila)) for fila in filas])
+            self.escritas[tabla.name] += len(filas)
+            filas.clear()
+
+    def _copy(self, tabla: str, columnas, filas):
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        for fila in filas:
+            escritor.writerow("" if valor is None else valor for valor in fila)
+        buffer.seek(0)
+        lista = ", ".join(f'"{c}"' for c in columnas)
+        cursor = self.conn.connection.cursor()
+        try:
+            cursor.copy_expert(f'COPY "{tabla}" ({lista}) FROM STDIN WITH (FORMAT csv)', buffer)
+        finally:
+            cursor.close()
+
+
+def _repartir(total: int, partes: int, aleatorio: random.Random):
+    # Cola larga (Pareto) normalizada para que la suma sea exactamente ``total``
+    pesos = [aleatorio.paretovariate(1.5) for _ in range(partes)]
+    suma = sum(pesos)
+    cantidades = [int(total * p / suma) for p in pesos]
+    for i in range(total - sum(cantidades)):
+        cantidades[i % partes] += 1
+    return cantidades
+
+
+def _monto(aleatorio: random.Random, medio: float) -> Decimal:
+    # Lognormal alrededor de la media, redondeada a centenas de peso
+    valor = aleatorio.lognormvariate(math.log(medio) - 0.32, 0.8)
+    return Decimal(max(100, int(round(valor, -2))))
+
+
+def _siguientes_ids(conn: Connection) -> dict:
+    import models
+
+    ids = {}
+    for tabla, columna in SECUENCIAS:
+        t = models.Base.metadata.tables[tabla]
+        ids[tabla] = (conn.execute(select(func.max(t.c[columna]))).scalar() or 0) + 1
+    return ids
+
+
+def _ajustar_secuencias(conn: Connection):
+    if conn.dialect.name != "postgresql":
+        return  # SQLite continúa desde el máximo id existente
+    for tabla, columna in SECUENCIAS:
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('\"{tabla}\"', '{columna}'), "
+            f"(SELECT COALESCE(MAX({columna}), 1) FROM \"{tabla}\"))"
+        ))
+
+
+def generar(
+    engine: Engine,
+    usuarios: int,
+    movimientos: int,
+    semilla: int = 42,
+    anios: int = 3,
+    contraseña: str = "generado",
+    lote: int = TAMAÑO_LOTE,
+    progreso=None,
+    metas_por_usuario=(0, 3),
+) -> dict:
+    """Genera ``usuarios`` usuarios con ``movimientos`` movimientos de media cada uno.
+
+    Devuelve cuántas filas se escribieron por tabla. ``progreso(usuarios_hechos, movimientos_hechos)``
+    se llama tras cada usuario; ``metas_por_usuario`` es el rango (mínimo, máximo) de metas.
+    """
+    import hashing
+    import models
+
+    aleatorio = random.Random(semilla)
+    por_usuario = _repartir(usuarios * movimientos, usuarios, aleatorio) if usuarios else []
+    hash_contraseña = hashing.hashear(contraseña)
+    fin = datetime.datetime(2026, 1, 1)
+    inicio = fin - datetime.timedelta(days=365 * anios)
+    minutos = int((fin - inicio).total_seconds() // 60)
+    pesos_gasto = [peso for _, peso, _ in GASTOS]
+    saldos_cuenta = []
+    montos_meta = []
+    hechos = 0
+
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous = OFF")
+        escritor = Escritor(conn, lote)
+        ids = _siguientes_ids(conn)
+
+        def nuevo_id(tabla):
+            valor = ids[tabla]
+            ids[tabla] += 1
+            return valor
+
+        for n, cantidad in enumerate(por_usuario):
+            rng = random.Random(semilla * 1_000_003 + n)
+            usuario_id = nuevo_id("Usuario")
+            registro = inicio - datetime.timedelta(days=rng.randint(1, 90))
+            escritor.agregar("Usuario", (usuario_id, f"Usuario {usuario_id}", f"usuario{usuario_id}@ejemplo.com",
+                                         hash_contraseña, registro, True, 0))
+
+            cuentas = []
+            for nombre in NOMBRES_CUENTA[:rng.randint(1, len(NOMBRES_CUENTA))]:
+                cuentas.append(nuevo_id("Cuenta"))
+                escritor.agregar("Cuenta", (cuentas[-1], usuario_id, nombre, Decimal(0)))
+
+            categorias = {}
+            for nombre, tipo in [(g[0], "Gasto") for g in GASTOS] + [(i, "Ingreso") for i in INGRESOS + (AJUSTES,)]:
+                categorias[nombre] = nuevo_id("Categoria")
+                escritor.agregar("Categoria", (categorias[nombre], usuario_id, nombre, tipo))
+            gastos = [categorias[g[0]] for g in GASTOS]
+
+            metas = []
+            for nombre in rng.sample(NOMBRES_META, rng.randint(*metas_por_usuario)):
+                categoria_meta = nuevo_id("Categoria")
+                escritor.agregar("Categoria", (categoria_meta, usuario_id, f"Meta: {nombre}", "Gasto"))
+                meta_id = nuevo_id("Meta")
+                objetivo = Decimal(rng.choice((2, 5, 10, 20, 50)) * 1_000_000)
+                escritor.agregar("Meta", (meta_id, usuario_id, nombre, objetivo, Decimal(0),
+                                          inicio, fin + datetime.timedelta(days=365), True, categoria_meta))
+                metas.append((meta_id, categoria_meta))
+
+            saldos = defaultdict(Decimal)
+            abonado = defaultdict(Decimal)
+            resumen = defaultdict(lambda: [Decimal(0), 0])
+
+            def movimiento(cuenta, categoria, tipo, monto, fecha, descripcion):
+                movimiento_id = nuevo_id("Movimiento")
+                escritor.agregar("Movimiento", (movimiento_id, cuenta, categoria, usuario_id, tipo, monto, fecha, descripcion))
+                saldos[cuenta] += monto if tipo == "Ingreso" else -monto
+                acumulado = resumen[(datetime.date(fecha.year, fecha.month, 1), tipo, categoria)]
+                acumulado[0] += monto
+                acumulado[1] += 1
+                return movimiento_id
+
+            for i in range(cantidad):
+                fecha = inicio + datetime.timedelta(minutes=rng.randrange(minutos))
+                cuenta = cuentas[0] if rng.random() < 0.6 else rng.choice(cuentas)
+                sorteo = rng.random()
+                if metas and sorteo < PROBABILIDAD_ABONO:
+                    meta_id, categoria_meta = rng.choice(metas)
+                    monto = Decimal(rng.randint(1, 50) * 10_000)
+                    movimiento_id = movimiento(cuenta, categoria_meta, "Gasto", monto, fecha, "Abono a meta")
+                    escritor.agregar("Movimiento_Meta", (nuevo_id("Movimiento_Meta"), meta_id, movimiento_id, monto, fecha))
+                    abonado[meta_id] += monto
+                elif sorteo < PROBABILIDAD_ABONO + PROBABILIDAD_INGRESO:
+                    nombre = INGRESOS[0] if rng.random() < 0.8 else INGRESOS[1]
+                    movimiento(cuenta, categorias[nombre], "Ingreso", _monto(rng, _INGRESO_MEDIO), fecha, nombre)
+                else:
+                    g = rng.choices(range(len(GASTOS)), pesos_gasto)[0]
+                    movimiento(cuenta, gastos[g], "Gasto", _monto(rng, GASTOS[g][2]), fecha, f"{GASTOS[g][0]} {i}")
+
+            # Saldo inicial: ninguna cuenta termina en negativo
+            for cuenta in cuentas:
+                colchon = Decimal(rng.randint(1, 20) * 100_000)
+                movimiento(cuenta, categorias[AJUSTES], "Ingreso", max(Decimal(0), -saldos[cuenta]) + colchon,
+                           inicio, "Saldo Inicial")
+
+            for (mes, tipo, categoria), (total, veces) in resumen.items():
+                escritor.agregar("Resumen_Mensual", (usuario_id, mes, tipo, categoria, total, veces))
+            saldos_cuenta.extend({"b_id": c, "b_valor": s} for c, s in saldos.items())
+            montos_meta.extend({"b_id": m, "b_valor": a} for m, a in abonado.items())
+
+            hechos += cantidad
+            if progreso:
+                progreso(n + 1, hechos)
+
+        escritor.vaciar()
+
+        cuenta = models.Cuenta.__table__
+        meta = models.Meta.__table__
+        for tabla, clave, columna, valores in (
+            (cuenta, cuenta.c.cuenta_id, "saldo_actual", saldos_cuenta),
+            (meta, meta.c.meta_id, "monto_actual", montos_meta),
+        ):
+            for i in range(0, len(valores), lote):
+                conn.execute(
+                    update(tabla).where(clave == bindparam("b_id")).values({columna: bindparam("b_valor")}),
+                    valores[i:i + lote],
+                )
+        _ajustar_secuencias(conn)
+
+    return dict(escritor.escritas)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--usuarios", type=int, required=True)
+    parser.add_argument("--movimientos", type=int, required=True, help="movimientos por usuario (media)")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--anios", type=int, default=3, help="años de historial")
+    parser.add_argument("--contraseña", default="generado")
+    parser.add_argument("--lote", type=int, default=TAMAÑO_LOTE, help="filas por lote de escritura")
+    parser.add_argument("--url", help="base de datos destino (por defecto DATABASE_URL)")
+    args = parser.parse_args()
+
+    if args.url:
+        os.environ["DATABASE_URL"] = args.url
+    import database
+
+    database.migrar()
+    total = args.usuarios * args.movimientos
+    inicio = time.perf_counter()
+
+    def progreso(usuarios_hechos, movimientos_hechos):
+        if usuarios_hechos == args.usuarios or usuarios_hechos % max(1, args.usuarios // 20) == 0:
+            transcurrido = time.perf_counter() - inicio
+            print(f"  {usuarios_hechos}/{args.usuarios} usuarios, {movimientos_hechos:,}/{total:,} movimientos "
+                  f"({movimientos_hechos / max(transcurrido, 1e-9):,.0f}/s)", flush=True)
+
+    escritas = generar(database.engine, args.usuarios, args.movimientos, args.semilla, args.anios,
+                       args.contraseña, args.lote, progreso)
+    duracion = time.perf_counter() - inicio
+    print(f"Listo en {duracion:.1f}s:")
+    for tabla, filas in escritas.items():
+        print(f"  {tabla:<16} {filas:>12,}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
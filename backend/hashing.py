@@ -0,0 +1,101 @@
+"""Hashing de contraseñas (bcrypt) fuera del threadpool de FastAPI.
+
+bcrypt es lento a propósito: ejecutarlo dentro de un endpoint ocupa uno de los pocos
+hilos del threadpool y una ráfaga de logins frena el resto del CRUD. Aquí el trabajo se
+manda a un pool de procesos propio y acotado, con su propia cola de admisión: si ya hay
+demasiadas peticiones esperando se responde 503 en lugar de encolar sin límite.
+
+Este módulo solo importa passlib para que los procesos hijos arranquen ligeros, y lo hace
+en el primer uso (``pwd_context`` se crea bajo demanda) para no alargar el arranque en frío.
+
+Configuración (.env):
+    BCRYPT_ROUNDS            coste de bcrypt (por defecto 12). Al cambiarlo, los hashes
+                             existentes se regeneran con el nuevo coste en el siguiente login.
+    PASSWORD_HASH_WORKERS    procesos del pool (por defecto 2)
+    PASSWORD_HASH_MAX_QUEUE  operaciones admitidas a la vez, en curso + en espera (por defecto 32)
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS") or 12)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS") or 2)
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE") or 32)
+
+@lru_cache(maxsize=None)
+def _contexto():
+    from passlib.context import CryptContext
+
+    # min = max = rounds: cualquier hash con otro coste (mayor o menor) se considera desactualizado
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=BCRYPT_ROUNDS,
+        bcrypt__min_rounds=BCRYPT_ROUNDS,
+        bcrypt__max_rounds=BCRYPT_ROUNDS,
+    )
+
+
+def __getattr__(nombre):
+    # hashing.pwd_context sigue disponible, pero se construye al pedirlo
+    if nombre == "pwd_context":
+        return _contexto()
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+
+class ColaLlena(Exception):
+    """La cola de admisión del pool de hashing está llena."""
+
+
+# --- Funciones que se ejecutan dentro de los procesos del pool ---
+
+def hashear(password: str) -> str:
+    return _contexto().hash(password)
+
+
+def verificar(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    # Devuelve (válida, hash_nuevo); hash_nuevo no es None si hay que regenerarlo con el coste actual
+    return _contexto().verify_and_update(password, hashed)
+
+
+# --- Lado del servidor ---
+
+_pool = None
+_pool_lock = threading.Lock()
+_admitidas = threading.BoundedSemaphore(PASSWORD_HASH_MAX_QUEUE)
+
+
+def _obtener_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        return _pool
+
+
+async def _ejecutar(funcion, *args):
+    if not _admitidas.acquire(blocking=False):
+        raise ColaLlena()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_obtener_pool(), funcion, *args)
+    finally:
+        _admitidas.release()
+
+
+async def hashear_async(password: str) -> str:
+    return await _ejecutar(hashear, password)
+
+
+async def verificar_async(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return await _ejecutar(verificar, password, hashed)
+
+
+def cerrar():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,282 @@
+"""Importación masiva de extractos bancarios (CSV u OFX) a Movimiento.
+
+El archivo se lee fila a fila (nunca entero en memoria) y los movimientos se insertan en
+lotes con un único INSERT ... executemany por lote. Cuentas y categorías se resuelven una
+sola vez al principio, y los saldos de las cuentas y el resumen mensual se actualizan al
+final con un ajuste neto por cuenta / por mes, no con uno por movimiento.
+
+La importación es todo o nada: si alguna fila es inválida no se guarda ninguna.
+
+CSV (primera fila = cabeceras, separador ',' o ';'):
+    fecha        obligatoria: 2024-01-31, 2024-01-31T10:00:00 o 31/01/2024
+    monto        obligatorio: 1234.56, 1.234,56, -45,10, $ 1,234.56, 45.000 (un punto con 3 dígitos es de miles)
+    tipo         opcional: Ingreso/Gasto; si falta, se deduce del signo del monto
+    descripcion  opcional
+    categoria    opcional: nombre de la categoría (se crea si no existe)
+    cuenta       opcional: nombre de la cuenta (debe existir); si falta, se usa cuenta_id
+
+OFX/QFX: se leen los bloques <STMTTRN> (DTPOSTED, TRNAMT, NAME, MEMO); todos los
+movimientos van a cuenta_id.
+"""
+import codecs
+import contextlib
+import csv
+import datetime
+import io
+import re
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+import models
+import resumen
+import saldos
+
+TAMAÑO_LOTE = 1000
+MAX_ERRORES = 50
+CATEGORIA_POR_DEFECTO = "Importados"
+
+
+class ErrorImportacion(Exception):
+    def __init__(self, errores: List[str]):
+        super().__init__(f"{len(errores)} filas con errores")
+        self.errores = errores
+
+
+class FilaInvalida(ValueError):
+    pass
+
+
+# --- Lectura de los formatos ---
+
+TAMAÑO_SONDEO = 4096
+
+
+@contextlib.contextmanager
+def _texto(archivo) -> Iterator[io.TextIOWrapper]:
+    # Texto sobre el archivo binario, leído por trozos: UTF-8 con o sin BOM; si el inicio no
+    # lo es, Latin-1. newline="" deja los saltos de línea entre comillas al módulo csv.
+    # El sondeo es incremental (final=False): un carácter multibyte cortado al final del
+    # trozo no es un error, solo queda pendiente
+    inicio = archivo.read(TAMAÑO_SONDEO)
+    archivo.seek(0)
+    try:
+        codecs.getincrementaldecoder("utf-8-sig")().decode(inicio, final=False)
+        codificacion = "utf-8-sig"
+    except UnicodeDecodeError:
+        codificacion = "latin-1"
+    texto = io.TextIOWrapper(archivo, encoding=codificacion, errors="replace", newline="")
+    try:
+        yield texto
+    finally:
+        texto.detach() # el archivo lo cierra quien lo abrió
+
+
+def filas_csv(archivo) -> Iterator[Tuple[int, dict]]:
+    # Un campo entre comillas puede tener saltos de línea (notas del banco): se numeran
+    # registros, no líneas del archivo
+    with _texto(archivo) as texto:
+        cabecera = texto.readline()
+        separador = ";" if cabecera.count(";") > cabecera.count(",") else ","
+        columnas = [c.strip().lower() for c in next(csv.reader([cabecera], delimiter=separador), [])]
+        for numero, fila in enumerate(csv.reader(texto, delimiter=separador), start=2):
+            if not any(celda.strip() for celda in fila):
+                continue
+            yield numero, dict(zip(columnas, (celda.strip() for celda in fila)))
+
+
+_ETIQUETA_OFX = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+
+def filas_ofx(archivo) -> Iterator[Tuple[int, dict]]:
+    # OFX 1.x es SGML (sin etiquetas de cierre en los valores); OFX 2.x es XML: ambos sirven
+    transaccion = None
+    numero = 0
+    with _texto(archivo) as texto:
+        for linea in texto:
+            for cierre, etiqueta, valor in _ETIQUETA_OFX.findall(linea):
+                etiqueta = etiqueta.upper()
+                if etiqueta == "STMTTRN":
+                    if cierre and transaccion is not None:
+                        numero += 1
+                        yield numero, _desde_ofx(transaccion)
+                        transaccion = None
+                    elif not cierre:
+                        transaccion = {}
+                elif transaccion is not None and not cierre and valor.strip():
+                    transaccion[etiqueta] = valor.strip()
+    if transaccion:
+        yield numero + 1, _desde_ofx(transaccion)
+
+
+def _desde_ofx(fila: dict) -> dict:
+    fecha = fila.get("DTPOSTED", "")[:14]
+    return {
+        "fecha": fecha[:8] if len(fecha) < 14 else fecha,
+        "monto": fila.get("TRNAMT", ""),
+        "descripcion": " - ".join(v for v in (fila.get("NAME"), fila.get("MEMO")) if v),
+    }
+
+
+# --- Conversión de valores ---
+
+def _fecha(texto: str) -> datetime.datetime:
+    texto = (texto or "").strip()
+    for formato in ("%Y%m%d%H%M%S", "%Y%m%d", "%d/%m/%Y", "%d/%m/%Y %H:%M", "%d-%m-%Y"):
+        try:
+            return datetime.datetime.strptime(texto, formato)
+        except ValueError:
+            pass
+    try:
+        return datetime.datetime.fromisoformat(texto)
+    except ValueError:
+        raise FilaInvalida(f"fecha inválida '{texto}'")
+
+
+def _monto(texto: str) -> Decimal:
+    limpio = re.sub(r"[^\d,.\-]", "", texto or "")
+    if "," in limpio and "." in limpio:
+        # El último separador es el decimal: 1.234,56 o 1,234.56
+        miles = "." if limpio.rfind(",") > limpio.rfind(".") else ","
+        limpio = limpio.replace(miles, "")
+    elif limpio.count(".") > 1:
+        limpio = limpio.replace(".", "") # 1.000.000
+    elif re.search(r"\.\d{3}$", limpio):
+        limpio = limpio.replace(".", "") # Un solo punto con 3 dígitos detrás es de miles: 45.000 (COP)
+    if "," in limpio:
+        # Solo comas: decimal si hay 1-2 dígitos después (45,10), si no miles (1,234)
+        limpio = limpio.replace(",", ".") if re.search(r",\d{1,2}$", limpio) else limpio.replace(",", "")
+    try:
+        return Decimal(limpio)
+    except InvalidOperation:
+        raise FilaInvalida(f"monto inválido '{texto}'")
+
+
+def _tipo(texto: Optional[str], monto: Decimal) -> str:
+    if texto:
+        tipo = texto.strip().capitalize()
+        if tipo not in ("Ingreso", "Gasto"):
+            raise FilaInvalida(f"tipo inválido '{texto}'")
+        return tipo
+    return "Gasto" if monto < 0 else "Ingreso"
+
+
+# --- Importación ---
+
+class _Resolutor:
+    """Cuentas y categorías del usuario, cargadas una sola vez."""
+
+    def __init__(self, db: Session, usuario_id: int, cuenta_id: Optional[int], categoria_id: Optional[int]):
+        self.db = db
+        self.usuario_id = usuario_id
+        cuentas = db.query(models.Cuenta.cuenta_id, models.Cuenta.nombre_cuenta).filter(
+            models.Cuenta.usuario_id == usuario_id
+        ).all()
+        self.cuentas_por_id = {c.cuenta_id for c in cuentas}
+        self.cuentas_por_nombre = {c.nombre_cuenta.lower(): c.cuenta_id for c in cuentas}
+        categorias = db.query(models.Categoria.categoria_id, models.Categoria.nombre_categoria, models.Categoria.tipo).filter(
+            models.Categoria.usuario_id == usuario_id
+        ).all()
+        self.categorias_por_id = {c.categoria_id for c in categorias}
+        self.categorias_por_nombre = {}
+        for c in categorias:
+            self.categorias_por_nombre.setdefault((c.nombre_categoria.lower(), c.tipo), c.categoria_id)
+            self.categorias_por_nombre.setdefault((c.nombre_categoria.lower(), None), c.categoria_id)
+
+        if cuenta_id is not None and cuenta_id not in self.cuentas_por_id:
+            raise ErrorImportacion(["Cuenta no encontrada o no pertenece al usuario"])
+        if categoria_id is not None and categoria_id not in self.categorias_por_id:
+            raise ErrorImportacion(["Categoría no encontrada o no pertenece al usuario"])
+        self.cuenta_id = cuenta_id
+        self.categoria_id = categoria_id
+
+    def cuenta(self, nombre: Optional[str]) -> int:
+        if nombre:
+            if nombre.lower() not in self.cuentas_por_nombre:
+                raise FilaInvalida(f"cuenta '{nombre}' no existe")
+            return self.cuentas_por_nombre[nombre.lower()]
+        if self.cuenta_id is None:
+            raise FilaInvalida("falta la cuenta (columna 'cuenta' o parámetro cuenta_id)")
+        return self.cuenta_id
+
+    def categoria(self, nombre: Optional[str], tipo: str) -> int:
+        if not nombre and self.categoria_id is not None:
+            return self.categoria_id
+        nombre = nombre or CATEGORIA_POR_DEFECTO
+        clave = (nombre.lower(), tipo)
+        categoria_id = self.categorias_por_nombre.get(clave) or self.categorias_por_nombre.get((nombre.lower(), None))
+        if categoria_id is None:
+            nueva = models.Categoria(usuario_id=self.usuario_id, nombre_categoria=nombre, tipo=tipo)
+            self.db.add(nueva)
+            self.db.flush()
+            categoria_id = nueva.categoria_id
+            self.categorias_por_nombre[clave] = categoria_id
+            self.categorias_por_nombre.setdefault((nombre.lower(), None), categoria_id)
+        return categoria_id
+
+
+def importar(
+    db: Session,
+    usuario_id: int,
+    filas: Iterable[Tuple[int, dict]],
+    cuenta_id: Optional[int] = None,
+    categoria_id: Optional[int] = None,
+) -> dict:
+    """Inserta las filas en la sesión (sin commit). Lanza ErrorImportacion si alguna es inválida."""
+    resolutor = _Resolutor(db, usuario_id, cuenta_id, categoria_id)
+    deltas_cuenta: Dict[int, Decimal] = defaultdict(Decimal)
+    resumenes: Dict[tuple, list] = defaultdict(lambda: [Decimal(0), 0])
+    errores: List[str] = []
+    lote: List[dict] = []
+    importados = 0
+
+    for numero, fila in filas:
+        try:
+            monto = _monto(fila.get("monto"))
+            tipo = _tipo(fila.get("tipo"), monto)
+            monto = abs(monto)
+            if monto == 0:
+                raise FilaInvalida("el monto no puede ser cero")
+            movimiento = {
+                "usuario_id": usuario_id,
+                "cuenta_id": resolutor.cuenta(fila.get("cuenta")),
+                "categoria_id": resolutor.categoria(fila.get("categoria"), tipo),
+                "tipo": tipo,
+                "monto": monto,
+                "fecha": _fecha(fila.get("fecha")),
+                "descripcion": fila.get("descripcion") or None,
+            }
+        except FilaInvalida as e:
+            errores.append(f"Fila {numero}: {e}")
+            if len(errores) >= MAX_ERRORES:
+                break
+            continue
+
+        if errores:
+            continue # Ya no se va a guardar nada: solo se sigue validando
+        deltas_cuenta[movimiento["cuenta_id"]] += saldos.efecto(tipo, monto)
+        acumulado = resumenes[(resumen.inicio_de_mes(movimiento["fecha"]), tipo, movimiento["categoria_id"])]
+        acumulado[0] += monto
+        acumulado[1] += 1
+        lote.append(movimiento)
+        if len(lote) >= TAMAÑO_LOTE:
+            db.execute(insert(models.Movimiento), lote)
+            importados += len(lote)
+            lote = []
+
+    if errores:
+        raise ErrorImportacion(errores)
+    if lote:
+        db.execute(insert(models.Movimiento), lote)
+        importados += len(lote)
+
+    # Un solo ajuste neto por cuenta y por fila de resumen
+    for cuenta, delta in deltas_cuenta.items():
+        saldos.ajustar_cuenta(db, cuenta, delta)
+    for (mes, tipo, categoria), (total, cantidad) in resumenes.items():
+        resumen.sumar(db, usuario_id, mes, tipo, categoria, total, cantidad)
+
+    return {"importados": importados, "cuentas_afectadas": len(deltas_cuenta)}
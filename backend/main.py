@@ -1,19 +1,42 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.datastructures import Default
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
 from datetime import timedelta
 import os
 
-import models, schemas, security
-from database import engine, get_db
+import models, schemas, security, hashing, metricas, trabajos
+from respuestas import RespuestaJSON
+from database import DB_ASYNC, async_engine, async_replica_engine, comprobar_conexion, estadisticas_pool, get_db, migrar, replica_engine
 
 # Importamos los routers (Ahora sí existen todos)
 from routers import categoria, metas, cuentas, movimientos, dashboard, usuarios
+from routers import trabajos as routers_trabajos
 
-models.Base.metadata.create_all(bind=engine)
+# Importar este módulo no toca la base de datos: las migraciones se aplican al arrancar
+# (lifespan) o, mejor para el arranque en frío, en un paso previo del despliegue con
+# "alembic upgrade head" y MIGRAR_AL_INICIAR=0.
+MIGRAR_AL_INICIAR = (os.getenv("MIGRAR_AL_INICIAR") or "true").lower() in ("1", "true", "yes")
 
-app = FastAPI(title="Expense Management API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if MIGRAR_AL_INICIAR:
+        await run_in_threadpool(migrar)
+    await run_in_threadpool(trabajos.limpiar_archivos)
+    yield
+    hashing.cerrar()
+    trabajos.cerrar()
+    if async_engine is not None:
+        await async_engine.dispose()
+    if async_replica_engine is not None:
+        await async_replica_engine.dispose()
+
+# Default(...): los endpoints con response_model conservan el dump_json de Pydantic (ver respuestas.py)
+app = FastAPI(title="Expense Management API", lifespan=lifespan, default_response_class=Default(RespuestaJSON))
 
 origins = [
     "http://localhost:5173",
@@ -32,8 +55,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Location"],
 )
 
+# Tiempos por ruta (total, base de datos, serialización), sentencias y filas; ver metricas.py
+metricas.instalar(app)
+
+# Con DB_ASYNC=1 las lecturas usan AsyncSession; al montarse antes, tienen prioridad sobre las sync
+if DB_ASYNC:
+    for modulo in (categoria, metas, cuentas, movimientos, dashboard):
+        app.include_router(modulo.router_async)
+
 # Conectamos los routers (Esto habilita las rutas en /docs)
 app.include_router(categoria.router)
 app.include_router(metas.router)
@@ -41,22 +73,59 @@ app.include_router(cuentas.router)
 app.include_router(movimientos.router)
 app.include_router(dashboard.router)
 app.include_router(usuarios.router)
+app.include_router(routers_trabajos.router)
 
 @app.get("/")
 def health_check():
-    return {"status": "ok", "service": "Expense Management API"}
+    estado = {
+        "status": "ok",
+        "service": "Expense Management API",
+        "cache_usuarios": security.cache_usuarios.estadisticas(),
+        "pool": estadisticas_pool(),
+    }
+    if replica_engine is not None:
+        estado["pool_replica"] = estadisticas_pool(replica_engine)
+    return estado
+
+# Readiness probe: solo comprueba que hay conexión con la base de datos (SELECT 1).
+# No serializa estadísticas ni depende de la autenticación, para usarla como health check del despliegue.
+@app.get("/ready")
+async def readiness():
+    if not await run_in_threadpool(comprobar_conexion):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Base de datos no disponible")
+    return {"status": "ready"}
+
+# Métricas del proceso en formato de texto de Prometheus (para el scraper, no para la app)
+@app.get("/metrics", include_in_schema=False)
+def exponer_metricas():
+    if not metricas.METRICAS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Métricas desactivadas")
+    return PlainTextResponse(metricas.exponer(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 # --- TUS ENDPOINTS DE SEGURIDAD (Esto sí es tu responsabilidad) ---
 
+# Los endpoints con bcrypt son async: la espera del hash no ocupa un hilo del threadpool,
+# y las consultas a la base de datos se mandan al threadpool con run_in_threadpool.
 @app.post("/token", response_model=schemas.Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.Usuario).filter(models.Usuario.email == form_data.username).first()
-    if not user or not security.verify_password(form_data.password, user.contraseña):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(
+        lambda: db.query(models.Usuario).filter(models.Usuario.email == form_data.username).first()
+    )
+    valida, nuevo_hash = False, None
+    if user:
+        valida, nuevo_hash = await security.verify_password_async(form_data.password, user.contraseña)
+    if not valida:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciales inválidas",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Rehash transparente si BCRYPT_ROUNDS cambió desde que se guardó la contraseña
+    if nuevo_hash:
+        user.contraseña = nuevo_hash
+        await run_in_threadpool(db.commit)
+        security.cache_usuarios.invalidar(user.usuario_id)
     
     access_token = security.create_access_token(
         data={"sub": user.email, "id": user.usuario_id}, 
@@ -65,17 +134,24 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.post("/usuarios/", response_model=schemas.Usuario)
-def create_user(user: schemas.UsuarioCreate, db: Session = Depends(get_db)):
-    if db.query(models.Usuario).filter(models.Usuario.email == user.email).first():
+async def create_user(user: schemas.UsuarioCreate, db: Session = Depends(get_db)):
+    existe = await run_in_threadpool(
+        lambda: db.query(models.Usuario).filter(models.Usuario.email == user.email).first()
+    )
+    if existe:
         raise HTTPException(status_code=400, detail="Email ya registrado")
     
     new_user = models.Usuario(
         nombre=user.nombre, 
         email=user.email, 
-        contraseña=security.get_password_hash(user.contraseña),
+        contraseña=await security.get_password_hash_async(user.contraseña),
         estado=True
     )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+
+    def guardar():
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+
+    await run_in_threadpool(guardar)
     return new_user
@@ -0,0 +1,248 @@
+"""Instrumentación por petición y endpoint /metrics en formato Prometheus.
+
+``MiddlewareMetricas`` (ASGI puro, sin BaseHTTPMiddleware) abre una ``Medicion`` por
+petición en una ContextVar; la ven los endpoints sync (run_in_threadpool copia el contexto)
+y los async. Los eventos de SQLAlchemy sobre ``Engine`` (todos los engines, también la
+réplica y el sync_engine de los async) suman a la medición de la petición en curso:
+
+    - tiempo en la base de datos y número de sentencias
+
+La serialización se mide en ``respuestas.RespuestaJSON.render`` (orjson, json_rapido) y
+envolviendo ``fastapi.routing.serialize_response`` (validación + dump_json de Pydantic en
+los endpoints con response_model). En esos dos puntos se cuentan también las filas devueltas:
+los elementos de la respuesta si es una lista. No se usa ``cursor.rowcount`` porque sqlite3
+no lo informa en los SELECT (-1).
+
+Cada petición termina en histogramas por método y plantilla de ruta ("/movimientos/{movimiento_id}",
+no la URL, para que el número de series no crezca con los ids). Los contadores son del
+proceso: con varios workers, cada uno expone los suyos.
+
+Configuración (.env):
+    METRICAS               "0" desactiva el middleware, los eventos y /metrics (por defecto activo)
+    PETICION_LENTA_MS      umbral del log de peticiones lentas, con sus sentencias SQL más lentas
+                           (0 = desactivado, por defecto). Solo entonces se guarda el SQL de cada petición.
+"""
+import bisect
+import contextvars
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICAS = (os.getenv("METRICAS") or "true").lower() in ("1", "true", "yes")
+PETICION_LENTA_MS = float(os.getenv("PETICION_LENTA_MS") or 0)
+MAX_SQL_POR_PETICION = 200 # sentencias guardadas para el log de lentas
+SQL_EN_LOG = 5 # las más lentas que se escriben
+
+logger = logging.getLogger(__name__)
+
+TIEMPOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CANTIDADES = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+FILAS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+
+class Histograma:
+    def __init__(self, nombre: str, ayuda: str, limites: Tuple[float, ...], etiquetas: Tuple[str, ...]):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.limites = limites
+        self.etiquetas = etiquetas
+        self._series: Dict[tuple, list] = {} # valores de etiquetas -> [cubos..., suma, cuenta]
+        self._lock = threading.Lock()
+
+    def observar(self, valores: tuple, valor: float):
+        # Cada cubo cuenta solo lo suyo; al exponer se acumulan (formato "le" de Prometheus)
+        indice = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [0] * (len(self.limites) + 1) + [0.0, 0]
+            serie[indice] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def exponer(self) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        with self._lock:
+            series = [(valores, list(serie)) for valores, serie in self._series.items()]
+        for valores, serie in sorted(series):
+            etiquetas = _etiquetas(self.etiquetas, valores)
+            acumulado = 0
+            for limite, cantidad in zip(self.limites + (float("inf"),), serie):
+                acumulado += cantidad
+                le = "+Inf" if limite == float("inf") else f"{limite:g}"
+                lineas.append(f'{self.nombre}_bucket{{{etiquetas},le="{le}"}} {acumulado}')
+            lineas.append(f"{self.nombre}_sum{{{etiquetas}}} {float(serie[-2])}")
+            lineas.append(f"{self.nombre}_count{{{etiquetas}}} {serie[-1]}")
+        return lineas
+
+
+class Contador:
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...]):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._series: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, valores: tuple, cantidad: int = 1):
+        with self._lock:
+            self._series[valores] = self._series.get(valores, 0) + cantidad
+
+    def exponer(self) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        with self._lock:
+            series = sorted(self._series.items())
+        lineas.extend(f"{self.nombre}{{{_etiquetas(self.etiquetas, valores)}}} {valor}" for valores, valor in series)
+        return lineas
+
+
+def _etiquetas(nombres: Tuple[str, ...], valores: tuple) -> str:
+    def escapar(valor) -> str:
+        return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{nombre}="{escapar(valor)}"' for nombre, valor in zip(nombres, valores))
+
+
+RUTA = ("metodo", "ruta")
+peticiones = Contador("api_peticiones_total", "Peticiones atendidas", RUTA + ("estado",))
+duracion = Histograma("api_peticion_segundos", "Tiempo total de la petición", TIEMPOS, RUTA)
+tiempo_bd = Histograma("api_bd_segundos", "Tiempo en la base de datos por petición", TIEMPOS, RUTA)
+sentencias = Histograma("api_sentencias_sql", "Sentencias SQL por petición", CANTIDADES, RUTA)
+filas = Histograma("api_filas_sql", "Filas devueltas en la respuesta (elementos de la lista) por petición", FILAS, RUTA)
+serializacion = Histograma("api_serializacion_segundos", "Tiempo serializando la respuesta por petición", TIEMPOS, RUTA)
+METRICAS_EXPUESTAS = (peticiones, duracion, tiempo_bd, sentencias, filas, serializacion)
+
+
+# --- Medición de la petición en curso ---
+
+class Medicion:
+    __slots__ = ("tiempo_bd", "sentencias", "filas", "serializacion", "sql")
+
+    def __init__(self):
+        self.tiempo_bd = 0.0
+        self.sentencias = 0
+        self.filas = 0
+        self.serializacion = 0.0
+        self.sql: Optional[List[Tuple[float, str]]] = [] if PETICION_LENTA_MS > 0 else None
+
+
+_medicion: contextvars.ContextVar[Optional[Medicion]] = contextvars.ContextVar("medicion", default=None)
+
+
+def sumar_serializacion(segundos: float):
+    medicion = _medicion.get()
+    if medicion is not None:
+        medicion.serializacion += segundos
+
+
+def sumar_filas(contenido):
+    """Cuenta como filas devueltas los elementos de ``contenido`` si es una lista."""
+    medicion = _medicion.get()
+    if medicion is not None and isinstance(contenido, (list, tuple)):
+        medicion.filas += len(contenido)
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _medicion.get() is not None:
+        context._inicio_metricas = time.perf_counter()
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    medicion = _medicion.get()
+    inicio = getattr(context, "_inicio_metricas", None)
+    if medicion is None or inicio is None:
+        return
+    segundos = time.perf_counter() - inicio
+    medicion.tiempo_bd += segundos
+    medicion.sentencias += 1
+    if medicion.sql is not None and len(medicion.sql) < MAX_SQL_POR_PETICION:
+        medicion.sql.append((segundos, statement))
+
+
+# --- Middleware ---
+
+class MiddlewareMetricas:
+    def __init__(self, app, excluir: Tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.excluir = excluir
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluir:
+            await self.app(scope, receive, send)
+            return
+
+        medicion = Medicion()
+        token = _medicion.set(medicion)
+        estado = 500
+        inicio = time.perf_counter()
+
+        async def enviar(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _medicion.reset(token)
+            _registrar(scope, estado, time.perf_counter() - inicio, medicion)
+
+
+def _registrar(scope, estado: int, segundos: float, medicion: Medicion):
+    ruta = getattr(scope.get("route"), "path", None) or "sin_ruta"
+    valores = (scope["method"], ruta)
+    peticiones.incrementar(valores + (str(estado),))
+    duracion.observar(valores, segundos)
+    tiempo_bd.observar(valores, medicion.tiempo_bd)
+    sentencias.observar(valores, medicion.sentencias)
+    filas.observar(valores, medicion.filas)
+    serializacion.observar(valores, medicion.serializacion)
+
+    if PETICION_LENTA_MS > 0 and segundos * 1000 >= PETICION_LENTA_MS:
+        lentas = sorted(medicion.sql or [], key=lambda s: -s[0])[:SQL_EN_LOG]
+        logger.warning(
+            "Petición lenta: %s %s -> %s en %.1f ms (bd %.1f ms en %d sentencias, %d filas, serialización %.1f ms)%s",
+            scope["method"], ruta, estado, segundos * 1000, medicion.tiempo_bd * 1000, medicion.sentencias,
+            medicion.filas, medicion.serializacion * 1000,
+            "".join(f"\n  {s * 1000:8.1f} ms  {' '.join(sql.split())}" for s, sql in lentas),
+        )
+
+
+def _medir_serializacion_fastapi():
+    # serialize_response se busca como global del módulo en cada petición, así que basta
+    # con envolverlo; si una versión de FastAPI lo cambia, solo se pierde esta parte
+    import fastapi.routing
+
+    original = getattr(fastapi.routing, "serialize_response", None)
+    if original is None or getattr(original, "_medida", False):
+        return
+
+    async def serialize_response(*args, **kwargs):
+        sumar_filas(kwargs.get("response_content"))
+        inicio = time.perf_counter()
+        try:
+            return await original(*args, **kwargs)
+        finally:
+            sumar_serializacion(time.perf_counter() - inicio)
+
+    serialize_response._medida = True
+    fastapi.routing.serialize_response = serialize_response
+
+
+def instalar(app):
+    """Registra el middleware y los eventos de SQLAlchemy (si METRICAS está activo)."""
+    if not METRICAS:
+        return
+    event.listen(Engine, "before_cursor_execute", _antes_de_ejecutar)
+    event.listen(Engine, "after_cursor_execute", _despues_de_ejecutar)
+    _medir_serializacion_fastapi()
+    app.add_middleware(MiddlewareMetricas)
+
+
+def exponer() -> str:
+    return "\n".join(linea for metrica in METRICAS_EXPUESTAS for linea in metrica.exponer()) + "\n"
@@ -0,0 +1,56 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from database import engine
+import models
+
+config = context.config
+
+# Desde la línea de comandos se usa el logging de alembic.ini; desde la aplicación
+# (database.migrar) se respeta la configuración de logging del servidor.
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = models.Base.metadata
+
+# Objetos creados con SQL en las migraciones y sin modelo: la tabla FTS5 de la búsqueda
+# (0006) y sus tablas internas (_data, _idx, _content, _docsize, _config). Sin este filtro,
+# autogenerate y "alembic check" proponen borrarlas.
+def include_object(object, name, type_, reflected, compare_to):
+    return not (name or "").startswith("movimiento_fts")
+
+
+def run_migrations_offline() -> None:
+    """Genera el SQL sin conectarse (alembic upgrade head --sql)."""
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+        include_object=include_object,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # render_as_batch: SQLite no soporta ALTER de restricciones, alembic recrea la tabla
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=True,
+            include_object=include_object,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,107 @@
+"""Esquema inicial (el que creaba models.Base.metadata.create_all)
+
+Las bases de datos existentes ya tienen estas tablas: solo se crean las que falten,
+así que no hace falta marcar la revisión a mano (alembic stamp) antes de actualizar.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 15:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _crear(nombre, *columnas, indice_pk=None):
+    if sa.inspect(op.get_bind()).has_table(nombre):
+        return
+    op.create_table(nombre, *columnas)
+    if indice_pk:
+        op.create_index(op.f(f"ix_{nombre}_{indice_pk}"), nombre, [indice_pk])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _crear(
+        "Usuario",
+        sa.Column("usuario_id", sa.Integer(), primary_key=True),
+        sa.Column("nombre", sa.String(100)),
+        sa.Column("email", sa.String(100), nullable=False, unique=True),
+        sa.Column("contraseña", sa.String(255), nullable=False),
+        sa.Column("fecha_registro", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("estado", sa.Boolean()),
+        indice_pk="usuario_id",
+    )
+    _crear(
+        "Cuenta",
+        sa.Column("cuenta_id", sa.Integer(), primary_key=True),
+        sa.Column("usuario_id", sa.Integer(), sa.ForeignKey("Usuario.usuario_id"), nullable=False),
+        sa.Column("nombre_cuenta", sa.String(100), nullable=False),
+        sa.Column("saldo_actual", sa.DECIMAL(15, 2)),
+        indice_pk="cuenta_id",
+    )
+    _crear(
+        "Categoria",
+        sa.Column("categoria_id", sa.Integer(), primary_key=True),
+        sa.Column("usuario_id", sa.Integer(), sa.ForeignKey("Usuario.usuario_id"), nullable=False),
+        sa.Column("nombre_categoria", sa.String(100), nullable=False),
+        sa.Column("tipo", sa.String(20), nullable=False),
+        indice_pk="categoria_id",
+    )
+    _crear(
+        "Meta",
+        sa.Column("meta_id", sa.Integer(), primary_key=True),
+        sa.Column("usuario_id", sa.Integer(), sa.ForeignKey("Usuario.usuario_id"), nullable=False),
+        sa.Column("nombre_meta", sa.String(100), nullable=False),
+        sa.Column("monto_objetivo", sa.DECIMAL(15, 2), nullable=False),
+        sa.Column("monto_actual", sa.DECIMAL(15, 2)),
+        sa.Column("fecha_inicio", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("fecha_fin", sa.DateTime(), nullable=False),
+        sa.Column("estado", sa.Boolean()),
+        indice_pk="meta_id",
+    )
+    _crear(
+        "Movimiento",
+        sa.Column("movimiento_id", sa.Integer(), primary_key=True),
+        sa.Column("cuenta_id", sa.Integer(), sa.ForeignKey("Cuenta.cuenta_id"), nullable=False),
+        sa.Column("categoria_id", sa.Integer(), sa.ForeignKey("Categoria.categoria_id"), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), sa.ForeignKey("Usuario.usuario_id"), nullable=False),
+        sa.Column("tipo", sa.String(20), nullable=False),
+        sa.Column("monto", sa.DECIMAL(15, 2), nullable=False),
+        sa.Column("fecha", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("descripcion", sa.Text()),
+        indice_pk="movimiento_id",
+    )
+    _crear(
+        "Movimiento_Meta",
+        sa.Column("movimiento_meta_id", sa.Integer(), primary_key=True),
+        sa.Column("meta_id", sa.Integer(), sa.ForeignKey("Meta.meta_id"), nullable=False),
+        sa.Column("movimiento_id", sa.Integer(), sa.ForeignKey("Movimiento.movimiento_id"), nullable=False),
+        sa.Column("monto_destinado", sa.DECIMAL(15, 2), nullable=False),
+        sa.Column("fecha_asignacion", sa.DateTime(), server_default=sa.func.now()),
+        indice_pk="movimiento_meta_id",
+    )
+    _crear(
+        "Resumen_Mensual",
+        sa.Column("usuario_id", sa.Integer(), sa.ForeignKey("Usuario.usuario_id"), primary_key=True),
+        sa.Column("mes", sa.Date(), primary_key=True),
+        sa.Column("tipo", sa.String(20), primary_key=True),
+        sa.Column("categoria_id", sa.Integer(), sa.ForeignKey("Categoria.categoria_id"), primary_key=True),
+        sa.Column("total", sa.DECIMAL(15, 2), nullable=False),
+        sa.Column("cantidad", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for nombre in ("Resumen_Mensual", "Movimiento_Meta", "Movimiento", "Meta", "Categoria", "Cuenta", "Usuario"):
+        op.drop_table(nombre)
@@ -0,0 +1,74 @@
+"""Índices compuestos para las consultas frecuentes y tipo restringido a 'Ingreso'/'Gasto'
+
+- Normaliza Movimiento.tipo y Categoria.tipo (antes se guardaba 'gasto', 'Gasto', ...)
+  y añade un CHECK, de modo que las consultas comparan por igualdad en vez de lower().
+- Regenera Resumen_Mensual con los tipos ya normalizados.
+- Crea los índices de: listado de movimientos por usuario y fecha, búsqueda de categorías
+  por nombre, pivote Movimiento_Meta y las FK usadas al borrar cuentas/categorías.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 15:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLAS_CON_TIPO = ("Movimiento", "Categoria", "Resumen_Mensual")
+
+INDICES = (
+    ("ix_cuenta_usuario", "Cuenta", ["usuario_id"]),
+    ("ix_categoria_usuario_nombre", "Categoria", ["usuario_id", "nombre_categoria"]),
+    ("ix_meta_usuario", "Meta", ["usuario_id"]),
+    ("ix_movimiento_meta_movimiento", "Movimiento_Meta", ["movimiento_id"]),
+    ("ix_movimiento_meta_meta", "Movimiento_Meta", ["meta_id"]),
+    ("ix_movimiento_usuario_fecha", "Movimiento", ["usuario_id", "fecha", "movimiento_id"]),
+    ("ix_movimiento_cuenta", "Movimiento", ["cuenta_id"]),
+    ("ix_movimiento_categoria", "Movimiento", ["categoria_id"]),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Todo lo que no es ingreso ya se trataba como gasto al actualizar saldos
+    for tabla in ("Movimiento", "Categoria"):
+        op.execute(
+            f"UPDATE \"{tabla}\" SET tipo = CASE WHEN lower(tipo) = 'ingreso' THEN 'Ingreso' ELSE 'Gasto' END"
+        )
+
+    if op.get_bind().dialect.name == "postgresql":
+        mes = "CAST(date_trunc('month', fecha) AS DATE)"
+    else:
+        mes = "strftime('%Y-%m-01', fecha)"
+    op.execute('DELETE FROM "Resumen_Mensual"')
+    op.execute(
+        'INSERT INTO "Resumen_Mensual" (usuario_id, mes, tipo, categoria_id, total, cantidad) '
+        f'SELECT usuario_id, {mes}, tipo, categoria_id, SUM(monto), COUNT(*) FROM "Movimiento" '
+        f'GROUP BY usuario_id, {mes}, tipo, categoria_id'
+    )
+
+    for tabla in TABLAS_CON_TIPO:
+        with op.batch_alter_table(tabla) as batch_op:
+            batch_op.create_check_constraint("tipo_movimiento", "tipo IN ('Ingreso', 'Gasto')")
+
+    for nombre, tabla, columnas in INDICES:
+        op.create_index(nombre, tabla, columnas)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
+
+    for tabla in TABLAS_CON_TIPO:
+        with op.batch_alter_table(tabla) as batch_op:
+            batch_op.drop_constraint("tipo_movimiento", type_="check")
@@ -0,0 +1,31 @@
+"""Versión de los datos por usuario (ETag de los listados)
+
+Usuario.version_datos se incrementa en cada escritura; ver versiones.py.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 17:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("Usuario", sa.Column("version_datos", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("Usuario") as batch_op:
+        batch_op.drop_column("version_datos")
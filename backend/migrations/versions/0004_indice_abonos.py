@@ -0,0 +1,36 @@
+"""Índice de Movimiento_Meta por (meta_id, fecha_asignacion, movimiento_meta_id)
+
+Sustituye a ix_movimiento_meta_meta: el listado de metas agrupa por meta (cantidad de
+abonos y último abono) y el historial pagina por fecha dentro de cada meta; las dos
+consultas se resuelven recorriendo solo el índice.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 18:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_movimiento_meta_meta_fecha", "Movimiento_Meta", ["meta_id", "fecha_asignacion", "movimiento_meta_id"]
+    )
+    op.drop_index("ix_movimiento_meta_meta", table_name="Movimiento_Meta")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index("ix_movimiento_meta_meta", "Movimiento_Meta", ["meta_id"])
+    op.drop_index("ix_movimiento_meta_meta_fecha", table_name="Movimiento_Meta")
@@ -0,0 +1,48 @@
+"""Meta.categoria_id: la categoría automática de los abonos, enlazada por id
+
+Antes se buscaba en cada abono por el nombre "Meta: {nombre_meta}" (y dejaba de
+encontrarse si se renombraba la meta). Las metas existentes se enlazan con la categoría
+que tenga ese nombre, si la hay.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 18:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("Meta") as batch_op:
+        batch_op.add_column(sa.Column("categoria_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            "fk_meta_categoria", "Categoria", ["categoria_id"], ["categoria_id"], ondelete="SET NULL"
+        )
+
+    op.execute(
+        """
+        UPDATE "Meta" SET categoria_id = (
+            SELECT MIN(c.categoria_id) FROM "Categoria" c
+            WHERE c.usuario_id = "Meta".usuario_id
+              AND c.nombre_categoria = 'Meta: ' || "Meta".nombre_meta
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("Meta") as batch_op:
+        batch_op.drop_constraint("fk_meta_categoria", type_="foreignkey")
+        batch_op.drop_column("categoria_id")
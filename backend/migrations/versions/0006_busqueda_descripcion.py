@@ -0,0 +1,82 @@
+"""Índice de texto completo sobre Movimiento.descripcion (ver busqueda.py)
+
+- Postgres: índice GIN sobre to_tsvector('spanish', coalesce(descripcion, '')).
+- SQLite: tabla FTS5 de contenido externo "movimiento_fts" con triggers que la mantienen
+  al insertar, editar o borrar movimientos; se rellena con los movimientos existentes.
+  Ojo: en SQLite, batch_alter_table("Movimiento") recrea la tabla y pierde los triggers;
+  una migración futura que lo use debe volver a crearlos.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 21:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_UPGRADE = (
+    """
+    CREATE VIRTUAL TABLE movimiento_fts USING fts5(
+        descripcion, content='Movimiento', content_rowid='movimiento_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER movimiento_fts_insert AFTER INSERT ON "Movimiento" BEGIN
+        INSERT INTO movimiento_fts (rowid, descripcion) VALUES (new.movimiento_id, new.descripcion);
+    END
+    """,
+    """
+    CREATE TRIGGER movimiento_fts_delete AFTER DELETE ON "Movimiento" BEGIN
+        INSERT INTO movimiento_fts (movimiento_fts, rowid, descripcion) VALUES ('delete', old.movimiento_id, old.descripcion);
+    END
+    """,
+    """
+    CREATE TRIGGER movimiento_fts_update AFTER UPDATE OF descripcion ON "Movimiento" BEGIN
+        INSERT INTO movimiento_fts (movimiento_fts, rowid, descripcion) VALUES ('delete', old.movimiento_id, old.descripcion);
+        INSERT INTO movimiento_fts (rowid, descripcion) VALUES (new.movimiento_id, new.descripcion);
+    END
+    """,
+    "INSERT INTO movimiento_fts (movimiento_fts) VALUES ('rebuild')",
+)
+
+SQLITE_DOWNGRADE = (
+    "DROP TRIGGER IF EXISTS movimiento_fts_update",
+    "DROP TRIGGER IF EXISTS movimiento_fts_delete",
+    "DROP TRIGGER IF EXISTS movimiento_fts_insert",
+    "DROP TABLE IF EXISTS movimiento_fts",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialecto = op.get_bind().dialect.name
+    if dialecto == "postgresql":
+        op.create_index(
+            "ix_movimiento_descripcion_fts",
+            "Movimiento",
+            [sa.text("to_tsvector('spanish', coalesce(descripcion, ''))")],
+            postgresql_using="gin",
+        )
+    elif dialecto == "sqlite":
+        for sentencia in SQLITE_UPGRADE:
+            op.execute(sentencia)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialecto = op.get_bind().dialect.name
+    if dialecto == "postgresql":
+        op.drop_index("ix_movimiento_descripcion_fts", table_name="Movimiento")
+    elif dialecto == "sqlite":
+        for sentencia in SQLITE_DOWNGRADE:
+            op.execute(sentencia)
@@ -0,0 +1,69 @@
+"""Tabla fría Movimiento_Archivo y registro de cortes Corte_Archivo (ver archivado.py)
+
+- Movimiento_Archivo: mismas columnas que Movimiento; movimiento_id no es autoincremental
+  porque conserva el id que tenía en la tabla caliente.
+- Índices equivalentes a los de Movimiento para listados por usuario y fecha, y los
+  borrados de cuentas y categorías; en Postgres también el GIN de búsqueda.
+- Corte_Archivo: una fila por ejecución; el mayor corte separa los datos fríos.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 23:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDICES = (
+    ("ix_movimiento_archivo_usuario_fecha", ["usuario_id", "fecha", "movimiento_id"]),
+    ("ix_movimiento_archivo_cuenta", ["cuenta_id"]),
+    ("ix_movimiento_archivo_categoria", ["categoria_id"]),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "Movimiento_Archivo",
+        sa.Column("movimiento_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("cuenta_id", sa.Integer(), sa.ForeignKey("Cuenta.cuenta_id"), nullable=False),
+        sa.Column("categoria_id", sa.Integer(), sa.ForeignKey("Categoria.categoria_id"), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), sa.ForeignKey("Usuario.usuario_id"), nullable=False),
+        sa.Column("tipo", sa.String(20), nullable=False),
+        sa.Column("monto", sa.DECIMAL(15, 2), nullable=False),
+        sa.Column("fecha", sa.DateTime()),
+        sa.Column("descripcion", sa.Text()),
+        sa.CheckConstraint("tipo IN ('Ingreso', 'Gasto')", name="tipo_movimiento"),
+    )
+    for nombre, columnas in INDICES:
+        op.create_index(nombre, "Movimiento_Archivo", columnas)
+    if op.get_bind().dialect.name == "postgresql":
+        op.create_index(
+            "ix_movimiento_archivo_descripcion_fts",
+            "Movimiento_Archivo",
+            [sa.text("to_tsvector('spanish', coalesce(descripcion, ''))")],
+            postgresql_using="gin",
+        )
+
+    op.create_table(
+        "Corte_Archivo",
+        sa.Column("corte_id", sa.Integer(), primary_key=True),
+        sa.Column("corte", sa.DateTime(), nullable=False),
+        sa.Column("fecha_ejecucion", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("archivados", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("Corte_Archivo")
+    op.drop_table("Movimiento_Archivo")
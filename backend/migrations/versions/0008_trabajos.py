@@ -0,0 +1,46 @@
+"""Tabla Trabajo para las operaciones en segundo plano (ver trabajos.py)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 10:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "Trabajo",
+        sa.Column("trabajo_id", sa.Integer(), primary_key=True),
+        sa.Column("usuario_id", sa.Integer(), sa.ForeignKey("Usuario.usuario_id"), nullable=False),
+        sa.Column("tipo", sa.String(50), nullable=False),
+        sa.Column("estado", sa.String(20), nullable=False),
+        sa.Column("parametros", sa.JSON()),
+        sa.Column("procesados", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Integer()),
+        sa.Column("resultado", sa.JSON()),
+        sa.Column("error", sa.Text()),
+        sa.Column("fecha_creacion", sa.DateTime(), nullable=False),
+        sa.Column("fecha_inicio", sa.DateTime()),
+        sa.Column("fecha_fin", sa.DateTime()),
+        sa.Column("fecha_actualizacion", sa.DateTime(), nullable=False),
+        sa.CheckConstraint("estado IN ('pendiente', 'en_curso', 'completado', 'fallido')", name="estado_trabajo"),
+    )
+    op.create_index("ix_trabajo_usuario_creacion", "Trabajo", ["usuario_id", "fecha_creacion"])
+    op.create_index("ix_trabajo_estado", "Trabajo", ["estado"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("Trabajo")
@@ -1,7 +1,11 @@
-from sqlalchemy import Column, Integer, String, Boolean, DECIMAL, ForeignKey, DateTime, Text, func
+from sqlalchemy import Column, Integer, String, Boolean, DECIMAL, ForeignKey, Date, DateTime, Text, Enum, Index, JSON, func, text
 from sqlalchemy.orm import relationship
+import datetime
 from database import Base
 
+# Tipo restringido (CHECK en la base de datos); las comparaciones ya no necesitan lower()
+TipoMovimiento = Enum("Ingreso", "Gasto", name="tipo_movimiento", native_enum=False, create_constraint=True, length=20)
+
 class Usuario(Base):
     __tablename__ = "Usuario"
 
@@ -11,6 +15,8 @@ class Usuario(Base):
     contraseña = Column(String(255), nullable=False)
     fecha_registro = Column(DateTime, server_default=func.now())
     estado = Column(Boolean, default=True)
+    # Se incrementa en cada escritura de sus datos; sirve de ETag para los listados (versiones.py)
+    version_datos = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relaciones
     cuentas = relationship("Cuenta", back_populates="usuario")
@@ -20,6 +26,9 @@ class Usuario(Base):
 
 class Cuenta(Base):
     __tablename__ = "Cuenta"
+    __table_args__ = (
+        Index("ix_cuenta_usuario", "usuario_id"),
+    )
 
     cuenta_id = Column(Integer, primary_key=True, index=True)
     usuario_id = Column(Integer, ForeignKey("Usuario.usuario_id"), nullable=False)
@@ -32,11 +41,14 @@ class Cuenta(Base):
 
 class Categoria(Base):
     __tablename__ = "Categoria"
+    __table_args__ = (
+        Index("ix_categoria_usuario_nombre", "usuario_id", "nombre_categoria"),
+    )
 
     categoria_id = Column(Integer, primary_key=True, index=True)
     usuario_id = Column(Integer, ForeignKey("Usuario.usuario_id"), nullable=False)
     nombre_categoria = Column(String(100), nullable=False)
-    tipo = Column(String(20), nullable=False) # 'Ingreso' o 'Gasto'
+    tipo = Column(TipoMovimiento, nullable=False) # 'Ingreso' o 'Gasto'
 
     # Relaciones
     usuario = relationship("Usuario", back_populates="categorias")
@@ -44,6 +56,9 @@ class Categoria(Base):
 
 class Meta(Base): # Renamed from MetaAhorro to Meta
     __tablename__ = "Meta"
+    __table_args__ = (
+        Index("ix_meta_usuario", "usuario_id"),
+    )
 
     meta_id = Column(Integer, primary_key=True, index=True)
     usuario_id = Column(Integer, ForeignKey("Usuario.usuario_id"), nullable=False)
@@ -53,6 +68,8 @@ class Meta(Base): # Renamed from MetaAhorro to Meta
     fecha_inicio = Column(DateTime, server_default=func.now(), nullable=False) # Added server_default
     fecha_fin = Column(DateTime, nullable=False)
     estado = Column(Boolean, default=True)
+    # Categoría automática de sus abonos ("Meta: {nombre_meta}"); se crea con el primer abono
+    categoria_id = Column(Integer, ForeignKey("Categoria.categoria_id", name="fk_meta_categoria", ondelete="SET NULL"))
 
     # Relaciones
     usuario = relationship("Usuario", back_populates="metas")
@@ -60,6 +77,10 @@ class Meta(Base): # Renamed from MetaAhorro to Meta
 
 class MovimientoMeta(Base): # New Pivote Table
     __tablename__ = "Movimiento_Meta"
+    __table_args__ = (
+        Index("ix_movimiento_meta_movimiento", "movimiento_id"),
+        Index("ix_movimiento_meta_meta_fecha", "meta_id", "fecha_asignacion", "movimiento_meta_id"),
+    )
 
     movimiento_meta_id = Column(Integer, primary_key=True, index=True)
     meta_id = Column(Integer, ForeignKey("Meta.meta_id"), nullable=False)
@@ -73,14 +94,27 @@ class MovimientoMeta(Base): # New Pivote Table
 
 class Movimiento(Base):
     __tablename__ = "Movimiento"
+    __table_args__ = (
+        # Listado por usuario ordenado por fecha (y cursor de paginación)
+        Index("ix_movimiento_usuario_fecha", "usuario_id", "fecha", "movimiento_id"),
+        # Comprobaciones antes de borrar una cuenta o una categoría
+        Index("ix_movimiento_cuenta", "cuenta_id"),
+        Index("ix_movimiento_categoria", "categoria_id"),
+        # Búsqueda de texto completo en la descripción (busqueda.py); en SQLite es la tabla FTS5 movimiento_fts
+        Index(
+            "ix_movimiento_descripcion_fts",
+            text("to_tsvector('spanish', coalesce(descripcion, ''))"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
 
     movimiento_id = Column(Integer, primary_key=True, index=True)
     cuenta_id = Column(Integer, ForeignKey("Cuenta.cuenta_id"), nullable=False)
     categoria_id = Column(Integer, ForeignKey("Categoria.categoria_id"), nullable=False)
     usuario_id = Column(Integer, ForeignKey("Usuario.usuario_id"), nullable=False)
-    tipo = Column(String(20), nullable=False) # 'Ingreso' o 'Gasto'
+    tipo = Column(TipoMovimiento, nullable=False) # 'Ingreso' o 'Gasto'
     monto = Column(DECIMAL(15, 2), nullable=False)
-    fecha = Column(DateTime, server_default=func.now()) # Use server_default
+    fecha = Column(DateTime, default=datetime.datetime.now, server_default=func.now()) # Mismo formato que las fechas explícitas (el cursor de paginación compara por igualdad)
     descripcion = Column(Text)
 
     # Relaciones
@@ -88,3 +122,68 @@ class Movimiento(Base):
     categoria = relationship("Categoria", back_populates="movimientos")
     cuenta = relationship("Cuenta", back_populates="movimientos")
     movimientos_meta = relationship("MovimientoMeta", back_populates="movimiento") # New relationship
+
+class MovimientoArchivo(Base): # Movimientos de periodos cerrados que archivado.py saca de Movimiento (mismas columnas e ids)
+    __tablename__ = "Movimiento_Archivo"
+    __table_args__ = (
+        Index("ix_movimiento_archivo_usuario_fecha", "usuario_id", "fecha", "movimiento_id"),
+        Index("ix_movimiento_archivo_cuenta", "cuenta_id"),
+        Index("ix_movimiento_archivo_categoria", "categoria_id"),
+        Index(
+            "ix_movimiento_archivo_descripcion_fts",
+            text("to_tsvector('spanish', coalesce(descripcion, ''))"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    movimiento_id = Column(Integer, primary_key=True, autoincrement=False)
+    cuenta_id = Column(Integer, ForeignKey("Cuenta.cuenta_id"), nullable=False)
+    categoria_id = Column(Integer, ForeignKey("Categoria.categoria_id"), nullable=False)
+    usuario_id = Column(Integer, ForeignKey("Usuario.usuario_id"), nullable=False)
+    tipo = Column(TipoMovimiento, nullable=False)
+    monto = Column(DECIMAL(15, 2), nullable=False)
+    fecha = Column(DateTime)
+    descripcion = Column(Text)
+
+class CorteArchivo(Base): # Una fila por ejecución del archivado; el mayor corte separa los datos fríos de los calientes
+    __tablename__ = "Corte_Archivo"
+
+    corte_id = Column(Integer, primary_key=True)
+    corte = Column(DateTime, nullable=False) # Movimiento_Archivo solo contiene movimientos con fecha < corte
+    fecha_ejecucion = Column(DateTime, server_default=func.now())
+    archivados = Column(Integer, nullable=False, default=0)
+
+class ResumenMensual(Base): # Acumulados por mes; los mantiene resumen.py en cada escritura de Movimiento
+    __tablename__ = "Resumen_Mensual"
+
+    usuario_id = Column(Integer, ForeignKey("Usuario.usuario_id"), primary_key=True)
+    mes = Column(Date, primary_key=True) # Primer día del mes
+    tipo = Column(TipoMovimiento, primary_key=True)
+    categoria_id = Column(Integer, ForeignKey("Categoria.categoria_id"), primary_key=True)
+    total = Column(DECIMAL(15, 2), nullable=False, default=0)
+    cantidad = Column(Integer, nullable=False, default=0)
+
+EstadoTrabajo = Enum("pendiente", "en_curso", "completado", "fallido", name="estado_trabajo", native_enum=False, create_constraint=True, length=20)
+
+class Trabajo(Base): # Operaciones largas que trabajos.py ejecuta en segundo plano (POST /jobs/...)
+    __tablename__ = "Trabajo"
+    __table_args__ = (
+        Index("ix_trabajo_usuario_creacion", "usuario_id", "fecha_creacion"),
+        Index("ix_trabajo_estado", "estado"),
+    )
+
+    trabajo_id = Column(Integer, primary_key=True)
+    usuario_id = Column(Integer, ForeignKey("Usuario.usuario_id"), nullable=False)
+    tipo = Column(String(50), nullable=False)
+    estado = Column(EstadoTrabajo, nullable=False, default="pendiente")
+    parametros = Column(JSON)
+    procesados = Column(Integer, nullable=False, default=0) # Progreso: elementos hechos de ``total``
+    total = Column(Integer) # None si no se conoce de antemano
+    resultado = Column(JSON)
+    error = Column(Text)
+    # Hora del servidor de la API (UTC), no de la base de datos: fecha_actualizacion es el latido
+    # con el que se detectan trabajos abandonados tras un reinicio
+    fecha_creacion = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+    fecha_inicio = Column(DateTime)
+    fecha_fin = Column(DateTime)
+    fecha_actualizacion = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
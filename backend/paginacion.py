@@ -0,0 +1,39 @@
+"""Cursores opacos para la paginación por keyset.
+
+El cursor codifica (fecha, id) del último elemento entregado; la página siguiente continúa
+justo después, ordenando por fecha y id descendentes.
+
+Los resultados por relevancia (búsqueda) no tienen una clave estable por la que continuar:
+su cursor codifica la posición del siguiente elemento.
+"""
+import base64
+from datetime import datetime
+
+from fastapi import HTTPException
+
+
+def codificar_cursor(fecha: datetime, id_: int) -> str:
+    raw = f"{fecha.isoformat()}|{id_}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decodificar_cursor(cursor: str):
+    try:
+        fecha, id_ = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(fecha), int(id_)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def codificar_posicion(posicion: int) -> str:
+    return base64.urlsafe_b64encode(f"p|{posicion}".encode()).decode()
+
+
+def decodificar_posicion(cursor: str) -> int:
+    try:
+        marca, posicion = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        if marca != "p" or int(posicion) < 0:
+            raise ValueError(cursor)
+        return int(posicion)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
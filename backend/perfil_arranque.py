@@ -0,0 +1,101 @@
+"""Perfil del arranque en frío de la API.
+
+Lanza un intérprete nuevo (como hace Render al despertar el servicio) y mide:
+
+    - importación de main.py, con el desglose de ``python -X importtime``: paquetes que más
+      tardan (tiempo propio sumado por paquete) y módulos con más tiempo acumulado
+    - arranque (lifespan: migraciones si MIGRAR_AL_INICIAR está activo)
+    - primera petición a /ready y a /
+
+Usa DATABASE_URL (.env) como la app; sin ella, una base SQLite temporal.
+
+    python perfil_arranque.py
+    python perfil_arranque.py --top 30
+    MIGRAR_AL_INICIAR=0 python perfil_arranque.py     # como en un despliegue que migra antes
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+# Se ejecuta en el proceso hijo: todo lo que pase aquí cuenta como arranque en frío
+_HIJO = """
+import json, sys, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient  # del arnés, no cuenta
+t1b = time.perf_counter()
+with TestClient(main.app) as cliente:
+    t2 = time.perf_counter()
+    estado_ready = cliente.get("/ready").status_code
+    t3 = time.perf_counter()
+    estado_raiz = cliente.get("/").status_code
+    t4 = time.perf_counter()
+print(json.dumps({"importacion": t1 - t0, "arranque": t2 - t1b, "ready": t3 - t2, "raiz": t4 - t3,
+                  "estado_ready": estado_ready, "estado_raiz": estado_raiz}), file=sys.stdout)
+"""
+
+
+def _importtime(entorno: dict):
+    # Cada línea: "import time: self [us] | cumulative | <sangría>paquete"
+    proceso = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                             env=entorno, capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    modulos = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        modulos.append((nombre.strip(), int(propio), int(acumulado)))
+    return modulos
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15, help="filas por tabla")
+    args = parser.parse_args()
+
+    entorno = dict(os.environ)
+    if "DATABASE_URL" not in entorno and not os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")):
+        entorno["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'arranque.db')}"
+        entorno.setdefault("SECRET_KEY", "perfil-" + "x" * 32)
+        entorno.setdefault("ALGORITHM", "HS256")
+
+    modulos = _importtime(entorno)
+    por_paquete = defaultdict(int)
+    for nombre, propio, _ in modulos:
+        por_paquete[nombre.split(".")[0]] += propio
+    total = sum(propio for _, propio, _ in modulos)
+
+    print(f"Importación de main.py: {total / 1000:.1f} ms ({len(modulos)} módulos)\n")
+    print(f"{'paquete':<28} {'ms':>8} {'%':>6}")
+    for paquete, propio in sorted(por_paquete.items(), key=lambda p: -p[1])[:args.top]:
+        print(f"{paquete:<28} {propio / 1000:>8.1f} {propio / total * 100:>5.1f}%")
+
+    # Acumulado: incluye lo que cada módulo importa a su vez
+    print(f"\n{'módulo (acumulado)':<40} {'ms':>8}")
+    for nombre, _, acumulado in sorted(modulos, key=lambda m: -m[2])[:args.top]:
+        print(f"{nombre:<40} {acumulado / 1000:>8.1f}")
+
+    proceso = subprocess.run([sys.executable, "-c", _HIJO], env=entorno, capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proceso.returncode != 0:
+        print(proceso.stderr, file=sys.stderr)
+        return 1
+    t = json.loads(proceso.stdout.strip().splitlines()[-1])
+    print("\nArranque en frío (proceso nuevo):")
+    print(f"  import main          {t['importacion'] * 1000:>8.1f} ms")
+    print(f"  lifespan             {t['arranque'] * 1000:>8.1f} ms"
+          f"  (MIGRAR_AL_INICIAR={entorno.get('MIGRAR_AL_INICIAR', 'true')})")
+    print(f"  primera GET /ready   {t['ready'] * 1000:>8.1f} ms  -> {t['estado_ready']}")
+    print(f"  primera GET /        {t['raiz'] * 1000:>8.1f} ms  -> {t['estado_raiz']}")
+    print(f"  total                {sum(t[k] for k in ('importacion', 'arranque', 'ready')) * 1000:>8.1f} ms hasta estar listo")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
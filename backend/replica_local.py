@@ -0,0 +1,51 @@
+"""Réplica de lectura local con dos archivos SQLite, para probar REPLICA_DATABASE_URL.
+
+Copia periódicamente la base primaria sobre la réplica con la API de backup de sqlite3
+(una copia consistente aunque la API esté escribiendo). El intervalo hace de retraso de
+replicación: lo escrito en la primaria no aparece en la réplica hasta la siguiente copia.
+
+    # terminal 1: la réplica se actualiza cada 3 s
+    python replica_local.py --primaria /tmp/primaria.db --replica /tmp/replica.db --cada 3
+
+    # terminal 2: la API lee de la réplica salvo justo después de escribir
+    DATABASE_URL=sqlite:////tmp/primaria.db REPLICA_DATABASE_URL=sqlite:////tmp/replica.db \\
+        LECTURA_PRIMARIA_SEGUNDOS=5 uvicorn main:app
+
+LECTURA_PRIMARIA_SEGUNDOS debe ser mayor que --cada; si no, un usuario puede dejar de ver
+lo que acaba de escribir.
+"""
+import argparse
+import sqlite3
+import sys
+import time
+
+
+def copiar(primaria: str, replica: str):
+    origen = sqlite3.connect(f"file:{primaria}?mode=ro", uri=True)
+    destino = sqlite3.connect(replica)
+    try:
+        origen.backup(destino)
+    finally:
+        destino.close()
+        origen.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--primaria", required=True, help="archivo SQLite de DATABASE_URL")
+    parser.add_argument("--replica", required=True, help="archivo SQLite de REPLICA_DATABASE_URL")
+    parser.add_argument("--cada", type=float, default=2.0, help="segundos entre copias (retraso simulado)")
+    parser.add_argument("--una-vez", action="store_true", help="copia una sola vez y termina")
+    args = parser.parse_args()
+
+    while True:
+        inicio = time.perf_counter()
+        copiar(args.primaria, args.replica)
+        print(f"réplica actualizada en {(time.perf_counter() - inicio) * 1000:.1f} ms", flush=True)
+        if args.una_vez:
+            return 0
+        time.sleep(args.cada)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Serialización JSON con orjson.
+
+``RespuestaJSON`` es la clase de respuesta por defecto de la app (main.py). Se registra
+envuelta en ``Default(...)`` a propósito: así FastAPI sigue usando su propio camino rápido
+(Pydantic ``dump_json``) en los endpoints con ``response_model``, y orjson en el resto.
+
+Para listados grandes, ``json_rapido`` permite saltarse Pydantic del todo: el endpoint
+construye dicts a partir de filas (sin objetos ORM ni validación ``from_attributes``) y
+los codifica directamente. El formato es el mismo que produce Pydantic: los Decimal salen
+como texto ("10.00") y las fechas en ISO 8601.
+
+El tiempo de ``render`` cuenta como serialización en las métricas de la petición (metricas.py), y
+las filas de ``json_rapido`` como filas devueltas.
+"""
+import time
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+import metricas
+
+
+def _por_defecto(valor):
+    if isinstance(valor, Decimal):
+        return str(valor)
+    raise TypeError(f"{type(valor).__name__} no es serializable a JSON")
+
+
+def dumps(contenido: Any) -> bytes:
+    return orjson.dumps(contenido, default=_por_defecto, option=orjson.OPT_NON_STR_KEYS)
+
+
+class RespuestaJSON(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        inicio = time.perf_counter()
+        try:
+            return dumps(content)
+        finally:
+            metricas.sumar_serializacion(time.perf_counter() - inicio)
+
+
+def json_rapido(contenido: Any, response: Response) -> RespuestaJSON:
+    """Respuesta ya codificada que conserva las cabeceras puestas en ``response``.
+
+    FastAPI ignora la ``Response`` inyectada cuando el endpoint devuelve la suya propia, así
+    que las cabeceras de las dependencias (ETag) y del endpoint (X-Next-Cursor) se copian.
+    """
+    # El endpoint devuelve su propia respuesta y no pasa por serialize_response
+    metricas.sumar_filas(contenido)
+    respuesta = RespuestaJSON(contenido)
+    for nombre, valor in response.headers.items():
+        if nombre not in ("content-length", "content-type"):
+            respuesta.headers[nombre] = valor
+    return respuesta
@@ -0,0 +1,149 @@
+"""Mantenimiento incremental de la tabla Resumen_Mensual.
+
+Cada escritura de un Movimiento aplica su delta aquí, en la misma sesión (y por lo
+tanto en la misma transacción) que el propio movimiento. El dashboard lee estos
+acumulados en lugar de recorrer todo el historial.
+
+Reconstrucción completa (por ejemplo, tras una migración o una carga manual):
+
+    python resumen.py             # todos los usuarios
+    python resumen.py 42          # solo el usuario 42
+"""
+import datetime
+import sys
+from decimal import Decimal
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+import archivado
+import models
+
+
+def inicio_de_mes(fecha: datetime.datetime) -> datetime.date:
+    return datetime.date(fecha.year, fecha.month, 1)
+
+
+def sumar(db: Session, usuario_id: int, mes: datetime.date, tipo: str, categoria_id: int, total: Decimal, cantidad: int):
+    valores = dict(
+        usuario_id=usuario_id,
+        mes=mes,
+        tipo=tipo,
+        categoria_id=categoria_id,
+        total=total,
+        cantidad=cantidad,
+    )
+    tabla = models.ResumenMensual.__table__
+    dialecto = db.get_bind().dialect.name
+
+    # Upsert atómico: dos peticiones simultáneas sobre el mismo mes no pierden el incremento
+    if dialecto in ("postgresql", "sqlite"):
+        if dialecto == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(tabla).values(**valores)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[tabla.c.usuario_id, tabla.c.mes, tabla.c.tipo, tabla.c.categoria_id],
+            set_={
+                "total": tabla.c.total + stmt.excluded.total,
+                "cantidad": tabla.c.cantidad + stmt.excluded.cantidad,
+            },
+        )
+        db.execute(stmt)
+        return
+
+    fila = db.get(models.ResumenMensual, (usuario_id, mes, tipo, categoria_id), with_for_update=True)
+    if fila:
+        fila.total += total
+        fila.cantidad += cantidad
+    else:
+        db.add(models.ResumenMensual(**valores))
+        db.flush()
+
+
+def aplicar(db: Session, movimiento: models.Movimiento, signo: int = 1):
+    """Suma (signo=1) o resta (signo=-1) un movimiento en su fila de resumen.
+
+    Debe llamarse con el movimiento ya volcado (``db.flush()``) para que ``fecha`` tenga valor.
+    """
+    sumar(
+        db,
+        movimiento.usuario_id,
+        inicio_de_mes(movimiento.fecha),
+        movimiento.tipo,
+        movimiento.categoria_id,
+        Decimal(movimiento.monto) * signo,
+        signo,
+    )
+
+
+def truncar(columna, unidad: str, dialecto: str):
+    """Expresión SQL que lleva una fecha al inicio de su día, semana (lunes) o mes.
+
+    ``unidad`` es "day", "week" o "month"; ``dialecto`` el nombre del dialecto del engine.
+    """
+    if dialecto == "postgresql":
+        return func.date_trunc(unidad, columna)
+    if unidad == "day":
+        return func.date(columna)
+    if unidad == "week":
+        # Al domingo de la misma semana (o el mismo día) y 6 días atrás: el lunes
+        return func.date(columna, "weekday 0", "-6 days")
+    return func.date(columna, "start of month")
+
+
+def a_fecha(valor) -> datetime.date:
+    # date_trunc (Postgres) devuelve datetime; date() (SQLite) devuelve texto 'YYYY-MM-DD'
+    if isinstance(valor, datetime.datetime):
+        return valor.date()
+    if isinstance(valor, str):
+        return datetime.date.fromisoformat(valor)
+    return valor
+
+
+def reconstruir(db: Session, usuario_id: int = None) -> int:
+    """Regenera desde cero los resúmenes (de un usuario o de todos). Devuelve las filas escritas."""
+    borrar = db.query(models.ResumenMensual)
+    if usuario_id is not None:
+        borrar = borrar.filter(models.ResumenMensual.usuario_id == usuario_id)
+    borrar.delete(synchronize_session=False)
+
+    # Incluye los movimientos archivados: el resumen cubre todo el historial
+    m = archivado.movimientos(archivado.corte(db) is not None).c
+    mes = truncar(m.fecha, "month", db.get_bind().dialect.name)
+    query = db.query(
+        m.usuario_id,
+        mes,
+        m.tipo,
+        m.categoria_id,
+        func.sum(m.monto),
+        func.count(m.movimiento_id),
+    )
+    if usuario_id is not None:
+        query = query.filter(m.usuario_id == usuario_id)
+    filas = query.group_by(m.usuario_id, mes, m.tipo, m.categoria_id).all()
+
+    db.bulk_insert_mappings(models.ResumenMensual, [
+        {
+            "usuario_id": fila[0],
+            "mes": a_fecha(fila[1]),
+            "tipo": fila[2],
+            "categoria_id": fila[3],
+            "total": fila[4] or 0,
+            "cantidad": fila[5],
+        }
+        for fila in filas
+    ])
+    return len(filas)
+
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    usuario = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    db = SessionLocal()
+    try:
+        escritas = reconstruir(db, usuario)
+        db.commit()
+        print(f"Resumen regenerado: {escritas} filas")
+    finally:
+        db.close()
@@ -1,12 +1,17 @@
 from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_async_db
 from fastapi import APIRouter, Depends, HTTPException
 import schemas
 import models
 import security
+import versiones
+import archivado
 
 router = APIRouter(prefix="/categorias", tags=["categorias"])
+router_async = APIRouter(prefix="/categorias", tags=["categorias"])
 
 # Endpoint para crear una categoria
 @router.post("/", response_model=schemas.Categoria)
@@ -21,18 +26,27 @@ def crear_categoria(
         tipo=categoria.tipo
     )
     db.add(nueva_categoria)
+    versiones.incrementar(db, current_user.usuario_id)
     db.commit()
     db.refresh(nueva_categoria)
     return nueva_categoria
 
 # Endpoint para obtener todas las categorias
-@router.get("/", response_model=List[schemas.Categoria])
+@router.get("/", response_model=List[schemas.Categoria], dependencies=[Depends(versiones.condicional)])
 def obtener_categorias(
-    db: Session = Depends(get_db),
+    db: Session = Depends(versiones.get_db_lectura),
     current_user: models.Usuario = Depends(security.get_current_user)
 ):
     return db.query(models.Categoria).filter(models.Categoria.usuario_id == current_user.usuario_id).all()
 
+@router_async.get("/", response_model=List[schemas.Categoria], dependencies=[Depends(versiones.condicional_async)])
+async def obtener_categorias_async(
+    db: AsyncSession = Depends(versiones.get_async_db_lectura),
+    current_user: models.Usuario = Depends(security.get_current_user_async)
+):
+    stmt = select(models.Categoria).where(models.Categoria.usuario_id == current_user.usuario_id)
+    return (await db.execute(stmt)).scalars().all()
+
 # Endpoint para eliminar una categoria
 @router.delete("/{categoria_id}")
 def eliminar_categoria(
@@ -51,9 +65,14 @@ def eliminar_categoria(
     # Check dependencies (FK constraint)
     # models.Categoria doesn't have explicit relationship check here but let's assume if it has movements we block or DB throws error
     # Better to check
-    if categoria.movimientos:
+    if categoria.movimientos or archivado.hay_archivados(db, models.MovimientoArchivo.categoria_id == categoria_id):
         raise HTTPException(status_code=400, detail="No se puede eliminar una categoría con movimientos asociados")
         
+    # Sin movimientos, sus filas de resumen (si quedan) están en cero
+    db.query(models.ResumenMensual).filter(models.ResumenMensual.categoria_id == categoria_id).delete()
+    # Si era la categoría automática de una meta, el próximo abono crea otra
+    db.query(models.Meta).filter(models.Meta.categoria_id == categoria_id).update({"categoria_id": None})
     db.delete(categoria)
+    versiones.incrementar(db, current_user.usuario_id)
     db.commit()
     return {"message": "Categoría eliminada"}
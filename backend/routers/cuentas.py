@@ -1,24 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-import models, schemas, security
-from database import get_db
+import models, schemas, security, resumen, archivado, versiones
+from database import get_db, get_async_db
 import datetime # Import datetime
 
 router = APIRouter(prefix="/cuentas", tags=["cuentas"])
+router_async = APIRouter(prefix="/cuentas", tags=["cuentas"])
 
 # Límites de validación
 MAX_SALDO = 999999999  # 999 millones COP
 MIN_SALDO = 0 # 1000 COP
 
-@router.get("/", response_model=List[schemas.Cuenta])
+@router.get("/", response_model=List[schemas.Cuenta], dependencies=[Depends(versiones.condicional)])
 def obtener_cuentas(
-    db: Session = Depends(get_db),
+    db: Session = Depends(versiones.get_db_lectura),
     current_user: models.Usuario = Depends(security.get_current_user)
 ):
     return db.query(models.Cuenta).filter(models.Cuenta.usuario_id == current_user.usuario_id).all()
 
+@router_async.get("/", response_model=List[schemas.Cuenta], dependencies=[Depends(versiones.condicional_async)])
+async def obtener_cuentas_async(
+    db: AsyncSession = Depends(versiones.get_async_db_lectura),
+    current_user: models.Usuario = Depends(security.get_current_user_async)
+):
+    stmt = select(models.Cuenta).where(models.Cuenta.usuario_id == current_user.usuario_id)
+    return (await db.execute(stmt)).scalars().all()
+
 @router.post("/", response_model=schemas.Cuenta)
 def crear_cuenta(
     cuenta: schemas.CuentaCreate,
@@ -44,6 +54,7 @@ def crear_cuenta(
         saldo_actual=cuenta.saldo_inicial
     )
     db.add(nueva_cuenta)
+    versiones.incrementar(db, current_user.usuario_id)
     db.commit()
     db.refresh(nueva_cuenta)
 
@@ -62,6 +73,7 @@ def crear_cuenta(
                 tipo="Ingreso"
             )
             db.add(categoria_ajuste)
+            versiones.incrementar(db, current_user.usuario_id)
             db.commit()
             db.refresh(categoria_ajuste)
 
@@ -75,6 +87,9 @@ def crear_cuenta(
             fecha=datetime.datetime.now()
         )
         db.add(nuevo_movimiento)
+        db.flush()
+        resumen.aplicar(db, nuevo_movimiento)
+        versiones.incrementar(db, current_user.usuario_id)
         db.commit()
         db.refresh(nuevo_movimiento)
 
@@ -91,9 +106,10 @@ def eliminar_cuenta(
         raise HTTPException(status_code=404, detail="Cuenta no encontrada")
     
     # Check for movements
-    if cuenta.movimientos: # Relationship
+    if cuenta.movimientos or archivado.hay_archivados(db, models.MovimientoArchivo.cuenta_id == cuenta_id):
          raise HTTPException(status_code=400, detail="No se puede eliminar una cuenta con movimientos asociados")
 
     db.delete(cuenta)
+    versiones.incrementar(db, current_user.usuario_id)
     db.commit()
     return {"message": "Cuenta eliminada"}
@@ -1,37 +1,183 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-import schemas, models, security
-from database import get_db
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from datetime import date, datetime, time, timedelta
+import schemas, models, security, resumen, archivado, versiones
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+router_async = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+def _consultas_resumen(usuario_id: int):
+    # Los totales salen del resumen mensual (resumen.py), no de recorrer Movimiento
+    totales = select(models.ResumenMensual.tipo, func.sum(models.ResumenMensual.total)).where(
+        models.ResumenMensual.usuario_id == usuario_id,
+        models.ResumenMensual.tipo.in_(['Ingreso', 'Gasto'])
+    ).group_by(models.ResumenMensual.tipo)
+
+    # Saldo Total (Sum of accounts)
+    saldo_total = select(func.sum(models.Cuenta.saldo_actual)).where(
+        models.Cuenta.usuario_id == usuario_id
+    )
+    return totales, saldo_total
+
+def _resumen(totales, saldo_total):
+    totales = dict(totales)
+    return {
+        "total_ingresos": totales.get('Ingreso') or 0,
+        "total_gastos": totales.get('Gasto') or 0,
+        "saldo_total": saldo_total or 0
+    }
 
 @router.get("/", response_model=schemas.DashboardResumen)
 def obtener_resumen(
-    db: Session = Depends(get_db),
+    db: Session = Depends(versiones.get_db_lectura),
     current_user: models.Usuario = Depends(security.get_current_user)
 ):
-    # Calculate totals from DB
-    
-    # Total Ingresos
-    ingresos = db.query(func.sum(models.Movimiento.monto)).filter(
-        models.Movimiento.usuario_id == current_user.usuario_id,
-        func.lower(models.Movimiento.tipo) == 'ingreso'
-    ).scalar() or 0
-
-    # Total Gastos
-    gastos = db.query(func.sum(models.Movimiento.monto)).filter(
-        models.Movimiento.usuario_id == current_user.usuario_id,
-        func.lower(models.Movimiento.tipo) == 'gasto'
-    ).scalar() or 0
+    totales, saldo_total = _consultas_resumen(current_user.usuario_id)
+    return _resumen(db.execute(totales).all(), db.execute(saldo_total).scalar())
 
-    # Saldo Total (Sum of accounts)
-    saldo_total = db.query(func.sum(models.Cuenta.saldo_actual)).filter(
-        models.Cuenta.usuario_id == current_user.usuario_id
-    ).scalar() or 0
+@router_async.get("/", response_model=schemas.DashboardResumen)
+async def obtener_resumen_async(
+    db: AsyncSession = Depends(versiones.get_async_db_lectura),
+    current_user: models.Usuario = Depends(security.get_current_user_async)
+):
+    totales, saldo_total = _consultas_resumen(current_user.usuario_id)
+    return _resumen((await db.execute(totales)).all(), (await db.execute(saldo_total)).scalar())
 
-    return {
-        "total_ingresos": ingresos,
-        "total_gastos": gastos,
-        "saldo_total": saldo_total
-    }
+# --- Series y totales por categoría para los gráficos ---
+# Se agrupan en la base de datos: el cliente recibe un punto por periodo o por categoría, no
+# el historial completo. Si el rango cae en meses completos se leen del resumen mensual.
+
+UNIDADES = {"dia": "day", "semana": "week", "mes": "month"}
+
+class FiltrosAnalitica:
+    def __init__(
+        self,
+        fecha_desde: Optional[date] = Query(None, description="Primer día incluido"),
+        fecha_hasta: Optional[date] = Query(None, description="Último día incluido"),
+    ):
+        if fecha_desde and fecha_hasta and fecha_desde > fecha_hasta:
+            raise HTTPException(status_code=400, detail="fecha_desde no puede ser posterior a fecha_hasta")
+        self.fecha_desde = fecha_desde
+        self.fecha_hasta = fecha_hasta
+
+    def meses_completos(self) -> bool:
+        return (self.fecha_desde is None or self.fecha_desde.day == 1) and \
+            (self.fecha_hasta is None or (self.fecha_hasta + timedelta(days=1)).day == 1)
+
+    def desde_resumen(self, granularidad: str = "mes") -> bool:
+        return granularidad == "mes" and self.meses_completos()
+
+    def movimientos(self, corte):
+        # Movimiento, o su unión con Movimiento_Archivo si el rango llega antes del corte (archivado.py)
+        desde = datetime.combine(self.fecha_desde, time.min) if self.fecha_desde else None
+        return archivado.movimientos(archivado.alcanza(corte, desde)).c
+
+    def filtrar(self, stmt, usuario_id: int, desde_resumen: bool, tabla=None):
+        if desde_resumen:
+            tabla = models.ResumenMensual
+            stmt = stmt.where(tabla.usuario_id == usuario_id)
+            if self.fecha_desde:
+                stmt = stmt.where(tabla.mes >= self.fecha_desde)
+            if self.fecha_hasta:
+                stmt = stmt.where(tabla.mes <= self.fecha_hasta)
+            return stmt
+        stmt = stmt.where(tabla.usuario_id == usuario_id)
+        if self.fecha_desde:
+            stmt = stmt.where(tabla.fecha >= datetime.combine(self.fecha_desde, time.min))
+        if self.fecha_hasta:
+            stmt = stmt.where(tabla.fecha < datetime.combine(self.fecha_hasta + timedelta(days=1), time.min))
+        return stmt
+
+# ``corte`` (archivado.corte) solo se consulta cuando no se lee del resumen mensual
+def _consulta_series(usuario_id: int, granularidad: str, filtros: FiltrosAnalitica, dialecto: str, corte=None):
+    desde_resumen = filtros.desde_resumen(granularidad)
+    if desde_resumen:
+        tabla = models.ResumenMensual
+        periodo, tipo, monto = tabla.mes, tabla.tipo, tabla.total
+    else:
+        tabla = filtros.movimientos(corte)
+        periodo = resumen.truncar(tabla.fecha, UNIDADES[granularidad], dialecto)
+        tipo, monto = tabla.tipo, tabla.monto
+    stmt = select(
+        periodo,
+        func.sum(case((tipo == 'Ingreso', monto), else_=0)),
+        func.sum(case((tipo == 'Gasto', monto), else_=0)),
+    )
+    stmt = filtros.filtrar(stmt, usuario_id, desde_resumen, tabla).group_by(periodo)
+    if desde_resumen:
+        # resumen.aplicar deja filas con cantidad 0 cuando se borran o archivan todos los movimientos del mes
+        stmt = stmt.having(func.sum(tabla.cantidad) > 0)
+    return stmt.order_by(periodo)
+
+def _series(filas):
+    return [
+        {"periodo": resumen.a_fecha(periodo), "ingresos": ingresos or 0, "gastos": gastos or 0}
+        for periodo, ingresos, gastos in filas
+    ]
+
+def _consulta_categorias(usuario_id: int, tipo: Optional[str], filtros: FiltrosAnalitica, corte=None):
+    desde_resumen = filtros.desde_resumen()
+    if desde_resumen:
+        tabla, monto, cantidad = models.ResumenMensual, models.ResumenMensual.total, models.ResumenMensual.cantidad
+    else:
+        tabla = filtros.movimientos(corte)
+        monto, cantidad = tabla.monto, 1
+    total = func.sum(monto)
+    stmt = select(
+        tabla.categoria_id,
+        models.Categoria.nombre_categoria,
+        tabla.tipo,
+        total.label("total"),
+        func.sum(cantidad).label("cantidad"),
+    ).join(models.Categoria, models.Categoria.categoria_id == tabla.categoria_id)
+    if tipo:
+        stmt = stmt.where(tabla.tipo == tipo)
+    stmt = filtros.filtrar(stmt, usuario_id, desde_resumen, tabla)
+    return stmt.group_by(tabla.categoria_id, models.Categoria.nombre_categoria, tabla.tipo) \
+        .having(func.sum(cantidad) > 0) \
+        .order_by(total.desc())
+
+@router.get("/series", response_model=List[schemas.PuntoSerie])
+def obtener_series(
+    granularidad: Literal["dia", "semana", "mes"] = "mes",
+    filtros: FiltrosAnalitica = Depends(),
+    db: Session = Depends(versiones.get_db_lectura),
+    current_user: models.Usuario = Depends(security.get_current_user)
+):
+    corte = None if filtros.desde_resumen(granularidad) else archivado.corte(db)
+    stmt = _consulta_series(current_user.usuario_id, granularidad, filtros, db.get_bind().dialect.name, corte)
+    return _series(db.execute(stmt).all())
+
+@router_async.get("/series", response_model=List[schemas.PuntoSerie])
+async def obtener_series_async(
+    granularidad: Literal["dia", "semana", "mes"] = "mes",
+    filtros: FiltrosAnalitica = Depends(),
+    db: AsyncSession = Depends(versiones.get_async_db_lectura),
+    current_user: models.Usuario = Depends(security.get_current_user_async)
+):
+    corte = None if filtros.desde_resumen(granularidad) else (await db.execute(archivado.CONSULTA_CORTE)).scalar()
+    stmt = _consulta_series(current_user.usuario_id, granularidad, filtros, db.bind.dialect.name, corte)
+    return _series((await db.execute(stmt)).all())
+
+@router.get("/categorias", response_model=List[schemas.TotalCategoria])
+def obtener_totales_categoria(
+    tipo: Optional[schemas.TipoMovimiento] = None,
+    filtros: FiltrosAnalitica = Depends(),
+    db: Session = Depends(versiones.get_db_lectura),
+    current_user: models.Usuario = Depends(security.get_current_user)
+):
+    corte = None if filtros.desde_resumen() else archivado.corte(db)
+    return db.execute(_consulta_categorias(current_user.usuario_id, tipo, filtros, corte)).mappings().all()
+
+@router_async.get("/categorias", response_model=List[schemas.TotalCategoria])
+async def obtener_totales_categoria_async(
+    tipo: Optional[schemas.TipoMovimiento] = None,
+    filtros: FiltrosAnalitica = Depends(),
+    db: AsyncSession = Depends(versiones.get_async_db_lectura),
+    current_user: models.Usuario = Depends(security.get_current_user_async)
+):
+    corte = None if filtros.desde_resumen() else (await db.execute(archivado.CONSULTA_CORTE)).scalar()
+    return (await db.execute(_consulta_categorias(current_user.usuario_id, tipo, filtros, corte))).mappings().all()
@@ -1,12 +1,17 @@
-from typing import List
+from typing import List, Optional
 import datetime
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from database import get_db
-import schemas, models, security
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db
+import schemas, models, security, paginacion, resumen, saldos, versiones
 
 router = APIRouter(prefix="/metas", tags=["metas"])
+router_async = APIRouter(prefix="/metas", tags=["metas"])
+
+logger = logging.getLogger(__name__)
 
 @router.post("", response_model=schemas.Meta)
 def crear_meta(
@@ -30,19 +35,133 @@ def crear_meta(
             estado=True
         )
         db.add(nueva_meta)
+        versiones.incrementar(db, current_user.usuario_id)
         db.commit()
         db.refresh(nueva_meta)
         return nueva_meta
     except Exception as e:
-        print(f"Error al crear meta: {e}")
+        logger.exception("Error al crear meta")
         raise HTTPException(status_code=500, detail=f"Error interno al crear meta: {e}")
 
-@router.get("") 
+def _consulta_metas(usuario_id: int):
+    # Un solo SELECT agrupado: cada meta con el número de abonos y la fecha del último.
+    # Lo resuelve el índice (meta_id, fecha_asignacion, ...) de Movimiento_Meta; los abonos
+    # en sí no viajan en el listado.
+    return select(
+        models.Meta,
+        func.count(models.MovimientoMeta.movimiento_meta_id),
+        func.max(models.MovimientoMeta.fecha_asignacion),
+    ).outerjoin(
+        models.MovimientoMeta, models.MovimientoMeta.meta_id == models.Meta.meta_id
+    ).where(
+        models.Meta.usuario_id == usuario_id
+    ).group_by(models.Meta.meta_id).order_by(models.Meta.meta_id)
+
+def _metas(filas):
+    metas = []
+    for meta, cantidad, ultimo in filas:
+        meta.cantidad_abonos = cantidad
+        meta.ultimo_abono = ultimo
+        metas.append(meta)
+    return metas
+
+@router.get("", response_model=List[schemas.Meta], dependencies=[Depends(versiones.condicional)])
 def obtener_metas(
-    db: Session = Depends(get_db),
+    db: Session = Depends(versiones.get_db_lectura),
     current_user: models.Usuario = Depends(security.get_current_user)
 ):
-    return db.query(models.Meta).filter(models.Meta.usuario_id == current_user.usuario_id).all()
+    return _metas(db.execute(_consulta_metas(current_user.usuario_id)).all())
+
+@router_async.get("", response_model=List[schemas.Meta], dependencies=[Depends(versiones.condicional_async)])
+async def obtener_metas_async(
+    db: AsyncSession = Depends(versiones.get_async_db_lectura),
+    current_user: models.Usuario = Depends(security.get_current_user_async)
+):
+    return _metas((await db.execute(_consulta_metas(current_user.usuario_id))).all())
+
+# Historial de abonos de una meta, paginado por keyset (fecha_asignacion, movimiento_meta_id)
+LIMITE_ABONOS = 50
+LIMITE_ABONOS_MAXIMO = 500
+
+def _consulta_abonos(usuario_id: int, meta_id: int, cursor: Optional[str], limit: int):
+    stmt = select(models.MovimientoMeta).join(
+        models.Meta, models.Meta.meta_id == models.MovimientoMeta.meta_id
+    ).where(
+        models.MovimientoMeta.meta_id == meta_id,
+        models.Meta.usuario_id == usuario_id
+    )
+    if cursor:
+        fecha_cursor, id_cursor = paginacion.decodificar_cursor(cursor)
+        stmt = stmt.where(or_(
+            models.MovimientoMeta.fecha_asignacion < fecha_cursor,
+            and_(models.MovimientoMeta.fecha_asignacion == fecha_cursor, models.MovimientoMeta.movimiento_meta_id < id_cursor)
+        ))
+    return stmt.order_by(
+        models.MovimientoMeta.fecha_asignacion.desc(),
+        models.MovimientoMeta.movimiento_meta_id.desc()
+    ).limit(limit + 1)
+
+def _pagina_abonos(abonos, limit: int, response: Response):
+    if len(abonos) > limit:
+        abonos = abonos[:limit]
+        response.headers["X-Next-Cursor"] = paginacion.codificar_cursor(abonos[-1].fecha_asignacion, abonos[-1].movimiento_meta_id)
+    return abonos
+
+def _meta_del_usuario(usuario_id: int, meta_id: int):
+    return select(models.Meta.meta_id).where(models.Meta.meta_id == meta_id, models.Meta.usuario_id == usuario_id)
+
+@router.get("/{meta_id}/abonos", response_model=List[schemas.MovimientoMeta], dependencies=[Depends(versiones.condicional)])
+def obtener_abonos(
+    meta_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(LIMITE_ABONOS, ge=1, le=LIMITE_ABONOS_MAXIMO),
+    db: Session = Depends(versiones.get_db_lectura),
+    current_user: models.Usuario = Depends(security.get_current_user)
+):
+    abonos = db.execute(_consulta_abonos(current_user.usuario_id, meta_id, cursor, limit)).scalars().all()
+    if not abonos and db.execute(_meta_del_usuario(current_user.usuario_id, meta_id)).first() is None:
+        raise HTTPException(status_code=404, detail="Meta no encontrada")
+    return _pagina_abonos(abonos, limit, response)
+
+@router_async.get("/{meta_id}/abonos", response_model=List[schemas.MovimientoMeta], dependencies=[Depends(versiones.condicional_async)])
+async def obtener_abonos_async(
+    meta_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(LIMITE_ABONOS, ge=1, le=LIMITE_ABONOS_MAXIMO),
+    db: AsyncSession = Depends(versiones.get_async_db_lectura),
+    current_user: models.Usuario = Depends(security.get_current_user_async)
+):
+    abonos = (await db.execute(_consulta_abonos(current_user.usuario_id, meta_id, cursor, limit))).scalars().all()
+    if not abonos and (await db.execute(_meta_del_usuario(current_user.usuario_id, meta_id))).first() is None:
+        raise HTTPException(status_code=404, detail="Meta no encontrada")
+    return _pagina_abonos(abonos, limit, response)
+
+def _nombre_categoria_meta(nombre_meta: str) -> str:
+    return f"Meta: {nombre_meta}"
+
+def _crear_categoria_meta(db: Session, meta: models.Meta) -> int:
+    categoria = models.Categoria(
+        usuario_id=meta.usuario_id,
+        nombre_categoria=_nombre_categoria_meta(meta.nombre_meta),
+        tipo='Gasto'
+    )
+    db.add(categoria)
+    db.flush()
+    # Solo se enlaza si la meta sigue sin categoría: si otro abono simultáneo se adelantó,
+    # se descarta la recién creada y se usa la suya
+    enlazada = db.execute(
+        update(models.Meta)
+        .where(models.Meta.meta_id == meta.meta_id, models.Meta.categoria_id.is_(None))
+        .values(categoria_id=categoria.categoria_id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if enlazada:
+        return categoria.categoria_id
+    db.delete(categoria)
+    db.flush()
+    return db.execute(select(models.Meta.categoria_id).where(models.Meta.meta_id == meta.meta_id)).scalar_one()
 
 @router.post("/{meta_id}/abonar")
 def abonar_meta(
@@ -64,32 +183,14 @@ def abonar_meta(
     if monto_real <= 0:
          raise HTTPException(status_code=400, detail="El monto debe ser mayor a cero")
 
-    if cuenta.saldo_actual < monto_real:
-        raise HTTPException(status_code=400, detail="Saldo insuficiente en la cuenta de origen")
-
-    # 2. Gestión Automática de Categoría
-    # Busca si existe una categoría llamada: "Meta: {meta.nombre_meta}"
-    nombre_categoria = f"Meta: {meta.nombre_meta}"
-    categoria = db.query(models.Categoria).filter(
-        models.Categoria.usuario_id == current_user.usuario_id,
-        models.Categoria.nombre_categoria == nombre_categoria
-    ).first()
-
-    if not categoria:
-        # Si NO existe: Créala automáticamente
-        categoria = models.Categoria(
-            usuario_id=current_user.usuario_id,
-            nombre_categoria=nombre_categoria,
-            tipo='Gasto'
-        )
-        db.add(categoria)
-        db.commit()
-        db.refresh(categoria)
-    
-    categoria_id_usar = categoria.categoria_id
-
     try:
-        # 3. Transacción Atómica
+        # 2. Gestión Automática de Categoría: va enlazada a la meta por id (meta.categoria_id),
+        # así que normalmente no cuesta ninguna consulta; solo el primer abono la crea
+        categoria_id_usar = meta.categoria_id
+        if categoria_id_usar is None:
+            categoria_id_usar = _crear_categoria_meta(db, meta)
+
+        # 3. Transacción Atómica: categoría, movimiento, saldos y pivote van en un único commit
         # Crea el Movimiento
         nuevo_movimiento = models.Movimiento(
             usuario_id=current_user.usuario_id,
@@ -102,11 +203,15 @@ def abonar_meta(
         )
         db.add(nuevo_movimiento)
         
-        # Actualiza saldos
-        cuenta.saldo_actual -= monto_real
-        meta.monto_actual += monto_real
+        # Actualiza saldos: la comprobación de saldo y el descuento son una sola sentencia,
+        # así dos abonos simultáneos no pueden dejar la cuenta en negativo
+        if not saldos.descontar_cuenta(db, cuenta.cuenta_id, monto_real):
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Saldo insuficiente en la cuenta de origen")
+        saldos.ajustar_meta(db, meta.meta_id, monto_real)
         
         db.flush() 
+        resumen.aplicar(db, nuevo_movimiento)
         
         # Crea la relación en Movimiento_Meta
         new_movimiento_meta = models.MovimientoMeta(
@@ -116,12 +221,15 @@ def abonar_meta(
             fecha_asignacion=datetime.datetime.now()
         )
         db.add(new_movimiento_meta)
+        versiones.incrementar(db, current_user.usuario_id)
 
         db.commit()
         db.refresh(meta)
         
         return {"message": "Abono exitoso", "meta": meta}
 
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error interno al abonar: {str(e)}")
@@ -137,13 +245,21 @@ def update_meta(
     if not meta:
         raise HTTPException(status_code=404, detail="Meta no encontrada")
 
+    # La categoría enlazada (meta.categoria_id) lleva el nombre de la meta: se renombra con ella
+    if meta.categoria_id is not None and meta_update.nombre_meta != meta.nombre_meta:
+        db.execute(
+            update(models.Categoria)
+            .where(models.Categoria.categoria_id == meta.categoria_id)
+            .values(nombre_categoria=_nombre_categoria_meta(meta_update.nombre_meta))
+        )
     meta.nombre_meta = meta_update.nombre_meta
     meta.monto_objetivo = meta_update.monto_objetivo
     meta.fecha_fin = meta_update.fecha_fin
+    versiones.incrementar(db, current_user.usuario_id)
     
     db.commit()
-    db.refresh(meta)
-    return meta
+    stmt = _consulta_metas(current_user.usuario_id).where(models.Meta.meta_id == meta_id)
+    return _metas(db.execute(stmt).all())[0]
 
 @router.delete("/{meta_id}")
 def delete_meta(
@@ -158,5 +274,6 @@ def delete_meta(
     db.query(models.MovimientoMeta).filter(models.MovimientoMeta.meta_id == meta_id).delete()
     
     db.delete(meta)
+    versiones.incrementar(db, current_user.usuario_id)
     db.commit()
     return {"message": "Meta eliminada"}
@@ -1,27 +1,241 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-import models, schemas, security
-from database import get_db
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from collections import defaultdict
+from typing import Dict, List, Optional
+from datetime import datetime
+from decimal import Decimal
+import models, schemas, security, resumen, importacion, exportacion, archivado, busqueda, paginacion, respuestas, saldos, versiones
+from database import get_db, get_async_db
 
 router = APIRouter(prefix="/movimientos", tags=["movimientos"])
+# Versiones async de las lecturas; main.py las monta por delante de las sync con DB_ASYNC=1
+router_async = APIRouter(prefix="/movimientos", tags=["movimientos"])
 
-@router.get("/", response_model=List[schemas.Movimiento])
+# Límites de paginación
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 500
+
+# Parámetros de listado compartidos por las versiones sync y async del endpoint
+class FiltrosMovimientos:
+    def __init__(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        cuenta_id: Optional[int] = None,
+        categoria_id: Optional[int] = None,
+        tipo: Optional[schemas.TipoMovimiento] = None,
+        monto_min: Optional[Decimal] = None,
+        monto_max: Optional[Decimal] = None,
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.fecha_desde = fecha_desde
+        self.fecha_hasta = fecha_hasta
+        self.cuenta_id = cuenta_id
+        self.categoria_id = categoria_id
+        self.tipo = tipo
+        self.monto_min = monto_min
+        self.monto_max = monto_max
+
+# El listado se lee como filas (no como objetos ORM) y se codifica sin pasar por Pydantic
+# (respuestas.json_rapido); las claves y su orden son los de schemas.Movimiento.
+# ``tabla`` es Movimiento o Movimiento_Archivo (mismas columnas, ver archivado.py).
+def _columnas_listado(tabla):
+    return (
+        tabla.tipo,
+        tabla.monto,
+        tabla.descripcion,
+        tabla.fecha,
+        tabla.movimiento_id,
+        tabla.usuario_id,
+        tabla.cuenta_id,
+        tabla.categoria_id,
+        models.Categoria.nombre_categoria,
+        models.Cuenta.nombre_cuenta,
+    )
+
+COLUMNAS_LISTADO = _columnas_listado(models.Movimiento)
+COLUMNAS_META = (
+    models.MovimientoMeta.monto_destinado,
+    models.MovimientoMeta.fecha_asignacion,
+    models.MovimientoMeta.movimiento_meta_id,
+    models.MovimientoMeta.meta_id,
+    models.MovimientoMeta.movimiento_id,
+)
+
+def _select_listado(usuario_id: int, tabla=models.Movimiento):
+    # Categoría y cuenta llegan en el mismo SELECT (JOIN); los abonos a metas en un único SELECT ... IN
+    return select(*_columnas_listado(tabla)).outerjoin(
+        models.Categoria, models.Categoria.categoria_id == tabla.categoria_id
+    ).outerjoin(
+        models.Cuenta, models.Cuenta.cuenta_id == tabla.cuenta_id
+    ).where(
+        tabla.usuario_id == usuario_id
+    )
+
+def _filtrar(stmt, filtros: FiltrosMovimientos, tabla=models.Movimiento):
+    # Filtros opcionales (los resuelve la base de datos, no el cliente)
+    if filtros.fecha_desde:
+        stmt = stmt.where(tabla.fecha >= filtros.fecha_desde)
+    if filtros.fecha_hasta:
+        stmt = stmt.where(tabla.fecha <= filtros.fecha_hasta)
+    if filtros.cuenta_id is not None:
+        stmt = stmt.where(tabla.cuenta_id == filtros.cuenta_id)
+    if filtros.categoria_id is not None:
+        stmt = stmt.where(tabla.categoria_id == filtros.categoria_id)
+    if filtros.tipo:
+        stmt = stmt.where(tabla.tipo == filtros.tipo)
+    if filtros.monto_min is not None:
+        stmt = stmt.where(tabla.monto >= filtros.monto_min)
+    if filtros.monto_max is not None:
+        stmt = stmt.where(tabla.monto <= filtros.monto_max)
+    return stmt
+
+def consulta_movimientos(usuario_id: int, filtros: FiltrosMovimientos, tabla=models.Movimiento):
+    stmt = _filtrar(_select_listado(usuario_id, tabla), filtros, tabla)
+
+    # Paginación por keyset: continúa justo después del último (fecha, movimiento_id) entregado
+    if filtros.cursor:
+        fecha_cursor, id_cursor = paginacion.decodificar_cursor(filtros.cursor)
+        stmt = stmt.where(or_(
+            tabla.fecha < fecha_cursor,
+            and_(tabla.fecha == fecha_cursor, tabla.movimiento_id < id_cursor)
+        ))
+
+    # Se pide un elemento extra para saber si existe una página siguiente
+    return stmt.order_by(
+        tabla.fecha.desc(),
+        tabla.movimiento_id.desc()
+    ).limit(filtros.limit + 1)
+
+# Con datos archivados (archivado.py): la página sale de Movimiento si su elemento extra ya es
+# posterior al corte (nada archivado puede ir antes); si no, se repite uniendo Movimiento_Archivo.
+def pagina_caliente(filas, filtros: FiltrosMovimientos, corte) -> bool:
+    if not archivado.alcanza(corte, filtros.fecha_desde):
+        return True
+    return len(filas) > filtros.limit and filas[filtros.limit].fecha >= corte
+
+def consulta_con_archivo(usuario_id: int, filtros: FiltrosMovimientos):
+    return archivado.unir(
+        [consulta_movimientos(usuario_id, filtros, tabla) for tabla in (models.Movimiento, models.MovimientoArchivo)],
+        "fecha", "movimiento_id",
+    ).limit(filtros.limit + 1)
+
+# Búsqueda por texto en la descripción (índice de texto completo, ver busqueda.py) combinada con
+# los filtros del listado. Se ordena por relevancia, así que el cursor es una posición.
+def consulta_busqueda(usuario_id: int, q: str, filtros: FiltrosMovimientos, dialecto: str, corte=None):
+    palabras = busqueda.terminos(q)
+    if not palabras:
+        raise HTTPException(status_code=400, detail="La búsqueda no contiene ninguna palabra")
+    desde = paginacion.decodificar_posicion(filtros.cursor) if filtros.cursor else 0
+
+    def rama(tabla):
+        stmt = _filtrar(_select_listado(usuario_id, tabla), filtros, tabla)
+        stmt, relevancia = busqueda.aplicar(stmt, palabras, dialecto, tabla)
+        return stmt.add_columns(relevancia.label("relevancia")).order_by(
+            relevancia.desc(),
+            tabla.movimiento_id.desc()
+        )
+
+    if not archivado.alcanza(corte, filtros.fecha_desde):
+        return rama(models.Movimiento).offset(desde).limit(filtros.limit + 1)
+    # Cada rama entrega sus mejores desde + limit + 1; la unión se ordena y pagina de nuevo
+    ramas = [rama(tabla).limit(desde + filtros.limit + 1) for tabla in (models.Movimiento, models.MovimientoArchivo)]
+    return archivado.unir(ramas, "relevancia", "movimiento_id").offset(desde).limit(filtros.limit + 1)
+
+def consulta_metas(movimiento_ids):
+    return select(*COLUMNAS_META).where(models.MovimientoMeta.movimiento_id.in_(movimiento_ids))
+
+def _recortar(filas, filtros: FiltrosMovimientos, response: Response):
+    if len(filas) > filtros.limit:
+        filas = filas[:filtros.limit]
+        response.headers["X-Next-Cursor"] = paginacion.codificar_cursor(filas[-1].fecha, filas[-1].movimiento_id)
+    return filas
+
+def _recortar_busqueda(filas, filtros: FiltrosMovimientos, response: Response):
+    if len(filas) > filtros.limit:
+        filas = filas[:filtros.limit]
+        desde = paginacion.decodificar_posicion(filtros.cursor) if filtros.cursor else 0
+        response.headers["X-Next-Cursor"] = paginacion.codificar_posicion(desde + filtros.limit)
+    return filas
+
+CLAVES_LISTADO = tuple(c.key for c in COLUMNAS_LISTADO)
+CLAVES_META = tuple(c.key for c in COLUMNAS_META)
+
+def filas_a_dicts(filas, metas, relevancia: bool = False):
+    por_movimiento = defaultdict(list)
+    for meta in metas:
+        por_movimiento[meta.movimiento_id].append(dict(zip(CLAVES_META, meta)))
+    resultado = []
+    for fila in filas:
+        movimiento = dict(zip(CLAVES_LISTADO, fila))
+        movimiento["movimientos_meta"] = por_movimiento.get(fila.movimiento_id, [])
+        if relevancia:
+            movimiento["relevancia"] = float(fila.relevancia)
+        resultado.append(movimiento)
+    return resultado
+
+@router.get("/", response_model=List[schemas.Movimiento], dependencies=[Depends(versiones.condicional)])
 def get_movimientos(
-    db: Session = Depends(get_db),
+    response: Response,
+    filtros: FiltrosMovimientos = Depends(),
+    db: Session = Depends(versiones.get_db_lectura),
     current_user: models.Usuario = Depends(security.get_current_user)
 ):
-    movimientos = db.query(models.Movimiento).filter(
-        models.Movimiento.usuario_id == current_user.usuario_id
-    ).order_by(models.Movimiento.fecha.desc()).all()
-    
-    for m in movimientos:
-        if m.categoria:
-            m.nombre_categoria = m.categoria.nombre_categoria
-        if m.cuenta:
-            m.nombre_cuenta = m.cuenta.nombre_cuenta
-            
-    return movimientos
+    corte = archivado.corte(db)
+    filas = db.execute(consulta_movimientos(current_user.usuario_id, filtros)).all()
+    if not pagina_caliente(filas, filtros, corte):
+        filas = db.execute(consulta_con_archivo(current_user.usuario_id, filtros)).all()
+    filas = _recortar(filas, filtros, response)
+    metas = db.execute(consulta_metas([f.movimiento_id for f in filas])).all() if filas else []
+    return respuestas.json_rapido(filas_a_dicts(filas, metas), response)
+
+@router_async.get("/", response_model=List[schemas.Movimiento], dependencies=[Depends(versiones.condicional_async)])
+async def get_movimientos_async(
+    response: Response,
+    filtros: FiltrosMovimientos = Depends(),
+    db: AsyncSession = Depends(versiones.get_async_db_lectura),
+    current_user: models.Usuario = Depends(security.get_current_user_async)
+):
+    corte = (await db.execute(archivado.CONSULTA_CORTE)).scalar()
+    filas = (await db.execute(consulta_movimientos(current_user.usuario_id, filtros))).all()
+    if not pagina_caliente(filas, filtros, corte):
+        filas = (await db.execute(consulta_con_archivo(current_user.usuario_id, filtros))).all()
+    filas = _recortar(filas, filtros, response)
+    metas = (await db.execute(consulta_metas([f.movimiento_id for f in filas]))).all() if filas else []
+    return respuestas.json_rapido(filas_a_dicts(filas, metas), response)
+
+@router.get("/buscar", response_model=List[schemas.MovimientoBusqueda], dependencies=[Depends(versiones.condicional)])
+def buscar_movimientos(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    filtros: FiltrosMovimientos = Depends(),
+    db: Session = Depends(versiones.get_db_lectura),
+    current_user: models.Usuario = Depends(security.get_current_user)
+):
+    stmt = consulta_busqueda(current_user.usuario_id, q, filtros, db.get_bind().dialect.name, archivado.corte(db))
+    filas = _recortar_busqueda(db.execute(stmt).all(), filtros, response)
+    metas = db.execute(consulta_metas([f.movimiento_id for f in filas])).all() if filas else []
+    return respuestas.json_rapido(filas_a_dicts(filas, metas, relevancia=True), response)
+
+@router_async.get("/buscar", response_model=List[schemas.MovimientoBusqueda], dependencies=[Depends(versiones.condicional_async)])
+async def buscar_movimientos_async(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    filtros: FiltrosMovimientos = Depends(),
+    db: AsyncSession = Depends(versiones.get_async_db_lectura),
+    current_user: models.Usuario = Depends(security.get_current_user_async)
+):
+    corte = (await db.execute(archivado.CONSULTA_CORTE)).scalar()
+    stmt = consulta_busqueda(current_user.usuario_id, q, filtros, db.bind.dialect.name, corte)
+    filas = _recortar_busqueda((await db.execute(stmt)).all(), filtros, response)
+    metas = (await db.execute(consulta_metas([f.movimiento_id for f in filas]))).all() if filas else []
+    return respuestas.json_rapido(filas_a_dicts(filas, metas, relevancia=True), response)
 
 @router.post("/", response_model=schemas.Movimiento)
 def create_movimiento(
@@ -43,17 +257,16 @@ def create_movimiento(
     if not categoria:
         raise HTTPException(status_code=404, detail="Categoría no encontrada o no pertenece al usuario")
     
-    mov_data = movimiento.model_dump(exclude={"usuario_id"})
+    mov_data = movimiento.model_dump(exclude={"usuario_id"}, exclude_none=True)
     new_movimiento = models.Movimiento(
         **mov_data,
         usuario_id=current_user.usuario_id
     )
     db.add(new_movimiento)
-    
-    if new_movimiento.tipo.lower() == 'ingreso':
-        cuenta.saldo_actual += new_movimiento.monto
-    else:
-        cuenta.saldo_actual -= new_movimiento.monto
+    db.flush()
+    resumen.aplicar(db, new_movimiento)
+    saldos.ajustar_cuenta(db, cuenta.cuenta_id, saldos.efecto(new_movimiento.tipo, new_movimiento.monto))
+    versiones.incrementar(db, current_user.usuario_id)
         
     db.commit()
     db.refresh(new_movimiento)
@@ -63,6 +276,117 @@ def create_movimiento(
     
     return new_movimiento
 
+# Alta de muchos movimientos en una sola transacción (clientes que sincronizan entradas offline).
+# Las cuentas y categorías se validan con una consulta cada una, los movimientos válidos se
+# insertan con un único INSERT ... executemany y saldos y resumen reciben un ajuste neto.
+# Los movimientos con cuenta o categoría ajena se rechazan uno a uno sin frenar al resto.
+@router.post("/batch", response_model=schemas.ResultadoLote)
+def create_movimientos_batch(
+    lote: schemas.MovimientoLote,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(security.get_current_user)
+):
+    usuario_id = current_user.usuario_id
+    cuentas_propias = set(db.scalars(
+        select(models.Cuenta.cuenta_id).where(
+            models.Cuenta.usuario_id == usuario_id,
+            models.Cuenta.cuenta_id.in_({m.cuenta_id for m in lote.movimientos})
+        )
+    ))
+    categorias_propias = set(db.scalars(
+        select(models.Categoria.categoria_id).where(
+            models.Categoria.usuario_id == usuario_id,
+            models.Categoria.categoria_id.in_({m.categoria_id for m in lote.movimientos})
+        )
+    ))
+
+    resultados = [schemas.ResultadoLoteItem(indice=i) for i in range(len(lote.movimientos))]
+    validos = []
+    filas = []
+    deltas_cuenta: Dict[int, Decimal] = defaultdict(Decimal)
+    resumenes: Dict[tuple, list] = defaultdict(lambda: [Decimal(0), 0])
+    for indice, movimiento in enumerate(lote.movimientos):
+        if movimiento.cuenta_id not in cuentas_propias:
+            resultados[indice].error = "Cuenta no encontrada o no pertenece al usuario"
+            continue
+        if movimiento.categoria_id not in categorias_propias:
+            resultados[indice].error = "Categoría no encontrada o no pertenece al usuario"
+            continue
+        fila = movimiento.model_dump()
+        fila["usuario_id"] = usuario_id
+        fila["fecha"] = fila["fecha"] or datetime.now()
+        validos.append(indice)
+        filas.append(fila)
+        deltas_cuenta[fila["cuenta_id"]] += saldos.efecto(fila["tipo"], fila["monto"])
+        acumulado = resumenes[(resumen.inicio_de_mes(fila["fecha"]), fila["tipo"], fila["categoria_id"])]
+        acumulado[0] += fila["monto"]
+        acumulado[1] += 1
+
+    if filas:
+        ids = db.scalars(
+            insert(models.Movimiento).returning(models.Movimiento.movimiento_id, sort_by_parameter_order=True),
+            filas
+        ).all()
+        for indice, movimiento_id in zip(validos, ids):
+            resultados[indice].movimiento_id = movimiento_id
+        for cuenta_id, delta in deltas_cuenta.items():
+            saldos.ajustar_cuenta(db, cuenta_id, delta)
+        for (mes, tipo, categoria_id), (total, cantidad) in resumenes.items():
+            resumen.sumar(db, usuario_id, mes, tipo, categoria_id, total, cantidad)
+        versiones.incrementar(db, usuario_id)
+        db.commit()
+
+    return {"creados": len(filas), "rechazados": len(resultados) - len(filas), "resultados": resultados}
+
+# Exportación completa del historial en streaming (ver exportacion.py)
+@router.get("/exportar")
+def exportar_movimientos(
+    formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+    fecha_desde: Optional[datetime] = None,
+    fecha_hasta: Optional[datetime] = None,
+    cuenta_id: Optional[int] = None,
+    categoria_id: Optional[int] = None,
+    current_user: models.Usuario = Depends(security.get_current_user)
+):
+    filas = exportacion.filas(current_user.usuario_id, fecha_desde, fecha_hasta, cuenta_id, categoria_id)
+    if formato == "ndjson":
+        return StreamingResponse(
+            exportacion.a_ndjson(filas),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": 'attachment; filename="movimientos.ndjson"'},
+        )
+    return StreamingResponse(
+        exportacion.a_csv(filas),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="movimientos.csv"'},
+    )
+
+# Importación de extractos (CSV u OFX, ver importacion.py): se lee en streaming y se inserta por lotes
+@router.post("/importar", response_model=schemas.ImportacionResultado)
+def importar_movimientos(
+    archivo: UploadFile = File(...),
+    cuenta_id: Optional[int] = Form(None),
+    categoria_id: Optional[int] = Form(None),
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(security.get_current_user)
+):
+    if (archivo.filename or "").lower().endswith((".ofx", ".qfx")):
+        if cuenta_id is None:
+            raise HTTPException(status_code=400, detail="Para importar OFX indica cuenta_id")
+        filas = importacion.filas_ofx(archivo.file)
+    else:
+        filas = importacion.filas_csv(archivo.file)
+
+    try:
+        resultado = importacion.importar(db, current_user.usuario_id, filas, cuenta_id, categoria_id)
+    except importacion.ErrorImportacion as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="No se importó ningún movimiento. " + "; ".join(e.errores))
+
+    versiones.incrementar(db, current_user.usuario_id)
+    db.commit()
+    return resultado
+
 @router.put("/{movimiento_id}", response_model=schemas.Movimiento)
 def update_movimiento(
     movimiento_id: int,
@@ -70,10 +394,15 @@ def update_movimiento(
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(security.get_current_user)
 ):
-    existing_movimiento = db.query(models.Movimiento).filter(
+    # FOR UPDATE: dos PUT simultáneos no pueden revertir los mismos valores anteriores
+    consulta = db.query(models.Movimiento).filter(
         models.Movimiento.movimiento_id == movimiento_id,
         models.Movimiento.usuario_id == current_user.usuario_id
-    ).first()
+    ).with_for_update()
+    existing_movimiento = consulta.first()
+    # Un movimiento archivado vuelve a la tabla caliente antes de editarlo
+    if not existing_movimiento and archivado.restaurar(db, current_user.usuario_id, movimiento_id):
+        existing_movimiento = consulta.first()
 
     if not existing_movimiento:
         raise HTTPException(status_code=404, detail="Movimiento no encontrado")
@@ -84,14 +413,14 @@ def update_movimiento(
         raise HTTPException(status_code=400, detail="No se puede cambiar el tipo de un abono a meta")
 
     old_monto = existing_movimiento.monto
-    old_cuenta = existing_movimiento.cuenta
-
-    if existing_movimiento.tipo.lower() == 'ingreso':
-        old_cuenta.saldo_actual -= old_monto
-    else:
-        old_cuenta.saldo_actual += old_monto
+    old_cuenta_id = existing_movimiento.cuenta_id
+    old_efecto = saldos.efecto(existing_movimiento.tipo, old_monto)
+    resumen.aplicar(db, existing_movimiento, -1)
 
-    for field, value in movimiento.model_dump(exclude_unset=True).items():
+    cambios = movimiento.model_dump(exclude_unset=True)
+    if cambios.get("fecha") is None:
+        cambios.pop("fecha", None) # Un movimiento siempre conserva su fecha
+    for field, value in cambios.items():
         setattr(existing_movimiento, field, value)
     
     new_cuenta = db.query(models.Cuenta).filter(
@@ -101,16 +430,16 @@ def update_movimiento(
     if not new_cuenta:
         raise HTTPException(status_code=404, detail="Nueva cuenta no encontrada o no pertenece al usuario")
 
-    if existing_movimiento.tipo.lower() == 'ingreso':
-        new_cuenta.saldo_actual += existing_movimiento.monto
-    else:
-        new_cuenta.saldo_actual -= existing_movimiento.monto
+    db.flush()
+    resumen.aplicar(db, existing_movimiento)
+
+    # Revierte el efecto anterior y aplica el nuevo, cada uno como UPDATE atómico
+    saldos.ajustar_cuenta(db, old_cuenta_id, -old_efecto)
+    saldos.ajustar_cuenta(db, new_cuenta.cuenta_id, saldos.efecto(existing_movimiento.tipo, existing_movimiento.monto))
     
     if link_meta:
-        meta = db.query(models.Meta).filter(models.Meta.meta_id == link_meta.meta_id).first()
-        if meta:
-            diferencia = existing_movimiento.monto - old_monto
-            meta.monto_actual += diferencia
+        saldos.ajustar_meta(db, link_meta.meta_id, existing_movimiento.monto - old_monto)
+    versiones.incrementar(db, current_user.usuario_id)
 
     db.commit()
     db.refresh(existing_movimiento)
@@ -124,26 +453,23 @@ def update_movimiento(
 
 @router.delete("/{movimiento_id}")
 def delete_movimiento(movimiento_id: int, db: Session = Depends(get_db), current_user: models.Usuario = Depends(security.get_current_user)):
-    movimiento = db.query(models.Movimiento).filter(models.Movimiento.movimiento_id == movimiento_id, models.Movimiento.usuario_id == current_user.usuario_id).first()
+    consulta = db.query(models.Movimiento).filter(models.Movimiento.movimiento_id == movimiento_id, models.Movimiento.usuario_id == current_user.usuario_id).with_for_update()
+    movimiento = consulta.first()
+    if not movimiento and archivado.restaurar(db, current_user.usuario_id, movimiento_id):
+        movimiento = consulta.first()
     if not movimiento:
         raise HTTPException(status_code=404, detail="Movimiento no encontrado")
 
     link_meta = db.query(models.MovimientoMeta).filter(models.MovimientoMeta.movimiento_id == movimiento_id).first()
 
     if link_meta:
-        meta = db.query(models.Meta).filter(models.Meta.meta_id == link_meta.meta_id).first()
-        if meta:
-            meta.monto_actual -= movimiento.monto
-            if meta.monto_actual < 0:
-                meta.monto_actual = 0
+        saldos.ajustar_meta(db, link_meta.meta_id, -movimiento.monto)
         db.delete(link_meta)
 
-    cuenta = movimiento.cuenta
-    if movimiento.tipo.lower() == 'ingreso':
-        cuenta.saldo_actual -= movimiento.monto
-    else:
-        cuenta.saldo_actual += movimiento.monto
+    saldos.ajustar_cuenta(db, movimiento.cuenta_id, -saldos.efecto(movimiento.tipo, movimiento.monto))
 
+    resumen.aplicar(db, movimiento, -1)
     db.delete(movimiento)
+    versiones.incrementar(db, current_user.usuario_id)
     db.commit()
     return {"message": "Movimiento eliminado exitosamente"}
@@ -0,0 +1,172 @@
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Response, UploadFile, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+import models, schemas, security, trabajos
+from database import get_db
+
+# Operaciones largas en segundo plano (ver trabajos.py): cada POST guarda el trabajo, responde
+# 202 con su estado y la cabecera Location, y el cliente consulta GET /jobs/{id}.
+# El estado se lee siempre de la primaria (get_db): en la réplica llegaría con retraso.
+router = APIRouter(prefix="/jobs", tags=["trabajos"])
+
+LIMITE_LISTADO = 20
+
+def _encolar(db: Session, response: Response, usuario_id: int, tipo: str, parametros: Optional[dict] = None):
+    try:
+        trabajo = trabajos.encolar(db, usuario_id, tipo, parametros)
+    except trabajos.ColaLlena:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Hay demasiados trabajos en cola, intenta de nuevo en unos minutos",
+            headers={"Retry-After": "30"},
+        )
+    response.headers["Location"] = f"{router.prefix}/{trabajo.trabajo_id}"
+    return _estado(db, trabajo)
+
+def _unico(db: Session, response: Response, usuario_id: int, tipo: str):
+    # Regenerar dos veces lo mismo a la vez no aporta nada: se devuelve el trabajo que ya está activo
+    trabajo = trabajos.activo(db, usuario_id, tipo)
+    if trabajo is not None and not trabajos.abandonado(trabajo):
+        response.headers["Location"] = f"{router.prefix}/{trabajo.trabajo_id}"
+        return _estado(db, trabajo)
+    return _encolar(db, response, usuario_id, tipo)
+
+def _estado(db: Session, trabajo: models.Trabajo) -> schemas.Trabajo:
+    if trabajos.abandonado(trabajo):
+        trabajo.estado = "fallido"
+        trabajo.error = "El trabajo se interrumpió (el servidor se detuvo antes de terminarlo)"
+        trabajo.fecha_fin = trabajo.fecha_actualizacion = trabajos.ahora()
+        db.commit()
+    estado = schemas.Trabajo.model_validate(trabajo)
+    # Si lo ejecuta este proceso, el progreso en memoria es el más reciente (en SQLite, el único)
+    en_memoria = trabajos.en_memoria(trabajo.trabajo_id)
+    if en_memoria and trabajo.estado in trabajos.ACTIVOS:
+        estado = estado.model_copy(update=en_memoria)
+    return estado
+
+def _trabajo_del_usuario(db: Session, usuario_id: int, trabajo_id: int) -> models.Trabajo:
+    trabajo = db.query(models.Trabajo).filter(
+        models.Trabajo.trabajo_id == trabajo_id, models.Trabajo.usuario_id == usuario_id
+    ).first()
+    if not trabajo:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return trabajo
+
+@router.post("/resumen", response_model=schemas.Trabajo, status_code=status.HTTP_202_ACCEPTED)
+def regenerar_resumen(
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(security.get_current_user)
+):
+    return _unico(db, response, current_user.usuario_id, "resumen")
+
+@router.post("/saldos", response_model=schemas.Trabajo, status_code=status.HTTP_202_ACCEPTED)
+def recalcular_saldos(
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(security.get_current_user)
+):
+    return _unico(db, response, current_user.usuario_id, "saldos")
+
+@router.post("/importacion", response_model=schemas.Trabajo, status_code=status.HTTP_202_ACCEPTED)
+def importar_movimientos(
+    response: Response,
+    archivo: UploadFile = File(...),
+    cuenta_id: Optional[int] = Form(None),
+    categoria_id: Optional[int] = Form(None),
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(security.get_current_user)
+):
+    nombre = archivo.filename or ""
+    if nombre.lower().endswith((".ofx", ".qfx")) and cuenta_id is None:
+        raise HTTPException(status_code=400, detail="Para importar OFX indica cuenta_id")
+
+    # El archivo subido desaparece al terminar la petición: el trabajo lee una copia (y la borra)
+    ruta = trabajos.ruta_archivo(f"importacion-{uuid.uuid4().hex}")
+    with open(ruta, "wb") as copia:
+        shutil.copyfileobj(archivo.file, copia)
+    parametros = {"archivo": ruta, "nombre": nombre, "cuenta_id": cuenta_id, "categoria_id": categoria_id}
+    try:
+        return _encolar(db, response, current_user.usuario_id, "importacion", parametros)
+    except HTTPException:
+        os.remove(ruta)
+        raise
+
+@router.post("/exportacion", response_model=schemas.Trabajo, status_code=status.HTTP_202_ACCEPTED)
+def exportar_movimientos(
+    response: Response,
+    formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+    fecha_desde: Optional[datetime] = None,
+    fecha_hasta: Optional[datetime] = None,
+    cuenta_id: Optional[int] = None,
+    categoria_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(security.get_current_user)
+):
+    parametros = {
+        "archivo": trabajos.ruta_archivo(f"exportacion-{uuid.uuid4().hex}.{formato}"),
+        "formato": formato,
+        "fecha_desde": fecha_desde.isoformat() if fecha_desde else None,
+        "fecha_hasta": fecha_hasta.isoformat() if fecha_hasta else None,
+        "cuenta_id": cuenta_id,
+        "categoria_id": categoria_id,
+    }
+    return _encolar(db, response, current_user.usuario_id, "exportacion", parametros)
+
+@router.post("/eliminar-meta/{meta_id}", response_model=schemas.Trabajo, status_code=status.HTTP_202_ACCEPTED)
+def eliminar_meta(
+    meta_id: int,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(security.get_current_user)
+):
+    meta = db.query(models.Meta.meta_id).filter(models.Meta.meta_id == meta_id, models.Meta.usuario_id == current_user.usuario_id).first()
+    if not meta:
+        raise HTTPException(status_code=404, detail="Meta no encontrada")
+    return _encolar(db, response, current_user.usuario_id, "eliminar_meta", {"meta_id": meta_id})
+
+@router.get("", response_model=List[schemas.Trabajo])
+def obtener_trabajos(
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(security.get_current_user)
+):
+    recientes = db.query(models.Trabajo).filter(
+        models.Trabajo.usuario_id == current_user.usuario_id
+    ).order_by(models.Trabajo.fecha_creacion.desc(), models.Trabajo.trabajo_id.desc()).limit(LIMITE_LISTADO).all()
+    return [_estado(db, trabajo) for trabajo in recientes]
+
+@router.get("/{trabajo_id}", response_model=schemas.Trabajo)
+def obtener_trabajo(
+    trabajo_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(security.get_current_user)
+):
+    return _estado(db, _trabajo_del_usuario(db, current_user.usuario_id, trabajo_id))
+
+@router.get("/{trabajo_id}/archivo")
+def descargar_archivo(
+    trabajo_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(security.get_current_user)
+):
+    trabajo = _trabajo_del_usuario(db, current_user.usuario_id, trabajo_id)
+    if trabajo.tipo != "exportacion":
+        raise HTTPException(status_code=404, detail="Este trabajo no genera un archivo")
+    if trabajo.estado != "completado":
+        raise HTTPException(status_code=409, detail="La exportación todavía no ha terminado")
+    formato = trabajo.parametros["formato"]
+    ruta = trabajo.parametros["archivo"]
+    if not os.path.exists(ruta):
+        raise HTTPException(status_code=410, detail="El archivo de la exportación ya no está disponible")
+    return FileResponse(
+        ruta,
+        media_type="application/x-ndjson" if formato == "ndjson" else "text/csv; charset=utf-8",
+        filename=f"movimientos.{formato}",
+    )
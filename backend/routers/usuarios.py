@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from database import get_db
 import schemas, models, security
@@ -29,21 +30,32 @@ def update_profile(
     if existing_user and existing_user.usuario_id != current_user.usuario_id:
         raise HTTPException(status_code=400, detail="Email ya registrado")
     
-    current_user.nombre = user_update.nombre
-    current_user.email = user_update.email
+    # current_user puede venir de la caché (desligado de la sesión): se modifica la fila real
+    usuario = db.get(models.Usuario, current_user.usuario_id)
+    usuario.nombre = user_update.nombre
+    usuario.email = user_update.email
     db.commit()
-    db.refresh(current_user)
-    return current_user
+    db.refresh(usuario)
+    security.cache_usuarios.invalidar(usuario.usuario_id)
+    return usuario
 
 @router.put("/cambiar-password")
-def change_password(
+async def change_password(
     pass_update: PasswordUpdate,
     db: Session = Depends(get_db),
     current_user: models.Usuario = Depends(security.get_current_user)
 ):
-    if not security.verify_password(pass_update.current_password, current_user.contraseña):
+    valida, _ = await security.verify_password_async(pass_update.current_password, current_user.contraseña)
+    if not valida:
         raise HTTPException(status_code=400, detail="Contraseña actual incorrecta")
     
-    current_user.contraseña = security.get_password_hash(pass_update.new_password)
-    db.commit()
+    nuevo_hash = await security.get_password_hash_async(pass_update.new_password)
+
+    def guardar():
+        usuario = db.get(models.Usuario, current_user.usuario_id)
+        usuario.contraseña = nuevo_hash
+        db.commit()
+
+    await run_in_threadpool(guardar)
+    security.cache_usuarios.invalidar(current_user.usuario_id)
     return {"message": "Contraseña actualizada correctamente"}
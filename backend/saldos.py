@@ -0,0 +1,95 @@
+"""Actualizaciones atómicas de Cuenta.saldo_actual y Meta.monto_actual.
+
+Leer el saldo en Python, sumarle y escribirlo de vuelta pierde actualizaciones cuando dos
+peticiones tocan la misma cuenta a la vez. Aquí cada ajuste es una sola sentencia
+``UPDATE ... SET saldo_actual = saldo_actual + :delta``, que la base de datos serializa.
+
+``recalcular`` es la red de seguridad: vuelve a calcular los acumulados desde los movimientos
+(se ejecuta como trabajo en segundo plano, ver trabajos.py).
+"""
+from decimal import Decimal
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.orm import Session
+import archivado
+import models
+
+
+def ajustar_cuenta(db: Session, cuenta_id: int, delta: Decimal):
+    db.execute(
+        update(models.Cuenta)
+        .where(models.Cuenta.cuenta_id == cuenta_id)
+        .values(saldo_actual=models.Cuenta.saldo_actual + delta)
+    )
+
+
+def descontar_cuenta(db: Session, cuenta_id: int, monto: Decimal) -> bool:
+    """Resta ``monto`` solo si hay saldo suficiente; la comprobación va en la misma sentencia.
+
+    Devuelve False (sin tocar nada) si el saldo no alcanza.
+    """
+    resultado = db.execute(
+        update(models.Cuenta)
+        .where(models.Cuenta.cuenta_id == cuenta_id, models.Cuenta.saldo_actual >= monto)
+        .values(saldo_actual=models.Cuenta.saldo_actual - monto)
+    )
+    return resultado.rowcount == 1
+
+
+def ajustar_meta(db: Session, meta_id: int, delta: Decimal):
+    # Nunca por debajo de cero (al borrar un abono de una meta ya reducida)
+    nuevo = models.Meta.monto_actual + delta
+    db.execute(
+        update(models.Meta)
+        .where(models.Meta.meta_id == meta_id)
+        .values(monto_actual=case((nuevo < 0, 0), else_=nuevo))
+    )
+
+
+def efecto(tipo: str, monto: Decimal) -> Decimal:
+    """Cuánto cambia el saldo de la cuenta un movimiento de este tipo."""
+    return monto if tipo == "Ingreso" else -monto
+
+
+def _corregir(db: Session, tabla, clave, columna, valores: dict, calculados: dict) -> int:
+    cambios = [
+        {"b_id": id_, "b_valor": calculados.get(id_, Decimal(0))}
+        for id_, actual in valores.items()
+        if (actual or 0) != calculados.get(id_, Decimal(0))
+    ]
+    if cambios:
+        db.execute(update(tabla).where(clave == bindparam("b_id")).values({columna: bindparam("b_valor")}), cambios)
+    return len(cambios)
+
+
+def recalcular(db: Session, usuario_id: int) -> dict:
+    """Recalcula los saldos de las cuentas y lo abonado a las metas del usuario desde los
+    movimientos (también los archivados). Devuelve cuántas filas corrigió. No hace commit."""
+    cuentas = dict(db.execute(
+        select(models.Cuenta.cuenta_id, models.Cuenta.saldo_actual).where(models.Cuenta.usuario_id == usuario_id)
+    ).all())
+    m = archivado.movimientos(archivado.corte(db) is not None).c
+    saldos = dict(db.execute(
+        select(m.cuenta_id, func.sum(case((m.tipo == "Ingreso", m.monto), else_=-m.monto)))
+        .where(m.usuario_id == usuario_id)
+        .group_by(m.cuenta_id)
+    ).all())
+
+    metas = dict(db.execute(
+        select(models.Meta.meta_id, models.Meta.monto_actual).where(models.Meta.usuario_id == usuario_id)
+    ).all())
+    # Lo abonado es el monto actual de los movimientos-abono (editarlos no cambia monto_destinado);
+    # los abonos nunca se archivan
+    abonado = dict(db.execute(
+        select(models.MovimientoMeta.meta_id, func.sum(models.Movimiento.monto))
+        .join(models.Movimiento, models.Movimiento.movimiento_id == models.MovimientoMeta.movimiento_id)
+        .where(models.MovimientoMeta.meta_id.in_(metas))
+        .group_by(models.MovimientoMeta.meta_id)
+    ).all()) if metas else {}
+
+    tabla_cuenta, tabla_meta = models.Cuenta.__table__, models.Meta.__table__
+    return {
+        "cuentas": len(cuentas),
+        "cuentas_corregidas": _corregir(db, tabla_cuenta, tabla_cuenta.c.cuenta_id, "saldo_actual", cuentas, saldos),
+        "metas": len(metas),
+        "metas_corregidas": _corregir(db, tabla_meta, tabla_meta.c.meta_id, "monto_actual", metas, abonado),
+    }
@@ -1,8 +1,15 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
-from datetime import datetime
+from pydantic import BaseModel, BeforeValidator, EmailStr, Field, computed_field
+from typing import Annotated, Literal, Optional, List
+from datetime import date, datetime
 from decimal import Decimal
 
+# --- TIPOS COMPARTIDOS ---
+# Acepta cualquier combinación de mayúsculas ('gasto', 'GASTO') y la guarda como 'Gasto'
+TipoMovimiento = Annotated[
+    Literal["Ingreso", "Gasto"],
+    BeforeValidator(lambda v: v.strip().capitalize() if isinstance(v, str) else v)
+]
+
 # --- SEGURIDAD (JWT) ---
 class Token(BaseModel):
     access_token: str
@@ -44,7 +51,7 @@ class Cuenta(CuentaBase):
 # --- CATEGORIA ---
 class CategoriaBase(BaseModel):
     nombre_categoria: str
-    tipo: str  
+    tipo: TipoMovimiento
 
 class CategoriaCreate(CategoriaBase):
     pass
@@ -57,7 +64,7 @@ class Categoria(CategoriaBase):
 
 # --- MOVIMIENTO ---
 class MovimientoBase(BaseModel):
-    tipo: str 
+    tipo: TipoMovimiento
     monto: Decimal
     descripcion: Optional[str] = None
     fecha: Optional[datetime] = None
@@ -94,8 +101,18 @@ class Meta(MetaBase):
     usuario_id: int
     monto_actual: Decimal
     estado: bool
-    progreso: Optional[float] = 0 
-    movimientos_meta: List["MovimientoMeta"] = [] # New: To support relationships
+    categoria_id: Optional[int] = None
+    # Resumen de los abonos; el detalle se pagina en GET /metas/{meta_id}/abonos
+    cantidad_abonos: int = 0
+    ultimo_abono: Optional[datetime] = None
+
+    @computed_field
+    @property
+    def progreso(self) -> float:
+        # Porcentaje del objetivo alcanzado (puede pasar de 100)
+        if not self.monto_objetivo:
+            return 0.0
+        return round(float(self.monto_actual / self.monto_objetivo * 100), 2)
 
     class Config:
         from_attributes = True
@@ -117,6 +134,30 @@ class MovimientoMeta(MovimientoMetaBase):
     class Config:
         from_attributes = True
 
+# Resultado de GET /movimientos/buscar: mayor relevancia = mejor coincidencia
+class MovimientoBusqueda(Movimiento):
+    relevancia: float
+
+class ImportacionResultado(BaseModel):
+    importados: int
+    cuentas_afectadas: int
+
+# Alta por lotes (sincronización de clientes offline)
+LOTE_MAXIMO = 1000
+
+class MovimientoLote(BaseModel):
+    movimientos: List[MovimientoCreate] = Field(..., min_length=1, max_length=LOTE_MAXIMO)
+
+class ResultadoLoteItem(BaseModel):
+    indice: int # Posición del movimiento en la petición
+    movimiento_id: Optional[int] = None
+    error: Optional[str] = None
+
+class ResultadoLote(BaseModel):
+    creados: int
+    rechazados: int
+    resultados: List[ResultadoLoteItem]
+
 class MetaAbono(BaseModel):
     monto: Decimal
     cuenta_id: int # Nuevo campo requerido para abonar
@@ -127,6 +168,43 @@ class DashboardResumen(BaseModel):
     total_gastos: Decimal
     saldo_total: Decimal
 
+class PuntoSerie(BaseModel):
+    periodo: date # Inicio del día, semana (lunes) o mes
+    ingresos: Decimal
+    gastos: Decimal
+
+class TotalCategoria(BaseModel):
+    categoria_id: int
+    nombre_categoria: str
+    tipo: TipoMovimiento
+    total: Decimal
+    cantidad: int
+
+# --- TRABAJOS EN SEGUNDO PLANO ---
+class Trabajo(BaseModel):
+    trabajo_id: int
+    tipo: str
+    estado: Literal["pendiente", "en_curso", "completado", "fallido"]
+    procesados: int = 0
+    total: Optional[int] = None # None si no se conoce de antemano (p. ej. filas de una importación)
+    resultado: Optional[dict] = None
+    error: Optional[str] = None
+    fecha_creacion: datetime # UTC
+    fecha_inicio: Optional[datetime] = None
+    fecha_fin: Optional[datetime] = None
+
+    @computed_field
+    @property
+    def porcentaje(self) -> Optional[float]:
+        if self.estado == "completado":
+            return 100.0
+        if not self.total:
+            return None
+        return round(min(self.procesados / self.total, 1) * 100, 2)
+
+    class Config:
+        from_attributes = True
+
 # Update forward refs
 Movimiento.model_rebuild()
-Meta.model_rebuild()
+MovimientoBusqueda.model_rebuild()
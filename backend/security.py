@@ -1,33 +1,108 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import threading
+import time
 import os
-from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, get_async_db
 import models
+import hashing
 
-# Cargamos las variables del .env
-load_dotenv()
+# Las variables del .env ya las cargó database.py
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES") or 30)
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS") or 60) # 0 desactiva la caché
+USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE") or 1024)
 
-# Configuración de bcrypt (el algoritmo de encriptación estándar)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-# Función 1: Verificar si la contraseña plana coincide con el hash guardado
+# Caché LRU con TTL de usuarios autenticados (evita el SELECT por email en cada petición).
+# Guarda solo los valores de las columnas; cada petición recibe su propia copia desligada
+# de la sesión, así que los endpoints que modifican el usuario deben cargarlo con su sesión
+# y llamar a cache_usuarios.invalidar().
+class CacheUsuarios:
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave: str):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None or entrada[0] < time.monotonic():
+                if entrada is not None:
+                    del self._datos[clave]
+                self.misses += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.hits += 1
+            return models.Usuario(**entrada[1])
+
+    def guardar(self, clave: str, usuario: models.Usuario):
+        if self.ttl <= 0:
+            return
+        valores = {col.key: getattr(usuario, col.key) for col in models.Usuario.__table__.columns}
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, valores)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, usuario_id: int):
+        with self._lock:
+            for clave in [c for c, (_, valores) in self._datos.items() if valores["usuario_id"] == usuario_id]:
+                del self._datos[clave]
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "entradas": len(self._datos),
+            }
+
+cache_usuarios = CacheUsuarios(USER_CACHE_TTL_SECONDS, USER_CACHE_MAXSIZE)
+
+# Función 1: Verificar si la contraseña plana coincide con el hash guardado (bcrypt, ver hashing.py)
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return hashing.verificar(plain_password, hashed_password)[0]
 
 # Función 2: Generar el hash de una contraseña nueva
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return hashing.hashear(password)
+
+# Versiones para los endpoints: el trabajo de bcrypt va al pool de procesos de hashing.py.
+# verify_password_async devuelve (válida, hash_nuevo); hash_nuevo indica que hay que regenerarlo.
+async def verify_password_async(plain_password, hashed_password):
+    try:
+        return await hashing.verificar_async(plain_password, hashed_password)
+    except hashing.ColaLlena:
+        raise _servicio_ocupado()
+
+async def get_password_hash_async(password):
+    try:
+        return await hashing.hashear_async(password)
+    except hashing.ColaLlena:
+        raise _servicio_ocupado()
+
+def _servicio_ocupado():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servidor ocupado, intenta de nuevo en unos segundos",
+        headers={"Retry-After": "1"},
+    )
 
 # Función 3: Crear el Token JWT (La credencial temporal)
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -40,26 +115,56 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     # Agregamos la fecha de expiración al token
     to_encode.update({"exp": expire})
     
-    # Firmamos el token con nuestra llave secreta
+    # Firmamos el token con nuestra llave secreta (jose se importa aquí: tarda en cargar y
+    # no hace falta hasta la primera petición autenticada)
+    from jose import jwt
+
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 # Función 4: Obtener el usuario actual desde el token
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="No se pudo validar las credenciales",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def _email_del_token(token: str) -> str:
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
+            raise _credenciales_invalidas()
     except JWTError:
-        raise credentials_exception
-        
+        raise _credenciales_invalidas()
+    return username
+
+def _credenciales_invalidas():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="No se pudo validar las credenciales",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    username = _email_del_token(token)
+
+    user = cache_usuarios.obtener(username)
+    if user is not None:
+        return user
+
     user = db.query(models.Usuario).filter(models.Usuario.email == username).first()
     if user is None:
-        raise credentials_exception
+        raise _credenciales_invalidas()
+    cache_usuarios.guardar(username, user)
+    return user
+
+# Igual que get_current_user, para los endpoints async (DB_ASYNC=1)
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    username = _email_del_token(token)
+
+    user = cache_usuarios.obtener(username)
+    if user is not None:
+        return user
+
+    user = (await db.execute(select(models.Usuario).where(models.Usuario.email == username))).scalars().first()
+    if user is None:
+        raise _credenciales_invalidas()
+    cache_usuarios.guardar(username, user)
     return user
@@ -0,0 +1,54 @@
+"""Configuración común de las pruebas: una base SQLite temporal y la API con TestClient.
+
+Las variables se fijan antes de importar main (database.py las lee al importarse) y pisan las
+del .env, para que las pruebas nunca toquen la base de desarrollo.
+"""
+import itertools
+import os
+import tempfile
+
+import pytest
+
+_directorio = tempfile.mkdtemp(prefix="gastos-pruebas-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_directorio, 'pruebas.db')}?timeout=30",
+    "REPLICA_DATABASE_URL": "",
+    "DB_ASYNC": "",
+    "SECRET_KEY": "pruebas-" + "x" * 32,
+    "ALGORITHM": "HS256",
+    "BCRYPT_ROUNDS": "4",
+    "TRABAJOS_DIR": os.path.join(_directorio, "trabajos"),
+})
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+_usuarios = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def cliente():
+    with TestClient(main.app) as cliente:  # el lifespan aplica las migraciones
+        yield cliente
+
+
+@pytest.fixture
+def usuario(cliente):
+    """Usuario nuevo por prueba, con una cuenta con saldo y una categoría de cada tipo."""
+    email = f"usuario{next(_usuarios)}@pruebas.com"
+    r = cliente.post("/usuarios/", json={"nombre": "Prueba", "email": email, "contraseña": "clave"})
+    assert r.status_code == 200, r.text
+    r = cliente.post("/token", data={"username": email, "password": "clave"})
+    assert r.status_code == 200, r.text
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    r = cliente.post("/cuentas/", json={"nombre_cuenta": "Banco", "saldo_inicial": 100000}, headers=headers)
+    assert r.status_code == 200, r.text
+    cuenta_id = r.json()["cuenta_id"]
+    categorias = {}
+    for tipo in ("Ingreso", "Gasto"):
+        r = cliente.post("/categorias/", json={"nombre_categoria": tipo, "tipo": tipo}, headers=headers)
+        assert r.status_code == 200, r.text
+        categorias[tipo] = r.json()["categoria_id"]
+    return {"headers": headers, "cuenta_id": cuenta_id, "categorias": categorias}
@@ -0,0 +1,83 @@
+"""Escrituras simultáneas sobre la misma cuenta, meta y movimiento no pierden actualizaciones."""
+import random
+import threading
+from decimal import Decimal
+
+
+def _en_paralelo(*tareas):
+    errores = []
+
+    def ejecutar(tarea):
+        try:
+            tarea()
+        except Exception as e:  # se comprueba al final, en el hilo de la prueba
+            errores.append(e)
+
+    hilos = [threading.Thread(target=ejecutar, args=(tarea,)) for tarea in tareas]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert not errores, errores
+
+
+def _editor(cliente, headers, movimiento_id: int, datos: dict, montos: range):
+    def editar():
+        azar = random.Random()
+        for _ in range(10):
+            r = cliente.put(f"/movimientos/{movimiento_id}", json={**datos, "monto": azar.choice(montos)}, headers=headers)
+            assert r.status_code == 200, r.text
+    return editar
+
+
+def test_abonos_y_ediciones_simultaneas(cliente, usuario):
+    headers, cuenta_id = usuario["headers"], usuario["cuenta_id"]
+
+    editado = {"tipo": "Gasto", "cuenta_id": cuenta_id, "categoria_id": usuario["categorias"]["Gasto"]}
+    r = cliente.post("/movimientos/", json={**editado, "monto": 10}, headers=headers)
+    assert r.status_code == 200, r.text
+    movimiento_id = r.json()["movimiento_id"]
+
+    r = cliente.post("/metas", json={"nombre_meta": "Viaje", "monto_objetivo": 100000}, headers=headers)
+    assert r.status_code == 200, r.text
+    meta_id = r.json()["meta_id"]
+    r = cliente.post(f"/metas/{meta_id}/abonar", json={"monto": 5, "cuenta_id": cuenta_id}, headers=headers)
+    assert r.status_code == 200, r.text
+    abono_id = cliente.get(f"/metas/{meta_id}/abonos", headers=headers).json()[0]["movimiento_id"]
+    abono = next(m for m in cliente.get("/movimientos/", headers=headers).json() if m["movimiento_id"] == abono_id)
+    abono_editado = {"tipo": "Gasto", "cuenta_id": cuenta_id, "categoria_id": abono["categoria_id"]}
+
+    def abonar():
+        for _ in range(10):
+            r = cliente.post(f"/metas/{meta_id}/abonar", json={"monto": 7, "cuenta_id": cuenta_id}, headers=headers)
+            assert r.status_code == 200, r.text
+
+    _en_paralelo(
+        abonar, abonar,
+        # Dos editores del mismo movimiento: cada PUT revierte el monto anterior
+        _editor(cliente, headers, movimiento_id, editado, range(1, 500)),
+        _editor(cliente, headers, movimiento_id, editado, range(1, 500)),
+        # Y del mismo abono, que además mueve el total de la meta
+        _editor(cliente, headers, abono_id, abono_editado, range(1, 50)),
+        _editor(cliente, headers, abono_id, abono_editado, range(1, 50)),
+    )
+
+    r = cliente.get("/movimientos/", params={"limit": 500}, headers=headers)
+    assert r.status_code == 200, r.text
+    movimientos = r.json()
+    assert len(movimientos) == 1 + 1 + 1 + 20  # saldo inicial, editado, primer abono y 20 abonos
+
+    def total(tipo):
+        return sum(Decimal(m["monto"]) for m in movimientos if m["tipo"] == tipo)
+
+    cuenta = next(c for c in cliente.get("/cuentas/", headers=headers).json() if c["cuenta_id"] == cuenta_id)
+    assert Decimal(cuenta["saldo_actual"]) == total("Ingreso") - total("Gasto")
+
+    abonos = {a["movimiento_id"] for a in cliente.get(f"/metas/{meta_id}/abonos", params={"limit": 500}, headers=headers).json()}
+    meta = next(m for m in cliente.get("/metas", headers=headers).json() if m["meta_id"] == meta_id)
+    assert len(abonos) == 21
+    assert Decimal(meta["monto_actual"]) == sum(Decimal(m["monto"]) for m in movimientos if m["movimiento_id"] in abonos)
+
+    resumen = cliente.get("/dashboard/", headers=headers).json()
+    assert Decimal(resumen["total_ingresos"]) == total("Ingreso")
+    assert Decimal(resumen["total_gastos"]) == total("Gasto")
@@ -0,0 +1,63 @@
+"""Los listados se cargan con un número fijo de sentencias SQL, sin N+1 al crecer los datos."""
+import contextlib
+
+import pytest
+from sqlalchemy import event
+
+from database import engine
+
+LISTADOS = ["/movimientos/", "/metas", "/cuentas/", "/categorias/"]
+
+
+@contextlib.contextmanager
+def contar_sentencias():
+    sentencias = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(engine, "before_cursor_execute", registrar)
+    try:
+        yield sentencias
+    finally:
+        event.remove(engine, "before_cursor_execute", registrar)
+
+
+def medir(cliente, usuario, ruta):
+    # La primera petición llena la caché del usuario (security.py); se mide la segunda
+    assert cliente.get(ruta, headers=usuario["headers"]).status_code == 200
+    with contar_sentencias() as sentencias:
+        r = cliente.get(ruta, headers=usuario["headers"])
+    assert r.status_code == 200, r.text
+    return len(sentencias), len(r.json())
+
+
+def agregar_datos(cliente, usuario, movimientos: int, metas: int, abonos_por_meta: int):
+    headers, cuenta_id = usuario["headers"], usuario["cuenta_id"]
+    lote = [
+        {"tipo": "Gasto", "monto": 10, "cuenta_id": cuenta_id,
+         "categoria_id": usuario["categorias"]["Gasto"], "descripcion": f"gasto {i}"}
+        for i in range(movimientos)
+    ]
+    r = cliente.post("/movimientos/batch", json={"movimientos": lote}, headers=headers)
+    assert r.status_code == 200, r.text
+    for i in range(metas):
+        r = cliente.post("/metas", json={"nombre_meta": f"Meta {i}", "monto_objetivo": 1000}, headers=headers)
+        assert r.status_code == 200, r.text
+        meta_id = r.json()["meta_id"]
+        for _ in range(abonos_por_meta):
+            r = cliente.post(f"/metas/{meta_id}/abonar", json={"monto": 5, "cuenta_id": cuenta_id}, headers=headers)
+            assert r.status_code == 200, r.text
+
+
+@pytest.mark.parametrize("ruta", LISTADOS)
+def test_sentencias_constantes_al_crecer(cliente, usuario, ruta):
+    agregar_datos(cliente, usuario, movimientos=2, metas=1, abonos_por_meta=1)
+    sentencias_antes, filas_antes = medir(cliente, usuario, ruta)
+
+    agregar_datos(cliente, usuario, movimientos=40, metas=6, abonos_por_meta=3)
+    sentencias_despues, filas_despues = medir(cliente, usuario, ruta)
+
+    if ruta in ("/movimientos/", "/metas"):
+        assert filas_despues > filas_antes
+    assert sentencias_despues == sentencias_antes
@@ -0,0 +1,21 @@
+"""Series y totales por categoría de /dashboard."""
+
+
+def test_series_sin_meses_vacios(cliente, usuario):
+    headers = usuario["headers"]
+    datos = {"tipo": "Gasto", "monto": 10, "cuenta_id": usuario["cuenta_id"], "categoria_id": usuario["categorias"]["Gasto"]}
+    r = cliente.post("/movimientos/", json={**datos, "fecha": "2024-03-10T10:00:00"}, headers=headers)
+    assert r.status_code == 200, r.text
+    marzo = r.json()["movimiento_id"]
+    r = cliente.post("/movimientos/", json={**datos, "fecha": "2024-05-10T10:00:00"}, headers=headers)
+    assert r.status_code == 200, r.text
+    periodos = [p["periodo"] for p in cliente.get("/dashboard/series", headers=headers).json()]
+    assert "2024-03-01" in periodos and "2024-05-01" in periodos
+
+    # Al borrar el único movimiento de marzo, su fila del resumen queda con cantidad 0
+    assert cliente.delete(f"/movimientos/{marzo}", headers=headers).status_code == 200
+    periodos = [p["periodo"] for p in cliente.get("/dashboard/series", headers=headers).json()]
+    assert "2024-03-01" not in periodos and "2024-05-01" in periodos
+
+    categorias = cliente.get("/dashboard/categorias", params={"tipo": "Gasto"}, headers=headers).json()
+    assert [c["cantidad"] for c in categorias] == [1]
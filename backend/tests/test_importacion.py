@@ -0,0 +1,86 @@
+"""Lectura de extractos CSV y OFX: codificación, comillas y montos."""
+import io
+from decimal import Decimal
+
+import importacion
+from importacion import TAMAÑO_SONDEO
+
+
+def _csv_con_texto_en(posicion: int, texto: str) -> bytes:
+    inicio = "fecha,monto,descripcion\n2024-01-02,5,".encode()
+    return inicio + b"a" * (posicion - len(inicio)) + texto.encode("utf-8") + b"\n"
+
+
+def test_utf8_con_caracter_partido_en_el_limite_del_sondeo():
+    # "ó" ocupa dos bytes: el primero es el último del sondeo y el segundo queda fuera
+    datos = _csv_con_texto_en(TAMAÑO_SONDEO - 4, "Depósito")
+    assert datos.index("ó".encode()) == TAMAÑO_SONDEO - 1
+
+    [(_, fila)] = list(importacion.filas_csv(io.BytesIO(datos)))
+    assert fila["descripcion"].endswith("Depósito")
+
+
+def test_latin1():
+    datos = "fecha,monto,descripcion\n2024-01-02,5,Depósito\n".encode("latin-1")
+    [(_, fila)] = list(importacion.filas_csv(io.BytesIO(datos)))
+    assert fila["descripcion"] == "Depósito"
+
+
+def test_monto_punto_de_miles():
+    assert importacion._monto("45.000") == Decimal("45000")
+    assert importacion._monto("1.500") == Decimal("1500")
+    assert importacion._monto("-45.000") == Decimal("-45000")
+    assert importacion._monto("$ 1.234.567") == Decimal("1234567")
+
+
+def test_monto_punto_decimal():
+    assert importacion._monto("45.10") == Decimal("45.10")
+    assert importacion._monto("45.1") == Decimal("45.1")
+    assert importacion._monto("1,234.56") == Decimal("1234.56")
+    assert importacion._monto("1.234,56") == Decimal("1234.56")
+
+
+def test_monto_coma():
+    assert importacion._monto("1,234") == Decimal("1234")
+    assert importacion._monto("45,10") == Decimal("45.10")
+
+
+def test_salto_de_linea_entre_comillas():
+    datos = (
+        'fecha;monto;descripcion\r\n'
+        '2024-01-02;-45.000;"Compra\r\nnota del banco"\r\n'
+        '2024-01-03;100;Depósito\r\n'
+    ).encode()
+    filas = list(importacion.filas_csv(io.BytesIO(datos)))
+    assert [fila["descripcion"] for _, fila in filas] == ["Compra\r\nnota del banco", "Depósito"]
+    assert [numero for numero, _ in filas] == [2, 3]
+
+
+def test_ofx():
+    datos = b"""OFXHEADER:100\r\n<OFX><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240105<TRNAMT>-12.50<NAME>Tienda<MEMO>Caf\xe9</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240106120000<TRNAMT>300<NAME>Nomina</STMTTRN>
+</BANKTRANLIST></OFX>"""
+    filas = [fila for _, fila in importacion.filas_ofx(io.BytesIO(datos))]
+    assert filas[0] == {"fecha": "20240105", "monto": "-12.50", "descripcion": "Tienda - Café"}
+    assert filas[1]["monto"] == "300"
+
+
+def test_importar_por_la_api(cliente, usuario):
+    datos = (
+        "fecha;monto;descripcion;categoria\n"
+        '2024-01-02;-45.000;"Compra\nen dos líneas";Mercado\n'
+        "2024-01-03;1.500;Depósito;Nómina\n"
+    ).encode()
+    r = cliente.post(
+        "/movimientos/importar",
+        data={"cuenta_id": usuario["cuenta_id"]},
+        files={"archivo": ("extracto.csv", datos, "text/csv")},
+        headers=usuario["headers"],
+    )
+    assert r.status_code == 200, r.text
+    assert r.json()["importados"] == 2
+
+    importados = {m["descripcion"]: m for m in cliente.get("/movimientos/", headers=usuario["headers"]).json()}
+    assert Decimal(importados["Compra\nen dos líneas"]["monto"]) == Decimal("45000")
+    assert importados["Depósito"]["nombre_categoria"] == "Nómina"
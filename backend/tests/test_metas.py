@@ -0,0 +1,24 @@
+"""Metas y su categoría enlazada."""
+
+
+def test_renombrar_meta_renombra_su_categoria(cliente, usuario):
+    headers = usuario["headers"]
+    r = cliente.post("/metas", json={"nombre_meta": "Viaje", "monto_objetivo": 1000}, headers=headers)
+    assert r.status_code == 200, r.text
+    meta_id, fecha_fin = r.json()["meta_id"], r.json()["fecha_fin"]
+    r = cliente.post(f"/metas/{meta_id}/abonar", json={"monto": 10, "cuenta_id": usuario["cuenta_id"]}, headers=headers)
+    assert r.status_code == 200, r.text
+    assert "Meta: Viaje" in [c["nombre_categoria"] for c in cliente.get("/categorias/", headers=headers).json()]
+
+    r = cliente.put(f"/metas/{meta_id}", json={"nombre_meta": "Vacaciones", "monto_objetivo": 1000, "fecha_fin": fecha_fin}, headers=headers)
+    assert r.status_code == 200, r.text
+
+    nombres = [c["nombre_categoria"] for c in cliente.get("/categorias/", headers=headers).json()]
+    assert "Meta: Vacaciones" in nombres and "Meta: Viaje" not in nombres
+    abonos = [m for m in cliente.get("/movimientos/", headers=headers).json() if m["nombre_categoria"].startswith("Meta:")]
+    assert [m["nombre_categoria"] for m in abonos] == ["Meta: Vacaciones"]
+    # Los abonos siguientes usan la misma categoría, sin crear otra
+    r = cliente.post(f"/metas/{meta_id}/abonar", json={"monto": 10, "cuenta_id": usuario["cuenta_id"]}, headers=headers)
+    assert r.status_code == 200, r.text
+    nombres = [c["nombre_categoria"] for c in cliente.get("/categorias/", headers=headers).json()]
+    assert nombres.count("Meta: Vacaciones") == 1
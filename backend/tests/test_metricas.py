@@ -0,0 +1,29 @@
+"""Métricas por petición de /metrics."""
+
+
+def _suma_filas(cliente, ruta):
+    prefijo = f'api_filas_sql_sum{{metodo="GET",ruta="{ruta}"}} '
+    for linea in cliente.get("/metrics").text.splitlines():
+        if linea.startswith(prefijo):
+            return float(linea[len(prefijo):])
+    return 0.0
+
+
+def test_filas_devueltas_en_sqlite(cliente, usuario):
+    headers = usuario["headers"]
+    datos = {"tipo": "Gasto", "monto": 10, "cuenta_id": usuario["cuenta_id"], "categoria_id": usuario["categorias"]["Gasto"]}
+    for dia in (10, 11, 12):
+        r = cliente.post("/movimientos/", json={**datos, "fecha": f"2024-03-{dia}T10:00:00"}, headers=headers)
+        assert r.status_code == 200, r.text
+
+    # json_rapido (el endpoint devuelve su propia respuesta)
+    antes = _suma_filas(cliente, "/movimientos/")
+    movimientos = cliente.get("/movimientos/", headers=headers).json()
+    assert len(movimientos) >= 3
+    assert _suma_filas(cliente, "/movimientos/") - antes == len(movimientos)
+
+    # response_model (pasa por serialize_response)
+    antes = _suma_filas(cliente, "/cuentas/")
+    cuentas = cliente.get("/cuentas/", headers=headers).json()
+    assert len(cuentas) >= 1
+    assert _suma_filas(cliente, "/cuentas/") - antes == len(cuentas)
@@ -0,0 +1,55 @@
+"""Archivos de los trabajos de exportación: se descargan, no quedan a medias y caducan."""
+import os
+import time
+
+import exportacion
+import trabajos
+
+
+def _esperar(cliente, headers, respuesta):
+    assert respuesta.status_code == 202, respuesta.text
+    ubicacion = respuesta.headers["Location"]
+    for _ in range(200):
+        trabajo = cliente.get(ubicacion, headers=headers).json()
+        if trabajo["estado"] not in trabajos.ACTIVOS:
+            return trabajo
+        time.sleep(0.02)
+    raise AssertionError(f"El trabajo no terminó: {trabajo}")
+
+
+def _archivos():
+    return set(os.listdir(trabajos.TRABAJOS_DIR)) if os.path.isdir(trabajos.TRABAJOS_DIR) else set()
+
+
+def test_exportacion_se_descarga(cliente, usuario):
+    headers = usuario["headers"]
+    trabajo = _esperar(cliente, headers, cliente.post("/jobs/exportacion", params={"formato": "ndjson"}, headers=headers))
+    assert trabajo["estado"] == "completado", trabajo
+    r = cliente.get(f"/jobs/{trabajo['trabajo_id']}/archivo", headers=headers)
+    assert r.status_code == 200
+    assert len(r.text.splitlines()) == trabajo["resultado"]["filas"] == 1  # el saldo inicial
+
+
+def test_exportacion_fallida_no_deja_archivo(cliente, usuario, monkeypatch):
+    def a_medias(filas):
+        yield "movimiento_id\n"
+        raise RuntimeError("fallo al exportar")
+
+    monkeypatch.setattr(exportacion, "a_csv", a_medias)
+    antes = _archivos()
+    trabajo = _esperar(cliente, usuario["headers"], cliente.post("/jobs/exportacion", headers=usuario["headers"]))
+    assert trabajo["estado"] == "fallido", trabajo
+    assert _archivos() == antes
+
+
+def test_limpiar_archivos_borra_los_antiguos():
+    antiguo, reciente = trabajos.ruta_archivo("exportacion-antigua.csv"), trabajos.ruta_archivo("exportacion-reciente.csv")
+    for ruta in (antiguo, reciente):
+        with open(ruta, "w") as archivo:
+            archivo.write("x")
+    hace = time.time() - trabajos.TRABAJOS_ARCHIVOS_SEGUNDOS - 60
+    os.utime(antiguo, (hace, hace))
+
+    assert trabajos.limpiar_archivos() >= 1
+    assert not os.path.exists(antiguo)
+    assert os.path.exists(reciente)
@@ -0,0 +1,369 @@
+"""Trabajos en segundo plano para las operaciones largas.
+
+Regenerar resúmenes, recalcular saldos, importar o exportar muchos movimientos o borrar una
+meta con miles de abonos no caben en una petición: ocupan un hilo del threadpool durante
+todo el proceso y pueden pasar del timeout del proxy. Aquí el endpoint guarda una fila en
+Trabajo, la manda a un pool de hilos propio y acotado y responde 202; el cliente consulta
+``GET /jobs/{id}`` (routers/trabajos.py) para ver el estado y el progreso.
+
+Cada tipo de trabajo es una función registrada con ``@tarea("tipo")`` que recibe
+``(db, usuario_id, parametros, progreso)``, hace su propio commit (con
+``versiones.incrementar`` si escribe) y devuelve un dict que se guarda como resultado. Si
+lanza ErrorTrabajo, su mensaje se guarda como error para el usuario.
+
+El progreso se guarda en la fila como mucho cada INTERVALO_PROGRESO segundos, con una
+sesión aparte. En SQLite no: el trabajo tiene la base bloqueada para escritura hasta su
+commit, así que el progreso solo se guarda en memoria (``en_memoria``) y lo ve el proceso
+que ejecuta el trabajo. Si el proceso muere, sus trabajos se quedan en pendiente/en curso;
+``abandonado`` los detecta porque no se actualizan desde hace TRABAJOS_ABANDONO_SEGUNDOS.
+
+Los archivos de TRABAJOS_DIR (exportaciones terminadas, restos de un proceso caído) se
+borran con ``limpiar_archivos`` al pasar TRABAJOS_ARCHIVOS_SEGUNDOS sin modificarse: al
+arrancar y, como mucho una vez por INTERVALO_LIMPIEZA, al encolar un trabajo. Después, la
+descarga de esa exportación responde 410.
+
+Configuración (.env):
+    TRABAJOS_WORKERS            hilos del pool (por defecto 2)
+    TRABAJOS_MAX_COLA           trabajos admitidos a la vez, en curso + en espera (por defecto 100)
+    TRABAJOS_DIR                archivos de importación y exportación (por defecto en el directorio temporal)
+    TRABAJOS_ABANDONO_SEGUNDOS  sin actualizarse este tiempo, un trabajo activo se da por perdido (por defecto 900)
+    TRABAJOS_ARCHIVOS_SEGUNDOS  antigüedad a partir de la que se borran los archivos de TRABAJOS_DIR (por defecto 86400)
+"""
+import datetime
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+import exportacion
+import importacion
+import models
+import resumen
+import saldos
+import versiones
+from database import SessionLocal, engine
+
+TRABAJOS_WORKERS = int(os.getenv("TRABAJOS_WORKERS") or 2)
+TRABAJOS_MAX_COLA = int(os.getenv("TRABAJOS_MAX_COLA") or 100)
+TRABAJOS_DIR = os.getenv("TRABAJOS_DIR") or os.path.join(tempfile.gettempdir(), "gastos-trabajos")
+TRABAJOS_ABANDONO_SEGUNDOS = float(os.getenv("TRABAJOS_ABANDONO_SEGUNDOS") or 900)
+TRABAJOS_ARCHIVOS_SEGUNDOS = float(os.getenv("TRABAJOS_ARCHIVOS_SEGUNDOS") or 86400)
+INTERVALO_PROGRESO = 1.0 # segundos entre escrituras del progreso
+INTERVALO_LIMPIEZA = 3600.0 # segundos entre limpiezas de TRABAJOS_DIR al encolar
+PERSISTIR_PROGRESO = engine.dialect.name != "sqlite"
+ACTIVOS = ("pendiente", "en_curso")
+
+logger = logging.getLogger(__name__)
+
+
+class ColaLlena(Exception):
+    """Ya hay TRABAJOS_MAX_COLA trabajos admitidos en este proceso."""
+
+
+class ErrorTrabajo(Exception):
+    """Fallo esperado de un trabajo; el mensaje se muestra al usuario."""
+
+
+TIPOS: Dict[str, Callable] = {}
+
+
+def tarea(tipo: str):
+    def registrar(funcion):
+        TIPOS[tipo] = funcion
+        return funcion
+    return registrar
+
+
+def ahora() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+def ruta_archivo(nombre: str) -> str:
+    os.makedirs(TRABAJOS_DIR, exist_ok=True)
+    return os.path.join(TRABAJOS_DIR, nombre)
+
+
+def _borrar(ruta: str):
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
+
+
+_ultima_limpieza: Optional[float] = None
+
+
+def limpiar_archivos() -> int:
+    """Borra los archivos de TRABAJOS_DIR sin modificar desde hace TRABAJOS_ARCHIVOS_SEGUNDOS."""
+    global _ultima_limpieza
+    _ultima_limpieza = time.monotonic()
+    limite = time.time() - TRABAJOS_ARCHIVOS_SEGUNDOS
+    borrados = 0
+    try:
+        entradas = list(os.scandir(TRABAJOS_DIR))
+    except FileNotFoundError:
+        return 0
+    for entrada in entradas:
+        try:
+            if entrada.is_file() and entrada.stat().st_mtime < limite:
+                os.remove(entrada.path)
+                borrados += 1
+        except OSError:
+            logger.warning("No se pudo borrar %s", entrada.path, exc_info=True)
+    if borrados:
+        logger.info("Borrados %d archivos de trabajos antiguos de %s", borrados, TRABAJOS_DIR)
+    return borrados
+
+
+def _actualizar(trabajo_id: int, **valores):
+    valores.setdefault("fecha_actualizacion", ahora())
+    with SessionLocal() as db:
+        db.execute(update(models.Trabajo).where(models.Trabajo.trabajo_id == trabajo_id).values(**valores))
+        db.commit()
+
+
+# --- Progreso de los trabajos de este proceso ---
+
+_memoria: Dict[int, dict] = {}
+_memoria_lock = threading.Lock()
+
+
+def en_memoria(trabajo_id: int) -> Optional[dict]:
+    """Estado y progreso de un trabajo que este proceso tiene en cola o ejecutando (si no, None)."""
+    with _memoria_lock:
+        datos = _memoria.get(trabajo_id)
+        return dict(datos) if datos is not None else None
+
+
+def _recordar(trabajo_id: int, **valores):
+    with _memoria_lock:
+        _memoria.setdefault(trabajo_id, {}).update(valores)
+
+
+def _olvidar(trabajo_id: int):
+    with _memoria_lock:
+        _memoria.pop(trabajo_id, None)
+
+
+class Progreso:
+    """Se pasa a cada tarea: ``fijar_total(n)`` si se conoce y ``avanzar(n)`` a medida que avanza."""
+
+    def __init__(self, trabajo_id: int):
+        self.trabajo_id = trabajo_id
+        self.procesados = 0
+        self.total = None
+        self._ultimo = 0.0
+
+    def fijar_total(self, total: int):
+        self.total = total
+        self._guardar(forzar=True)
+
+    def avanzar(self, cantidad: int = 1):
+        self.procesados += cantidad
+        self._guardar()
+
+    def _guardar(self, forzar: bool = False):
+        _recordar(self.trabajo_id, procesados=self.procesados, total=self.total)
+        instante = time.monotonic()
+        if PERSISTIR_PROGRESO and (forzar or instante - self._ultimo >= INTERVALO_PROGRESO):
+            self._ultimo = instante
+            _actualizar(self.trabajo_id, procesados=self.procesados, total=self.total)
+
+
+# --- Pool ---
+
+_pool = None
+_pool_lock = threading.Lock()
+_admitidos = threading.BoundedSemaphore(TRABAJOS_MAX_COLA)
+
+
+def _obtener_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=TRABAJOS_WORKERS, thread_name_prefix="trabajo")
+        return _pool
+
+
+def activo(db: Session, usuario_id: int, tipo: str) -> Optional[models.Trabajo]:
+    return db.execute(
+        select(models.Trabajo)
+        .where(models.Trabajo.usuario_id == usuario_id, models.Trabajo.tipo == tipo, models.Trabajo.estado.in_(ACTIVOS))
+        .order_by(models.Trabajo.trabajo_id.desc())
+    ).scalars().first()
+
+
+def encolar(db: Session, usuario_id: int, tipo: str, parametros: Optional[dict] = None) -> models.Trabajo:
+    """Guarda el trabajo (commit) y lo manda al pool. Lanza ColaLlena si no se admite."""
+    if _ultima_limpieza is None or time.monotonic() - _ultima_limpieza >= INTERVALO_LIMPIEZA:
+        limpiar_archivos()
+    if not _admitidos.acquire(blocking=False):
+        raise ColaLlena()
+    try:
+        trabajo = models.Trabajo(usuario_id=usuario_id, tipo=tipo, estado="pendiente", parametros=parametros, procesados=0)
+        db.add(trabajo)
+        db.commit()
+        db.refresh(trabajo)
+        _recordar(trabajo.trabajo_id, estado="pendiente")
+        _obtener_pool().submit(_ejecutar, trabajo.trabajo_id)
+    except BaseException:
+        _admitidos.release()
+        raise
+    return trabajo
+
+
+def _ejecutar(trabajo_id: int):
+    try:
+        with SessionLocal() as db:
+            trabajo = db.get(models.Trabajo, trabajo_id)
+            usuario_id, tipo, parametros = trabajo.usuario_id, trabajo.tipo, trabajo.parametros or {}
+
+        _actualizar(trabajo_id, estado="en_curso", fecha_inicio=ahora())
+        _recordar(trabajo_id, estado="en_curso")
+        progreso = Progreso(trabajo_id)
+        db = SessionLocal()
+        try:
+            resultado = TIPOS[tipo](db, usuario_id, parametros, progreso)
+        except ErrorTrabajo as e:
+            db.rollback()
+            _actualizar(trabajo_id, estado="fallido", error=str(e), fecha_fin=ahora(),
+                        procesados=progreso.procesados, total=progreso.total)
+        except Exception:
+            db.rollback()
+            logger.exception("Falló el trabajo %s (%s)", trabajo_id, tipo)
+            _actualizar(trabajo_id, estado="fallido", error="Error interno al ejecutar el trabajo", fecha_fin=ahora(),
+                        procesados=progreso.procesados, total=progreso.total)
+        else:
+            procesados = progreso.total if progreso.total is not None else progreso.procesados
+            _actualizar(trabajo_id, estado="completado", resultado=resultado, fecha_fin=ahora(),
+                        procesados=procesados, total=progreso.total)
+        finally:
+            db.close()
+    except Exception:
+        logger.exception("No se pudo ejecutar el trabajo %s", trabajo_id)
+    finally:
+        _olvidar(trabajo_id)
+        _admitidos.release()
+
+
+def abandonado(trabajo: models.Trabajo) -> bool:
+    """Activo en la tabla, pero ningún proceso lo está ejecutando (reinicio, caída)."""
+    return (
+        trabajo.estado in ACTIVOS
+        and en_memoria(trabajo.trabajo_id) is None
+        and trabajo.fecha_actualizacion < ahora() - datetime.timedelta(seconds=TRABAJOS_ABANDONO_SEGUNDOS)
+    )
+
+
+def cerrar():
+    # Los trabajos en espera se cancelan y quedan pendientes hasta que se den por abandonados
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+# --- Tareas ---
+
+@tarea("resumen")
+def regenerar_resumen(db: Session, usuario_id: int, parametros: dict, progreso: Progreso) -> dict:
+    filas = resumen.reconstruir(db, usuario_id)
+    versiones.incrementar(db, usuario_id)
+    db.commit()
+    return {"filas": filas}
+
+
+@tarea("saldos")
+def recalcular_saldos(db: Session, usuario_id: int, parametros: dict, progreso: Progreso) -> dict:
+    resultado = saldos.recalcular(db, usuario_id)
+    versiones.incrementar(db, usuario_id)
+    db.commit()
+    return resultado
+
+
+def _contar(filas, progreso: Progreso):
+    for fila in filas:
+        progreso.avanzar()
+        yield fila
+
+
+def _contar_trozos(trozos, progreso: Progreso):
+    for trozo in trozos:
+        progreso.avanzar(len(trozo))
+        yield trozo
+
+
+@tarea("importacion")
+def importar(db: Session, usuario_id: int, parametros: dict, progreso: Progreso) -> dict:
+    ruta = parametros["archivo"]
+    try:
+        with open(ruta, "rb") as archivo:
+            if parametros.get("nombre", "").lower().endswith((".ofx", ".qfx")):
+                filas = importacion.filas_ofx(archivo)
+            else:
+                filas = importacion.filas_csv(archivo)
+            try:
+                resultado = importacion.importar(
+                    db, usuario_id, _contar(filas, progreso), parametros.get("cuenta_id"), parametros.get("categoria_id")
+                )
+            except importacion.ErrorImportacion as e:
+                raise ErrorTrabajo("No se importó ningún movimiento. " + "; ".join(e.errores))
+        versiones.incrementar(db, usuario_id)
+        db.commit()
+        return resultado
+    finally:
+        _borrar(ruta)
+
+
+@tarea("exportacion")
+def exportar(db: Session, usuario_id: int, parametros: dict, progreso: Progreso) -> dict:
+    # Como GET /movimientos/exportar, pero a parametros["archivo"]; se descarga con GET /jobs/{id}/archivo
+    fecha_desde, fecha_hasta = (
+        datetime.datetime.fromisoformat(parametros[clave]) if parametros.get(clave) else None
+        for clave in ("fecha_desde", "fecha_hasta")
+    )
+    filas = exportacion.filas(usuario_id, fecha_desde, fecha_hasta, parametros.get("cuenta_id"), parametros.get("categoria_id"))
+    convertir = exportacion.a_ndjson if parametros["formato"] == "ndjson" else exportacion.a_csv
+    ruta = parametros["archivo"]
+    try:
+        with open(ruta, "w", encoding="utf-8", newline="") as archivo:
+            for texto in convertir(_contar_trozos(filas, progreso)):
+                archivo.write(texto)
+    except BaseException:
+        _borrar(ruta) # un archivo a medias no se puede descargar: no se deja en TRABAJOS_DIR
+        raise
+    return {"filas": progreso.procesados, "formato": parametros["formato"]}
+
+
+LOTE_BORRADO = 5000
+
+
+@tarea("eliminar_meta")
+def eliminar_meta(db: Session, usuario_id: int, parametros: dict, progreso: Progreso) -> dict:
+    # Igual que DELETE /metas/{id}, en una sola transacción, pero borrando los abonos por lotes
+    meta = db.query(models.Meta).filter(
+        models.Meta.meta_id == parametros["meta_id"], models.Meta.usuario_id == usuario_id
+    ).first()
+    if not meta:
+        raise ErrorTrabajo("Meta no encontrada")
+
+    abonos = models.MovimientoMeta
+    progreso.fijar_total(db.execute(select(func.count()).where(abonos.meta_id == meta.meta_id)).scalar())
+    while True:
+        ids = db.scalars(select(abonos.movimiento_meta_id).where(abonos.meta_id == meta.meta_id).limit(LOTE_BORRADO)).all()
+        if not ids:
+            break
+        db.execute(delete(abonos).where(abonos.movimiento_meta_id.in_(ids)))
+        progreso.avanzar(len(ids))
+
+    db.delete(meta)
+    versiones.incrementar(db, usuario_id)
+    db.commit()
+    return {"abonos_eliminados": progreso.procesados}
@@ -0,0 +1,84 @@
+"""Muestra el plan (EXPLAIN) de las consultas frecuentes y si cada una usa un índice.
+
+Para comparar antes/después de la migración de índices:
+
+    alembic upgrade 0001 && python verificar_indices.py
+    alembic upgrade head && python verificar_indices.py
+
+En Postgres se desactiva el seq scan dentro de la transacción: con tablas pequeñas el
+planificador lo prefiere aunque exista el índice, y lo que interesa aquí es si el índice
+puede servir la consulta.
+"""
+import sys
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from database import engine
+import busqueda
+import models
+
+
+def consultas(dialecto: str):
+    movimiento = models.Movimiento.__table__
+    categoria = models.Categoria.__table__
+    movimiento_meta = models.MovimientoMeta.__table__
+    archivo = models.MovimientoArchivo.__table__
+    return {
+        "GET /movimientos (usuario + orden por fecha)": movimiento.select()
+            .where(movimiento.c.usuario_id == 1)
+            .order_by(movimiento.c.fecha.desc(), movimiento.c.movimiento_id.desc())
+            .limit(101),
+        "GET /movimientos antes del corte (Movimiento_Archivo)": archivo.select()
+            .where(archivo.c.usuario_id == 1)
+            .order_by(archivo.c.fecha.desc(), archivo.c.movimiento_id.desc())
+            .limit(101),
+        "Categoría por usuario y nombre (abonos, saldo inicial)": categoria.select()
+            .where(categoria.c.usuario_id == 1, categoria.c.nombre_categoria == "Ajustes"),
+        "Movimiento_Meta por movimiento (editar/borrar movimiento)": movimiento_meta.select()
+            .where(movimiento_meta.c.movimiento_id == 1),
+        "Movimiento_Meta por meta (listado de metas)": select(
+                movimiento_meta.c.meta_id,
+                func.count(movimiento_meta.c.movimiento_meta_id),
+                func.max(movimiento_meta.c.fecha_asignacion),
+            ).where(movimiento_meta.c.meta_id.in_([1, 2, 3])).group_by(movimiento_meta.c.meta_id),
+        "Historial de abonos de una meta": movimiento_meta.select()
+            .where(movimiento_meta.c.meta_id == 1)
+            .order_by(movimiento_meta.c.fecha_asignacion.desc(), movimiento_meta.c.movimiento_meta_id.desc())
+            .limit(51),
+        "Búsqueda en la descripción (GET /movimientos/buscar)": busqueda.aplicar(
+                select(models.Movimiento.movimiento_id).where(models.Movimiento.usuario_id == 1),
+                busqueda.terminos("supermercado"), dialecto,
+            )[0].limit(101),
+    }
+
+
+def usa_indice(plan: str) -> bool:
+    plan = plan.lower()
+    return any(marca in plan for marca in ("using index", "using covering index", "index scan", "index only scan", "bitmap index scan",
+                                             "virtual table index"))
+
+
+def main() -> int:
+    dialecto = engine.dialect.name
+    if dialecto == "postgresql":
+        prefijo, dialecto_sql = "EXPLAIN", postgresql.dialect()
+    else:
+        prefijo, dialecto_sql = "EXPLAIN QUERY PLAN", sqlite.dialect()
+
+    sin_indice = 0
+    with engine.begin() as conn:
+        if dialecto == "postgresql":
+            conn.execute(text("SET LOCAL enable_seqscan = off"))
+        for nombre, consulta in consultas(dialecto).items():
+            sql = str(consulta.compile(dialect=dialecto_sql, compile_kwargs={"literal_binds": True}))
+            filas = conn.execute(text(f"{prefijo} {sql}")).fetchall()
+            plan = "\n".join(str(fila[-1]) for fila in filas)
+            ok = usa_indice(plan)
+            sin_indice += not ok
+            print(f"[{'índice' if ok else 'SCAN  '}] {nombre}")
+            for linea in plan.splitlines():
+                print(f"           {linea}")
+    return 1 if sin_indice else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
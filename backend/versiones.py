@@ -0,0 +1,106 @@
+"""Versión de los datos de cada usuario y GET condicional (ETag / If-None-Match).
+
+Cada escritura en los routers llama a ``incrementar`` dentro de su transacción. Los
+listados llevan un ETag construido con esa versión (más la ruta y los parámetros de la
+petición), y si el cliente ya tiene esa versión se responde 304 sin ejecutar la consulta
+del listado ni serializar nada: solo se lee un entero por clave primaria.
+
+Con réplica de lectura (REPLICA_DATABASE_URL), ``get_db_lectura`` da a los GET una sesión
+de la réplica, salvo al usuario que acaba de escribir: ``incrementar`` lo marca y durante
+LECTURA_PRIMARIA_SEGUNDOS sigue leyendo de la primaria, para que vea lo que escribió. El
+ETag se calcula con la misma sesión que el listado, así que versión y datos coinciden.
+"""
+import hashlib
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import models
+import security
+from database import AsyncSessionLectura, SessionLectura, escrituras_recientes, get_async_db, get_db, usar_replica
+
+
+def incrementar(db: Session, usuario_id: int):
+    db.execute(
+        update(models.Usuario)
+        .where(models.Usuario.usuario_id == usuario_id)
+        .values(version_datos=models.Usuario.version_datos + 1)
+    )
+    escrituras_recientes.marcar(usuario_id)
+
+
+def get_db_lectura(
+    db: Session = Depends(get_db),
+    current_user: models.Usuario = Depends(security.get_current_user),
+):
+    """Sesión para los GET: la de la réplica, o la de get_db (primaria) si no hay réplica o
+    el usuario escribió hace poco (``database.usar_replica``)."""
+    if not usar_replica(current_user.usuario_id):
+        yield db
+        return
+    replica = SessionLectura()
+    try:
+        yield replica
+    finally:
+        replica.close()
+
+
+async def get_async_db_lectura(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.Usuario = Depends(security.get_current_user_async),
+):
+    if AsyncSessionLectura is None or not usar_replica(current_user.usuario_id):
+        yield db
+        return
+    async with AsyncSessionLectura() as replica:
+        yield replica
+
+
+def _consulta_version(usuario_id: int):
+    return select(models.Usuario.version_datos).where(models.Usuario.usuario_id == usuario_id)
+
+
+def _etag(request: Request, usuario_id: int, version: int) -> str:
+    # Cada página / combinación de filtros es un recurso distinto para la caché del navegador
+    consulta = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+    huella = hashlib.sha1(f"{usuario_id}:{request.url.path}?{consulta}".encode()).hexdigest()[:16]
+    return f'W/"{version}-{huella}"'
+
+
+def _coincide(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Comparación débil: se ignora el prefijo W/
+    return etag.removeprefix("W/") in (e.strip().removeprefix("W/") for e in if_none_match.split(","))
+
+
+def _responder(request: Request, response: Response, usuario_id: int, version: int):
+    etag = _etag(request, usuario_id, version or 0)
+    cabeceras = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _coincide(if_none_match, etag):
+        raise HTTPException(status_code=304, headers=cabeceras)
+    response.headers.update(cabeceras)
+
+
+def condicional(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db_lectura),
+    current_user: models.Usuario = Depends(security.get_current_user),
+):
+    """Dependencia para los listados: pone el ETag o corta con 304 antes del endpoint."""
+    version = db.execute(_consulta_version(current_user.usuario_id)).scalar()
+    _responder(request, response, current_user.usuario_id, version)
+
+
+async def condicional_async(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db_lectura),
+    current_user: models.Usuario = Depends(security.get_current_user_async),
+):
+    version = (await db.execute(_consulta_version(current_user.usuario_id))).scalar()
+    _responder(request, response, current_user.usuario_id, version)
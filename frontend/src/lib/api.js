@@ -8,7 +8,9 @@ class ApiError extends Error {
   }
 }
 
-export async function request(endpoint, method = 'GET', body = null) {
+// Con conCursor devuelve { datos, siguiente }: siguiente es la cabecera X-Next-Cursor de los
+// listados paginados (null en la última página) y se pasa como `cursor` para pedir la siguiente
+export async function request(endpoint, method = 'GET', body = null, { conCursor = false } = {}) {
   const headers = {
     'Content-Type': 'application/json',
   };
@@ -34,7 +36,10 @@ export async function request(endpoint, method = 'GET', body = null) {
     if (!response.ok) {
       throw new ApiError(data.detail || `Error del servidor (${response.status})`, response.status);
     }
-    
+
+    if (conCursor) {
+      return { datos: data, siguiente: response.headers.get('X-Next-Cursor') };
+    }
     return data;
   } catch (error) {
     // ENMASCARAR URL EN MENSAJES DE ERROR PARA SEGURIDAD
@@ -49,6 +54,16 @@ export async function request(endpoint, method = 'GET', body = null) {
   }
 }
 
+// Convierte un objeto de filtros en query string, ignorando valores vacíos
+function toQuery(params = {}) {
+  const query = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value !== undefined && value !== null && value !== '') query.append(key, value);
+  });
+  const str = query.toString();
+  return str ? `?${str}` : '';
+}
+
 export const api = {
   // Auth
   login: (username, password) => {
@@ -74,10 +89,15 @@ export const api = {
 
   // Dashboard
   getDashboard: () => request('/dashboard'),
+  getDashboardSeries: (params = {}) => request(`/dashboard/series${toQuery(params)}`),
+  getDashboardCategorias: (params = {}) => request(`/dashboard/categorias${toQuery(params)}`),
   
   // Movimientos
-  getMovimientos: () => request('/movimientos'),
+  // Una página del listado: { datos, siguiente }
+  getMovimientos: (params = {}) => request(`/movimientos${toQuery(params)}`, 'GET', null, { conCursor: true }),
+  buscarMovimientos: (q, params = {}) => request(`/movimientos/buscar${toQuery({ ...params, q })}`, 'GET', null, { conCursor: true }),
   createMovimiento: (data) => request('/movimientos', 'POST', data),
+  createMovimientosBatch: (movimientos) => request('/movimientos/batch', 'POST', { movimientos }),
   updateMovimiento: (id, data) => request(`/movimientos/${id}`, 'PUT', data),
   deleteMovimiento: (id) => request(`/movimientos/${id}`, 'DELETE'),
 
@@ -93,11 +113,20 @@ export const api = {
 
   // Metas
   getMetas: () => request('/metas'),
+  getAbonosMeta: (metaId, params = {}) => request(`/metas/${metaId}/abonos${toQuery(params)}`),
   createMeta: (data) => request('/metas', 'POST', data),
   abonarMeta: (metaId, data) => request(`/metas/${metaId}/abonar`, 'POST', data),
   updateMeta: (id, data) => request(`/metas/${id}`, 'PUT', data),
   deleteMeta: (id) => request(`/metas/${id}`, 'DELETE'),
 
+  // Trabajos en segundo plano: responden 202 con el trabajo; su estado se consulta con getTrabajo
+  getTrabajos: () => request('/jobs'),
+  getTrabajo: (id) => request(`/jobs/${id}`),
+  regenerarResumen: () => request('/jobs/resumen', 'POST'),
+  recalcularSaldos: () => request('/jobs/saldos', 'POST'),
+  exportarEnSegundoPlano: (params = {}) => request(`/jobs/exportacion${toQuery(params)}`, 'POST'),
+  deleteMetaEnSegundoPlano: (id) => request(`/jobs/eliminar-meta/${id}`, 'POST'),
+
   // Usuarios (Perfil)
   getProfile: () => request('/usuarios/me'),
   updateProfile: (data) => request('/usuarios/me', 'PUT', data),